@@ -15,6 +15,10 @@ logger = logging.getLogger(__name__)
 
 THIS_DIR = path.dirname(path.abspath(__file__))
 
+# The approximate number of evidences scored together when setting
+# hierarchical beliefs
+SCORING_BATCH_SIZE = 1000000
+
 
 def load_default_probs():
     json_path = path.join(THIS_DIR, pardir, 'resources',
@@ -56,6 +60,34 @@ class BeliefScorer(object):
         raise NotImplementedError('Need to subclass BeliefScorer and '
                                   'implement methods.')
 
+    def score_statements(self, statements, extra_evidences=None):
+        """Computes the prior belief probabilities for a list of Statements.
+
+        By default, this calls `score_statement` for each Statement, scorers
+        can override it to implement more efficient batch scoring.
+
+        Parameters
+        ----------
+        statements : list[indra.statements.Statement]
+            A list of INDRA Statements whose belief scores are to
+            be calculated.
+        extra_evidences : Optional[list[list[indra.statements.Evidence]]]
+            A list containing, for each Statement, a list of Evidences that
+            are supporting the Statement (that aren't already included in
+            the Statement's own evidence list).
+
+        Returns
+        -------
+        numpy.ndarray
+            The computed prior probabilities for the statements.
+        """
+        if extra_evidences is None:
+            extra_evidences = [None] * len(statements)
+        return numpy.array([self.score_statement(st, extra_evidence)
+                            for st, extra_evidence
+                            in zip(statements, extra_evidences)],
+                           dtype=float)
+
     def check_prior_probs(self, statements):
         """Make sure the scorer has all the information needed to compute
         belief scores of each statement in the provided list, and raises an
@@ -181,6 +213,71 @@ class SimpleScorer(BeliefScorer):
         all_evidence = st.evidence + extra_evidence
         return self.score_evidence_list(all_evidence)
 
+    def score_statements(self, statements, extra_evidences=None):
+        """Computes the prior belief probabilities for a list of Statements.
+
+        All the evidences of all the Statements are encoded as flat arrays
+        of statement, source and subtype indices and negation flags, and the
+        products of error probabilities per source and Statement are
+        calculated with segmented array reductions. The results are the same
+        as those of calling `score_statement` for each Statement.
+
+        Parameters
+        ----------
+        statements : list[indra.statements.Statement]
+            A list of INDRA Statements whose belief scores are to
+            be calculated.
+        extra_evidences : Optional[list[list[indra.statements.Evidence]]]
+            A list containing, for each Statement, a list of Evidences that
+            are supporting the Statement (that aren't already included in
+            the Statement's own evidence list).
+
+        Returns
+        -------
+        numpy.ndarray
+            The computed prior probabilities for the statements.
+        """
+        # If a subclass customizes scoring, we can't assume that the
+        # vectorized implementation is equivalent
+        if type(self).score_statement is not SimpleScorer.score_statement \
+                or type(self).score_evidence_list is not \
+                SimpleScorer.score_evidence_list:
+            return super().score_statements(statements, extra_evidences)
+        stmt_indices = []
+        type_indices = []
+        negated = []
+        type_codes = {}
+        for stmt_idx, st in enumerate(statements):
+            evidences = st.evidence
+            if extra_evidences is not None and extra_evidences[stmt_idx]:
+                evidences = evidences + extra_evidences[stmt_idx]
+            for ev in evidences:
+                stmt_indices.append(stmt_idx)
+                type_indices.append(type_codes.setdefault(
+                    tag_evidence_subtype(ev), len(type_codes)))
+                negated.append(bool(ev.epistemics.get('negated')))
+        if not stmt_indices:
+            return numpy.zeros(len(statements))
+        # Sources are numbered in sorted order so that per-source factors
+        # are multiplied in the same order as in score_evidence_list
+        sources = sorted({stype for stype, _ in type_codes})
+        source_codes = {source: idx for idx, source in enumerate(sources)}
+        type_rand = numpy.zeros(len(type_codes))
+        type_sources = numpy.zeros(len(type_codes), dtype=int)
+        for (stype, subtype), idx in type_codes.items():
+            type_rand[idx] = _get_random_noise_prior(
+                stype, subtype, self.prior_probs['rand'], self.subtype_probs)
+            type_sources[idx] = source_codes[stype]
+        source_syst = numpy.array([self.prior_probs['syst'][source]
+                                   for source in sources])
+        type_indices = numpy.array(type_indices)
+        return _score_evidence_arrays(len(statements),
+                                      numpy.array(stmt_indices),
+                                      type_sources[type_indices],
+                                      type_rand[type_indices],
+                                      numpy.array(negated, dtype=bool),
+                                      source_syst)
+
     def check_prior_probs(self, statements):
         """Throw Exception if BeliefEngine parameter is missing.
 
@@ -328,8 +425,9 @@ class BeliefEngine(object):
             by this function.
         """
         self.scorer.check_prior_probs(statements)
-        for st in statements:
-            st.belief = self.scorer.score_statement(st)
+        beliefs = self.scorer.score_statements(statements)
+        for st, belief in zip(statements, beliefs):
+            st.belief = float(belief)
 
     def set_hierarchy_probs(self, statements):
         """Sets hierarchical belief probabilities for INDRA Statements.
@@ -384,8 +482,16 @@ class BeliefEngine(object):
         assert_no_cycle(g)
         ranked_stmts = get_ranked_stmts(g)
         logger.debug('Start belief propagation over ranked statements')
+        # The belief packages of each statement are built from those of the
+        # statements it supports, which are shared across the hierarchy
+        package_cache = _BeliefPackageCache(self.matches_fun)
+        # Statements are scored in batches, limiting the number of supporting
+        # evidence lists held at a time
+        batch_stmts = []
+        batch_evidences = []
+        batch_size = 0
         for st in ranked_stmts:
-            bps = _get_belief_package(st, self.matches_fun)
+            bps = package_cache.get_belief_packages(st)
             supporting_evidences = []
             # NOTE: the last belief package in the list is this statement's own
             for bp in bps[:-1]:
@@ -394,12 +500,21 @@ class BeliefEngine(object):
                 for ev in bp.evidences:
                     if not ev.epistemics.get('negated'):
                         supporting_evidences.append(ev)
-            # Now add the Statement's own evidence
-            # Now score all the evidences
-            belief = self.scorer.score_statement(st, supporting_evidences)
-            st.belief = belief
+            batch_stmts.append(st)
+            batch_evidences.append(supporting_evidences)
+            batch_size += len(st.evidence) + len(supporting_evidences)
+            if batch_size >= SCORING_BATCH_SIZE:
+                self._set_batch_beliefs(batch_stmts, batch_evidences)
+                batch_stmts, batch_evidences, batch_size = [], [], 0
+        self._set_batch_beliefs(batch_stmts, batch_evidences)
         logger.debug('Finished belief propagation over ranked statements')
 
+    def _set_batch_beliefs(self, statements, extra_evidences):
+        # Score the Statements along with their supporting evidences
+        beliefs = self.scorer.score_statements(statements, extra_evidences)
+        for st, belief in zip(statements, beliefs):
+            st.belief = float(belief)
+
     def set_linked_probs(self, linked_statements):
         """Sets the belief probabilities for a list of linked INDRA Statements.
 
@@ -424,21 +539,89 @@ BeliefPackage = namedtuple('BeliefPackage', 'statement_key evidences')
 
 def _get_belief_package(stmt, matches_fun):
     """Return the belief packages of a given statement recursively."""
-    # This list will contain the belief packages for the given statement
-    belief_packages = []
-    # Iterate over all the support parents
-    for st in stmt.supports:
-        # Recursively get all the belief packages of the parent
-        parent_packages = _get_belief_package(st, matches_fun)
-        package_stmt_keys = [pkg.statement_key for pkg in belief_packages]
-        for package in parent_packages:
-            # Only add this belief package if it hasn't already been added
-            if package.statement_key not in package_stmt_keys:
-                belief_packages.append(package)
-    # Now make the Statement's own belief package and append it to the list
-    belief_package = BeliefPackage(matches_fun(stmt), stmt.evidence)
-    belief_packages.append(belief_package)
-    return belief_packages
+    return _BeliefPackageCache(matches_fun).get_belief_packages(stmt)
+
+
+class _BeliefPackageCache(object):
+    """Compute the belief packages of statements with dynamic programming.
+
+    The belief packages of a statement consist of the belief packages of all
+    the statements it supports, deduplicated by statement key in order of
+    first appearance, followed by the statement's own belief package. Rather
+    than recursively rebuilding these lists for each statement, each package
+    is assigned an integer index, and the package indices of each statement
+    are computed once from those of the statements it supports and cached
+    as an array.
+
+    Parameters
+    ----------
+    matches_fun : function
+        A function which returns the key of a statement.
+    """
+    def __init__(self, matches_fun):
+        self.matches_fun = matches_fun
+        # The belief package with each index and the integer codes of keys
+        self.packages = []
+        self.key_codes = {}
+        # The package indices and key codes for each statement by id, along
+        # with the statement itself to make sure the id isn't reused
+        self.stmt_packages = {}
+
+    def get_belief_packages(self, stmt):
+        """Return the list of belief packages of a given statement."""
+        package_indices, _ = self._get_package_indices(stmt)
+        return [self.packages[idx] for idx in package_indices]
+
+    def _get_package_indices(self, stmt):
+        # We traverse the statements being supported depth-first without
+        # recursion to handle deep hierarchies
+        stack = [(stmt, False)]
+        in_progress = set()
+        while stack:
+            st, expanded = stack.pop()
+            if id(st) in self.stmt_packages:
+                continue
+            if not expanded:
+                if id(st) in in_progress:
+                    raise ValueError('Cycle found in the statements '
+                                     'supported by %s' % st)
+                in_progress.add(id(st))
+                stack.append((st, True))
+                stack += [(sup, False) for sup in reversed(st.supports)
+                          if id(sup) not in self.stmt_packages]
+                continue
+            in_progress.remove(id(st))
+            self.stmt_packages[id(st)] = (st,) + self._merge_packages(st)
+        return self.stmt_packages[id(stmt)][1:]
+
+    def _merge_packages(self, stmt):
+        # Collect the packages of the statements being supported in order,
+        # followed by the statement's own package
+        key = self.matches_fun(stmt)
+        key_code = self.key_codes.setdefault(key, len(self.key_codes))
+        self.packages.append(BeliefPackage(key, stmt.evidence))
+        own_index = numpy.array([len(self.packages) - 1])
+        own_code = numpy.array([key_code])
+        if not stmt.supports:
+            return own_index, own_code
+        # Packages of each supported statement are only added if their key
+        # didn't appear among those of the previously supported statements
+        indices = []
+        codes = []
+        seen_codes = set()
+        for st in stmt.supports:
+            _, st_indices, st_codes = self.stmt_packages[id(st)]
+            if seen_codes:
+                keep = numpy.fromiter((code not in seen_codes
+                                       for code in st_codes.tolist()),
+                                      dtype=bool, count=len(st_codes))
+                st_indices = st_indices[keep]
+                st_codes = st_codes[keep]
+            seen_codes.update(st_codes.tolist())
+            indices.append(st_indices)
+            codes.append(st_codes)
+        return (numpy.concatenate(indices + [own_index]),
+                numpy.concatenate(codes + [own_code]))
 
 
 def sample_statements(stmts, seed=None):
@@ -482,7 +665,10 @@ def evidence_random_noise_prior(evidence, type_probs, subtype_probs):
     """
     (stype, subtype) = tag_evidence_subtype(evidence)
     # Get the subtype, if available
+    return _get_random_noise_prior(stype, subtype, type_probs, subtype_probs)
+
 
+def _get_random_noise_prior(stype, subtype, type_probs, subtype_probs):
     # Return the subtype random noise prior, if available
     if subtype_probs is not None:
         if stype in subtype_probs:
@@ -493,6 +679,67 @@ def evidence_random_noise_prior(evidence, type_probs, subtype_probs):
     return type_probs[stype]
 
 
+def _score_evidence_arrays(n_stmts, stmt_indices, source_indices, rand_probs,
+                           negated, source_syst):
+    """Return belief scores from flat arrays describing evidences.
+
+    Parameters
+    ----------
+    n_stmts : int
+        The number of statements to score.
+    stmt_indices : numpy.ndarray
+        The index of the statement each evidence belongs to.
+    source_indices : numpy.ndarray
+        The index of the source of each evidence.
+    rand_probs : numpy.ndarray
+        The random error probability of each evidence.
+    negated : numpy.ndarray
+        A boolean flag for each evidence indicating whether it is negated.
+    source_syst : numpy.ndarray
+        The systematic error probability of each source.
+
+    Returns
+    -------
+    numpy.ndarray
+        The belief score of each statement.
+    """
+    # We sort evidences into groups by statement, negation and source
+    # while maintaining their original order within each group
+    order = numpy.lexsort((source_indices, negated, stmt_indices))
+    stmt_indices = stmt_indices[order]
+    negated = negated[order]
+    source_indices = source_indices[order]
+    rand_probs = rand_probs[order]
+    # The product of random error probabilities per group plus the
+    # systematic error probability of the group's source
+    starts = _get_segment_starts(stmt_indices, negated, source_indices)
+    source_factors = source_syst[source_indices[starts]] + \
+        numpy.multiply.reduceat(rand_probs, starts)
+    # The probability of incorrectness is the product of the source factors
+    # for each statement and negation
+    stmt_indices = stmt_indices[starts]
+    negated = negated[starts]
+    starts = _get_segment_starts(stmt_indices, negated)
+    probs = 1 - numpy.multiply.reduceat(source_factors, starts)
+    stmt_indices = stmt_indices[starts]
+    negated = negated[starts]
+    # Positive evidence must be correct and negative evidence incorrect
+    pos_probs = numpy.zeros(n_stmts)
+    pos_probs[stmt_indices[~negated]] = probs[~negated]
+    neg_probs = numpy.zeros(n_stmts)
+    neg_probs[stmt_indices[negated]] = probs[negated]
+    return pos_probs * (1 - neg_probs)
+
+
+def _get_segment_starts(*keys):
+    """Return the start indices of runs of equal values in sorted arrays."""
+    change = numpy.zeros(len(keys[0]), dtype=bool)
+    change[0] = True
+    for key in keys:
+        change[1:] |= key[1:] != key[:-1]
+    return numpy.flatnonzero(change)
+
+
 def tag_evidence_subtype(evidence):
     """Returns the type and subtype of an evidence object as a string,
     typically the extraction rule or database from which the statement
@@ -0,0 +1,102 @@
+"""Benchmark hierarchical belief calculation on synthetic deep hierarchies.
+
+This compares the time it takes to run BeliefEngine.set_hierarchy_probs
+with the dynamic programming implementation of belief package collection
+against the previous recursive implementation on two kinds of synthetic
+refinement hierarchies: chains, where each statement refines the previous
+one, and layered lattices, where each statement refines two statements in
+the layer above, similar to FamPlex families nested into each other. The
+beliefs calculated with the two implementations are checked to be identical.
+
+Usage: python -m indra.benchmarks.belief_hierarchy
+"""
+import time
+import random
+from indra.statements import Phosphorylation, Agent, Evidence
+from indra.belief import BeliefEngine, BeliefPackage
+import indra.belief
+
+
+def get_belief_package_recursive(stmt, matches_fun):
+    """The previous recursive implementation of _get_belief_package."""
+    belief_packages = []
+    for st in stmt.supports:
+        parent_packages = get_belief_package_recursive(st, matches_fun)
+        package_stmt_keys = [pkg.statement_key for pkg in belief_packages]
+        for package in parent_packages:
+            if package.statement_key not in package_stmt_keys:
+                belief_packages.append(package)
+    belief_package = BeliefPackage(matches_fun(stmt), stmt.evidence)
+    belief_packages.append(belief_package)
+    return belief_packages
+
+
+class _RecursivePackageCache(object):
+    def __init__(self, matches_fun):
+        self.matches_fun = matches_fun
+
+    def get_belief_packages(self, stmt):
+        return get_belief_package_recursive(stmt, self.matches_fun)
+
+
+def make_stmt(idx):
+    sources = ['reach', 'sparser', 'trips', 'medscan']
+    evidence = [Evidence(source_api=random.choice(sources),
+                         text='sentence %d' % ev_idx)
+                for ev_idx in range(random.randint(1, 3))]
+    return Phosphorylation(Agent('A%d' % idx), Agent('B'), evidence=evidence)
+
+
+def link(specific, generic):
+    generic.supports.append(specific)
+    specific.supported_by.append(generic)
+
+
+def make_chain(depth):
+    """Return statements where each refines the previous one."""
+    stmts = [make_stmt(idx) for idx in range(depth)]
+    for generic, specific in zip(stmts[:-1], stmts[1:]):
+        link(specific, generic)
+    return stmts
+
+
+def make_lattice(n_layers, width):
+    """Return layered statements each refining two in the layer above."""
+    layers = [[make_stmt(layer * width + idx) for idx in range(width)]
+              for layer in range(n_layers)]
+    for upper, lower in zip(layers[:-1], layers[1:]):
+        for idx, specific in enumerate(lower):
+            link(specific, upper[idx])
+            link(specific, upper[(idx + 1) % width])
+    return [stmt for layer in layers for stmt in layer]
+
+
+def time_beliefs(stmts, package_cache_class):
+    indra.belief._BeliefPackageCache = package_cache_class
+    ts = time.time()
+    BeliefEngine().set_hierarchy_probs(stmts)
+    return time.time() - ts, [stmt.belief for stmt in stmts]
+
+
+def main():
+    random.seed(0)
+    dp_cache_class = indra.belief._BeliefPackageCache
+    benchmarks = [('chain', depth, make_chain(depth))
+                  for depth in [50, 100, 200, 400]] + \
+        [('lattice', n_layers, make_lattice(n_layers, 10))
+         for n_layers in [4, 8, 12, 14]]
+    try:
+        for name, size, stmts in benchmarks:
+            dp_time, dp_beliefs = time_beliefs(stmts, dp_cache_class)
+            rec_time, rec_beliefs = time_beliefs(stmts,
+                                                 _RecursivePackageCache)
+            assert dp_beliefs == rec_beliefs
+            print('%s of size %d (%d statements): recursive %.3fs, '
+                  'dynamic programming %.3fs' %
+                  (name, size, len(stmts), rec_time, dp_time))
+    finally:
+        indra.belief._BeliefPackageCache = dp_cache_class
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Benchmark finding contradictions among Statements with agent key indexes.
+
+This generates a synthetic corpus of Statements with opposite polarities
+(Phosphorylation/Dephosphorylation, Activation/Inhibition and
+IncreaseAmount/DecreaseAmount) and ActiveForms among random genes and FamPlex
+families, and runs Preassembler.find_contradicts on it. The number of
+Statement pairs that are compared is reported along with the number of
+pairs that comparing all Statements of opposite polarity with each other
+would take. Optionally, the contradictions are also found by comparing all
+pairs, to check that the results are identical.
+
+Usage: python -m indra.benchmarks.contradicts [n_stmts] [--exhaustive]
+"""
+import sys
+import time
+import random
+import itertools
+from indra.statements import Phosphorylation, Dephosphorylation, \
+    Activation, Inhibition, IncreaseAmount, DecreaseAmount, ActiveForm, \
+    Agent, ModCondition
+from indra.ontology.bio import bio_ontology
+from indra.preassembler import Preassembler
+
+
+families = ['RAS', 'RAF', 'MEK', 'ERK', 'AKT', 'PI3K', 'JNK', 'p38', 'PKC',
+            'AMPK']
+
+
+def make_corpus(n_stmts, n_genes=2000):
+    """Return a list of random Statements of opposite polarities."""
+    rng = random.Random(0)
+
+    def agent():
+        if rng.random() < 0.1:
+            fplx = rng.choice(families)
+            return Agent(fplx, db_refs={'FPLX': fplx})
+        gene = rng.randint(1, n_genes)
+        return Agent('GENE%d' % gene, db_refs={'HGNC': str(gene)})
+
+    stmt_pairs = [(Phosphorylation, Dephosphorylation),
+                  (Activation, Inhibition),
+                  (IncreaseAmount, DecreaseAmount)]
+    stmts = []
+    for _ in range(n_stmts):
+        if rng.random() < 0.1:
+            mods = [ModCondition('phosphorylation')] \
+                if rng.random() < 0.5 else []
+            ag = agent()
+            ag.mods = mods
+            stmts.append(ActiveForm(ag, 'kinase', rng.random() < 0.5))
+            continue
+        stmt_cls = rng.choice(rng.choice(stmt_pairs))
+        stmts.append(stmt_cls(agent(), agent()))
+    return stmts
+
+
+def find_contradicts_exhaustive(stmts):
+    """Return contradictions by comparing all pairs of Statements."""
+    stmts_by_type = {}
+    for stmt in stmts:
+        stmts_by_type.setdefault(type(stmt), []).append(stmt)
+    contradicts = []
+    for pos, neg in [(Phosphorylation, Dephosphorylation),
+                     (Activation, Inhibition),
+                     (IncreaseAmount, DecreaseAmount)]:
+        for st1, st2 in itertools.product(stmts_by_type.get(pos, []),
+                                          stmts_by_type.get(neg, [])):
+            if st1.contradicts(st2, bio_ontology):
+                contradicts.append((st1, st2))
+    for st1, st2 in itertools.combinations(stmts_by_type.get(ActiveForm, []),
+                                           2):
+        if st1.contradicts(st2, bio_ontology):
+            contradicts.append((st1, st2))
+    return contradicts
+
+
+def count_exhaustive_comparisons(stmts):
+    counts = {}
+    for stmt in stmts:
+        counts[type(stmt)] = counts.get(type(stmt), 0) + 1
+    n_active_forms = counts.get(ActiveForm, 0)
+    return counts.get(Phosphorylation, 0) * \
+        counts.get(Dephosphorylation, 0) + \
+        counts.get(Activation, 0) * counts.get(Inhibition, 0) + \
+        counts.get(IncreaseAmount, 0) * counts.get(DecreaseAmount, 0) + \
+        n_active_forms * (n_active_forms - 1) // 2
+
+
+def main(n_stmts=100000, exhaustive=False):
+    stmts = make_corpus(n_stmts)
+    # Make sure that the ontology is loaded before timing
+    bio_ontology.initialize()
+    pa = Preassembler(bio_ontology, stmts, copy_stmts=False)
+    ts = time.time()
+    contradicts = pa.find_contradicts()
+    te = time.time()
+    print('Found %d contradictions among %d statements in %.2fs' %
+          (len(contradicts), len(stmts), te - ts))
+    print('Compared %d pairs instead of %d' %
+          (pa._contradiction_counter, count_exhaustive_comparisons(stmts)))
+    if exhaustive:
+        ts = time.time()
+        exhaustive_contradicts = find_contradicts_exhaustive(stmts)
+        te = time.time()
+        print('Found %d contradictions comparing all pairs in %.2fs' %
+              (len(exhaustive_contradicts), te - ts))
+        assert [(st1.uuid, st2.uuid) for st1, st2 in contradicts] == \
+            [(st1.uuid, st2.uuid) for st1, st2 in exhaustive_contradicts]
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    main(int(args[0]) if args else 100000,
+         exhaustive='--exhaustive' in sys.argv)
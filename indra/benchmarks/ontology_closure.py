@@ -0,0 +1,101 @@
+"""Benchmark hierarchy queries with and without the transitive closure index.
+
+This compares the graph-traversal based implementation of `isa_or_partof`,
+`get_parents` and `get_top_level_parents` with lookups in the precomputed
+transitive closure index of the INDRA bio ontology, using entities from
+the FamPlex, GO and MeSH hierarchies. Each query type is checked to return
+the same results with both implementations.
+
+Usage: python -m indra.benchmarks.ontology_closure [n_queries]
+"""
+import sys
+import time
+import random
+from indra.ontology.bio import bio_ontology
+from indra.ontology.closure import TransitiveClosure
+
+
+def get_queries(ontology, namespaces, n_queries):
+    """Return entities and pairs of entities to query in given name spaces."""
+    nodes = [ontology.get_ns_id(node) for node in ontology.nodes
+             if ontology.get_ns(node) in namespaces]
+    entities = random.sample(nodes, min(n_queries, len(nodes)))
+    pairs = []
+    for entity in entities:
+        # Half of the pairs are related and half are random
+        parents = ontology.get_parents(*entity)
+        if parents and len(pairs) % 2 == 0:
+            pairs.append((entity, random.choice(parents)))
+        else:
+            pairs.append((entity, random.choice(nodes)))
+    return entities, pairs
+
+
+def run_queries(ontology, entities, pairs):
+    """Run each query type and return their timings and results."""
+    timings = {}
+    results = {}
+    ts = time.time()
+    results['isa_or_partof'] = [ontology.isa_or_partof(*e1, *e2)
+                                for e1, e2 in pairs]
+    timings['isa_or_partof'] = time.time() - ts
+    ts = time.time()
+    results['get_parents'] = [sorted(ontology.get_parents(*entity))
+                              for entity in entities]
+    timings['get_parents'] = time.time() - ts
+    ts = time.time()
+    results['get_top_level_parents'] = \
+        [sorted(ontology.get_top_level_parents(*entity))
+         for entity in entities]
+    timings['get_top_level_parents'] = time.time() - ts
+    return timings, results
+
+
+def get_closure_size(closure):
+    """Return the number of bytes used by the arrays of a closure index."""
+    return sum(getattr(index, attr).nbytes
+               for index in closure.rel_indexes.values()
+               for attr in ['tree', 'tree_parent', 'pre', 'end', 'indptr',
+                            'indices', 'top'])
+
+
+def main(n_queries=10000):
+    random.seed(0)
+    bio_ontology.initialize()
+    if not isinstance(bio_ontology.transitive_closure, TransitiveClosure):
+        bio_ontology._build_transitive_closure()
+    closure = bio_ontology.transitive_closure
+
+    # Time building the closure index from scratch
+    ts = time.time()
+    TransitiveClosure.from_ontology(bio_ontology)
+    print('Building the closure index took %.2fs' % (time.time() - ts))
+    print('The closure index arrays take %.1f MB' %
+          (get_closure_size(closure) / 1e6))
+    index = closure.get_index({'isa', 'partof'})
+    print('%d of %d nodes are in the tree part of the index, the explicit '
+          'closure of the rest has %d entries' %
+          (index.tree.sum(), len(closure), len(index.indices)))
+
+    for name, namespaces in [('FamPlex', {'FPLX', 'HGNC'}),
+                             ('GO', {'GO'}), ('MeSH', {'MESH'})]:
+        bio_ontology.transitive_closure = closure
+        entities, pairs = get_queries(bio_ontology, namespaces, n_queries)
+        closure_timings, closure_results = \
+            run_queries(bio_ontology, entities, pairs)
+        # Without the index, queries fall back to traversing the graph
+        bio_ontology.transitive_closure = None
+        graph_timings, graph_results = \
+            run_queries(bio_ontology, entities, pairs)
+        bio_ontology.transitive_closure = closure
+        assert closure_results == graph_results
+        for query, graph_time in graph_timings.items():
+            closure_time = closure_timings[query]
+            print('%s %s (%d queries): graph %.3fs, index %.3fs, %.1fx' %
+                  (name, query, len(pairs), graph_time, closure_time,
+                   graph_time / closure_time if closure_time else
+                   float('inf')))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
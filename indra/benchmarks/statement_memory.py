@@ -0,0 +1,103 @@
+"""Benchmark the memory used by a corpus of Statements.
+
+This loads a corpus of Statements from a JSON file, for instance, the
+Statements extracted by REACH from a set of publications, and measures the
+memory allocated for them as loaded, and after calling `compact` on each of
+their Evidences. If no file is given, a synthetic corpus resembling REACH
+output (multiple Evidences per Statement with REACH-style annotations,
+epistemics and text refs) is generated instead.
+
+Usage: python -m indra.benchmarks.statement_memory [stmts.json]
+"""
+import gc
+import sys
+import json
+import time
+import random
+import tracemalloc
+from indra.statements import Phosphorylation, Activation, Agent, Evidence, \
+    ModCondition, stmts_from_json, stmts_from_json_file
+
+
+def make_reach_like_corpus(n_stmts=20000, n_genes=2000):
+    """Return the JSON of a synthetic corpus resembling REACH output."""
+    rng = random.Random(0)
+
+    def agent(gene):
+        mods = [ModCondition('phosphorylation', 'S',
+                             str(rng.randint(1, 500)))] \
+            if rng.random() < 0.2 else []
+        return Agent('GENE%d' % gene, mods=mods,
+                     db_refs={'HGNC': str(gene), 'UP': 'P%05d' % gene,
+                              'TEXT': 'gene%d' % gene})
+
+    stmts = []
+    for idx in range(n_stmts):
+        subj, obj = rng.randrange(n_genes), rng.randrange(n_genes)
+        evidence = []
+        for _ in range(rng.randint(1, 5)):
+            pmid = str(rng.randint(1000000, 30000000))
+            annotations = {
+                'found_by': rng.choice(['Phosphorylation_syntax_1a_noun',
+                                        'Positive_activation_syntax_1_verb',
+                                        'Phosphorylation_syntax_2a_verb']),
+                'agents': {'coords': [[rng.randint(0, 200),
+                                       rng.randint(200, 400)]
+                                      for _ in range(2)]}}
+            epistemics = {'direct': rng.random() < 0.5,
+                          'section_type': None} \
+                if rng.random() < 0.8 else {}
+            evidence.append(Evidence(source_api='reach', pmid=pmid,
+                                     text='GENE%d phosphorylates GENE%d in '
+                                          'sentence %d.' % (subj, obj, idx),
+                                     annotations=annotations,
+                                     epistemics=epistemics))
+        stmt_cls = Phosphorylation if idx % 2 else Activation
+        stmts.append(stmt_cls(agent(subj), agent(obj), evidence=evidence))
+    return [stmt.to_json() for stmt in stmts]
+
+
+def measure(fun):
+    """Return the result of a function and the memory allocated by it."""
+    gc.collect()
+    tracemalloc.start()
+    ts = time.time()
+    res = fun()
+    te = time.time()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return res, size, te - ts
+
+
+def compact_stmts(stmts):
+    for stmt in stmts:
+        for ev in stmt.evidence:
+            ev.compact()
+    return stmts
+
+
+def main(fname=None):
+    if fname:
+        def load():
+            return stmts_from_json_file(fname)
+    else:
+        stmts_json = json.dumps(make_reach_like_corpus())
+
+        def load():
+            return stmts_from_json(json.loads(stmts_json))
+    stmts, loaded_size, load_time = measure(load)
+    n_evidence = sum(len(stmt.evidence) for stmt in stmts)
+    print('Loaded %d statements with %d evidences in %.2fs' %
+          (len(stmts), n_evidence, load_time))
+    print('As loaded: %.1f MB, %.0f bytes per evidence' %
+          (loaded_size / 1e6, loaded_size / n_evidence))
+    del stmts
+    stmts, compact_size, compact_time = \
+        measure(lambda: compact_stmts(load()))
+    print('Loaded and compacted in %.2fs: %.1f MB, %.0f bytes per evidence'
+          % (compact_time, compact_size / 1e6, compact_size / n_evidence))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
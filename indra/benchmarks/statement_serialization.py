@@ -0,0 +1,78 @@
+"""Benchmark the serialization of Statements into different file formats.
+
+This writes a corpus of Statements as a pickle, JSON, JSONL and binary file
+(see :py:func:`indra.statements.io.write_stmts_binary`), and reports the time
+it takes to write and load each file, and its size. For the binary format,
+the time it takes to read the matches hashes and beliefs of all Statements
+without deserializing them is also reported. If no file is given, a synthetic
+corpus resembling REACH output is generated, see
+:py:mod:`indra.benchmarks.statement_memory`.
+
+Usage: python -m indra.benchmarks.statement_serialization [stmts.json]
+"""
+import os
+import sys
+import time
+import pickle
+import tempfile
+from indra.statements import stmts_from_json, stmts_from_json_file, \
+    stmts_to_json_file, write_stmts_binary, stmts_from_binary_file, \
+    StatementBinaryReader
+from indra.benchmarks.statement_memory import make_reach_like_corpus
+
+
+def dump_pickle(stmts, fname):
+    with open(fname, 'wb') as fh:
+        pickle.dump(stmts, fh, protocol=4)
+
+
+def load_pickle(fname):
+    with open(fname, 'rb') as fh:
+        return pickle.load(fh)
+
+
+def read_columns(fname):
+    with StatementBinaryReader(fname) as reader:
+        return reader.get_hashes().sum(), reader.get_beliefs().sum()
+
+
+formats = [
+    ('pickle', '.pkl', dump_pickle, load_pickle),
+    ('json', '.json', stmts_to_json_file, stmts_from_json_file),
+    ('jsonl', '.jsonl',
+     lambda stmts, fname: stmts_to_json_file(stmts, fname, format='jsonl'),
+     lambda fname: stmts_from_json_file(fname, format='jsonl')),
+    ('binary', '.bin', write_stmts_binary, stmts_from_binary_file),
+]
+
+
+def timed(fun, *args):
+    ts = time.time()
+    res = fun(*args)
+    return res, time.time() - ts
+
+
+def main(fname=None):
+    if fname:
+        stmts = stmts_from_json_file(fname)
+    else:
+        stmts = stmts_from_json(make_reach_like_corpus())
+    print('Benchmarking %d statements' % len(stmts))
+    print('%-8s %10s %10s %10s' % ('format', 'write (s)', 'load (s)',
+                                   'size (MB)'))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, ext, dump, load in formats:
+            out_fname = os.path.join(tmpdir, 'stmts' + ext)
+            _, write_time = timed(dump, stmts, out_fname)
+            _, load_time = timed(load, out_fname)
+            print('%-8s %10.2f %10.2f %10.1f' %
+                  (name, write_time, load_time,
+                   os.path.getsize(out_fname) / 1e6))
+        _, column_time = timed(read_columns,
+                               os.path.join(tmpdir, 'stmts.bin'))
+        print('Read hashes and beliefs from binary file in %.3fs' %
+              column_time)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
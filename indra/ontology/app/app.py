@@ -2,7 +2,9 @@
 service. The three key functions that most ontology methods rely on are
 child_rel, parent_rel, and get_node_property. There are a few other bookkeeping
 functions that also need to be implemented here since they access ontology
-attributes directly."""
+attributes directly. Batch versions of these endpoints take a list of
+queries and return a list of results in the same order, which allows clients
+to avoid a round trip for each query."""
 import argparse
 from flask import Flask, request, jsonify
 from indra.ontology.bio import bio_ontology
@@ -59,6 +61,44 @@ def get_component_label():
         **{k: v for k, v in request.json.items() if k in kwargs}))
 
 
+@app.route('/child_rel_batch', methods=['GET'])
+def child_rel_batch():
+    ontology = ontologies.get(request.json.get('ontology'))
+    rel_types = request.json.get('rel_types')
+    return jsonify([list(ontology.child_rel(ns, id, rel_types))
+                    for ns, id in request.json.get('queries')])
+
+
+@app.route('/parent_rel_batch', methods=['GET'])
+def parent_rel_batch():
+    ontology = ontologies.get(request.json.get('ontology'))
+    rel_types = request.json.get('rel_types')
+    return jsonify([list(ontology.parent_rel(ns, id, rel_types))
+                    for ns, id in request.json.get('queries')])
+
+
+@app.route('/get_node_property_batch', methods=['GET'])
+def get_node_property_batch():
+    ontology = ontologies.get(request.json.get('ontology'))
+    property = request.json.get('property')
+    return jsonify([ontology.get_node_property(ns, id, property)
+                    for ns, id in request.json.get('queries')])
+
+
+@app.route('/get_id_from_name_batch', methods=['GET'])
+def get_id_from_name_batch():
+    ontology = ontologies.get(request.json.get('ontology'))
+    return jsonify([ontology.get_id_from_name(ns, name)
+                    for ns, name in request.json.get('queries')])
+
+
+@app.route('/get_parents_batch', methods=['GET'])
+def get_parents_batch():
+    ontology = ontologies.get(request.json.get('ontology'))
+    return jsonify([ontology.get_parents(ns, id)
+                    for ns, id in request.json.get('queries')])
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(
         description='Run the INDRA Ontology service.')
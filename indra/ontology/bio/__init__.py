@@ -5,7 +5,13 @@ __all__ = ['bio_ontology', 'BioOntology']
 from indra.config import get_config
 from .ontology import BioOntology
 from ..virtual import VirtualOntology
+from ..compiled import CompiledOntology
 
 indra_ontology_url = get_config('INDRA_ONTOLOGY_URL')
-bio_ontology = BioOntology() if not indra_ontology_url else \
-    VirtualOntology(url=indra_ontology_url)
\ No newline at end of file
+indra_compiled_ontology_path = get_config('INDRA_COMPILED_ONTOLOGY_PATH')
+if indra_ontology_url:
+    bio_ontology = VirtualOntology(url=indra_ontology_url)
+elif indra_compiled_ontology_path:
+    bio_ontology = CompiledOntology(path=indra_compiled_ontology_path)
+else:
+    bio_ontology = BioOntology()
\ No newline at end of file
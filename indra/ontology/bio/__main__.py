@@ -12,6 +12,9 @@ to build or clean up the INDRA bio ontology. The script takes
 a single operation argument which can be as follows:
 
 * `build`: build the ontology and cache it
+* `compile`: compile the ontology into a memory-mappable format, by default
+  into the cache folder, or into a folder given as a second argument. To use
+  the compiled ontology, set INDRA_COMPILED_ONTOLOGY_PATH to this folder.
 * `clean`: delete the current version of the ontology from the cache
 * `clean-old`: delete all versions of the ontology except the current one
 * `clean-all`: delete all versions of the bio ontology from the cache
@@ -21,18 +24,22 @@ import sys
 import glob
 import shutil
 import logging
-from .ontology import BioOntology, CACHE_DIR
+from .ontology import BioOntology, CACHE_DIR, COMPILED_CACHE_DIR
+from ..compiled import compile_ontology
 
 logger = logging.getLogger('indra.ontology.bio')
 
 if __name__ == '__main__':
     if len(sys.argv) < 2:
         logger.info('Operation missing. Supported operations: '
-                    'build, clean, clean-old, clean-all.')
+                    'build, compile, clean, clean-old, clean-all.')
         sys.exit(1)
     operation = sys.argv[1]
     if operation == 'build':
         BioOntology().initialize(rebuild=True)
+    elif operation == 'compile':
+        path = sys.argv[2] if len(sys.argv) > 2 else COMPILED_CACHE_DIR
+        compile_ontology(BioOntology(), path)
     elif operation.startswith('clean'):
         parent_dir = os.path.normpath(os.path.join(CACHE_DIR, os.pardir))
         version_paths = glob.glob(os.path.join(parent_dir, '*', ''))
@@ -2,6 +2,7 @@ import os
 import pickle
 import logging
 from indra.config import get_config
+from ..closure import TransitiveClosure
 from ..ontology_graph import IndraOntology
 from indra.util import read_unicode_csv
 from indra.statements import modtype_conditions
@@ -29,24 +30,32 @@ class BioOntology(IndraOntology):
             logger.info('Initializing INDRA bio ontology for the first time, '
                         'this may take a few minutes...')
             self._build()
-            # Try to create the folder first, if it fails, we don't cache
-            if not os.path.exists(CACHE_DIR):
-                try:
-                    os.makedirs(CACHE_DIR)
-                except Exception:
-                    logger.warning('%s could not be created.' % CACHE_DIR)
-            # Try to dump the file next, if it fails, we don't cache
-            try:
-                logger.info('Caching INDRA bio ontology at %s' % CACHE_FILE)
-                with open(CACHE_FILE, 'wb') as fh:
-                    pickle.dump(self, fh, pickle.HIGHEST_PROTOCOL)
-            except Exception:
-                logger.warning('Failed to cache ontology at %s.' % CACHE_FILE)
+            self._dump_cache()
         else:
             logger.info(
                 'Loading INDRA bio ontology from cache at %s' % CACHE_FILE)
             with open(CACHE_FILE, 'rb') as fh:
                 self.__dict__.update(pickle.load(fh).__dict__)
+            # Ontologies cached before the transitive closure index was
+            # introduced are extended with it and cached again
+            if not isinstance(self.transitive_closure, TransitiveClosure):
+                self._build_transitive_closure()
+                self._dump_cache()
+
+    def _dump_cache(self):
+        # Try to create the folder first, if it fails, we don't cache
+        if not os.path.exists(CACHE_DIR):
+            try:
+                os.makedirs(CACHE_DIR)
+            except Exception:
+                logger.warning('%s could not be created.' % CACHE_DIR)
+        # Try to dump the file next, if it fails, we don't cache
+        try:
+            logger.info('Caching INDRA bio ontology at %s' % CACHE_FILE)
+            with open(CACHE_FILE, 'wb') as fh:
+                pickle.dump(self, fh, pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            logger.warning('Failed to cache ontology at %s.' % CACHE_FILE)
 
     def _build(self):
         # Add all nodes with annotations
@@ -85,6 +94,8 @@ class BioOntology(IndraOntology):
         # Build name to ID lookup
         logger.info('Building name lookup...')
         self._build_name_lookup()
+        # Build the transitive closure index of the hierarchy
+        self._build_transitive_closure()
         logger.info('Finished initializing bio ontology...')
 
     def add_hgnc_nodes(self):
@@ -472,3 +483,4 @@ CACHE_DIR = os.path.join((get_config('INDRA_RESOURCES') or
                          '%s_ontology' % BioOntology.name,
                          BioOntology.version)
 CACHE_FILE = os.path.join(CACHE_DIR, 'bio_ontology.pkl')
+COMPILED_CACHE_DIR = os.path.join(CACHE_DIR, 'compiled')
@@ -0,0 +1,322 @@
+"""An index of the transitive closure of ontology relations.
+
+The index assigns each node of an ontology an integer ID and, separately
+for each indexed set of relation types, represents the set of all nodes
+reachable from each node (i.e., its parents in the ontological sense)
+in one of two compact forms. Nodes whose relations form a tree (i.e., the
+node and all its parents have at most one parent each) are labeled with
+pre-order intervals of a spanning forest so that checking whether another
+node is one of their parents takes constant time and no storage beyond
+the interval labels. For all other nodes, the sorted array of the IDs of
+all their parents is stored in a compressed sparse row structure which can
+be queried with a binary search.
+"""
+import logging
+import numpy
+import networkx
+
+
+logger = logging.getLogger(__name__)
+
+# The sets of relation types for which closures are indexed by default
+DEFAULT_CLOSURE_RELS = [('isa',), ('partof',), ('isa', 'partof')]
+
+
+class TransitiveClosure(object):
+    """The transitive closure of one or more sets of ontology relations.
+
+    Parameters
+    ----------
+    labels : list[str]
+        The labels of the nodes in the order of their integer IDs.
+    rel_indexes : dict
+        A dict of :py:class:`ClosureIndex` objects keyed by the sorted
+        tuple of relation types that they represent.
+    node_index : Optional[dict]
+        A dict mapping node labels to their integer IDs. If not given,
+        the labels are expected to support a `find` method which returns the
+        ID of a given label.
+    """
+    def __init__(self, labels, rel_indexes, node_index=None):
+        self.labels = labels
+        self.rel_indexes = rel_indexes
+        self.node_index = node_index
+
+    @classmethod
+    def from_ontology(cls, ontology, rels=None, labels=None):
+        """Build the transitive closure of relations in a given ontology.
+
+        Parameters
+        ----------
+        ontology : indra.ontology.IndraOntology
+            A graph-based ontology whose closure should be built.
+        rels : Optional[list[tuple]]
+            A list of sets of relation types, each represented as a tuple,
+            to index. Default: isa, partof and isa or partof.
+        labels : Optional[list[str]]
+            The labels of all the nodes of the ontology in the order in which
+            integer IDs should be assigned to them. By default, the order of
+            nodes in the ontology graph is used.
+
+        Returns
+        -------
+        TransitiveClosure
+            The transitive closure of the given ontology.
+        """
+        rels = rels if rels is not None else DEFAULT_CLOSURE_RELS
+        labels = labels if labels is not None else list(ontology.nodes)
+        node_index = {label: idx for idx, label in enumerate(labels)}
+        edges_by_type = {}
+        for source, target, rel_type in ontology.edges(data='type'):
+            edges_by_type.setdefault(rel_type, []).append(
+                (node_index[source], node_index[target]))
+        rel_indexes = {}
+        for rel_types in rels:
+            rel_key = _get_rel_key(rel_types)
+            edges = [edge for rel_type in rel_key
+                     for edge in edges_by_type.get(rel_type, [])]
+            rel_indexes[rel_key] = ClosureIndex.from_edges(edges,
+                                                           len(labels))
+        return cls(labels, rel_indexes, node_index)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def get_index(self, rel_types):
+        """Return the index for a given set of relation types, if available.
+
+        Parameters
+        ----------
+        rel_types : iterable of str
+            A set of relation types.
+
+        Returns
+        -------
+        ClosureIndex or None
+            The index of the closure of the given relation types or None
+            if the given relation types are not indexed.
+        """
+        return self.rel_indexes.get(_get_rel_key(rel_types))
+
+    def find(self, label):
+        """Return the integer ID of a node with a given label, or None."""
+        if self.node_index is not None:
+            return self.node_index.get(label)
+        return self.labels.find(label)
+
+
+class ClosureIndex(object):
+    """The closure of a single set of relation types over integer node IDs.
+
+    Parameters
+    ----------
+    tree : numpy.ndarray
+        A boolean array indicating for each node whether it and all its
+        parents have at most one parent.
+    tree_parent : numpy.ndarray
+        For nodes in the tree part of the closure, the ID of their single
+        parent, -1 otherwise.
+    pre : numpy.ndarray
+        The pre-order number of each tree node in the spanning forest.
+    end : numpy.ndarray
+        The pre-order number one past the last tree descendant of each tree
+        node, so that another tree node is below it in the forest if and only
+        if its pre-order number is between `pre` (exclusive) and `end`
+        (exclusive).
+    indptr : numpy.ndarray
+        The row pointers of the per-node sorted parent arrays.
+    indices : numpy.ndarray
+        The concatenated sorted parent arrays, empty for tree nodes.
+    top : numpy.ndarray
+        A boolean array indicating for each node whether it has no parents.
+    """
+    def __init__(self, tree, tree_parent, pre, end, indptr, indices, top):
+        self.tree = tree
+        self.tree_parent = tree_parent
+        self.pre = pre
+        self.end = end
+        self.indptr = indptr
+        self.indices = indices
+        self.top = top
+
+    @classmethod
+    def from_edges(cls, edges, n_nodes):
+        """Build the closure index from a list of edges.
+
+        Parameters
+        ----------
+        edges : list[tuple[int, int]]
+            A list of edges between integer node IDs, each pointing from a
+            node to one of its parents.
+        n_nodes : int
+            The total number of nodes.
+
+        Returns
+        -------
+        ClosureIndex
+            The closure index built from the given edges.
+        """
+        graph = networkx.DiGraph()
+        graph.add_edges_from(edges)
+        parents = {node: list(graph.successors(node)) for node in graph}
+        condensed = networkx.condensation(graph)
+        # Nodes that are part of a cycle are reachable from themselves
+        # and can never be part of the tree
+        cyclic = set()
+        for component in condensed.nodes:
+            members = condensed.nodes[component]['members']
+            node = next(iter(members))
+            if len(members) > 1 or graph.has_edge(node, node):
+                cyclic |= members
+
+        tree = numpy.ones(n_nodes, dtype=bool)
+        tree_parent = numpy.full(n_nodes, -1, dtype=numpy.int32)
+        top = numpy.ones(n_nodes, dtype=bool)
+        closures = {}
+        # We process components such that parents come before children
+        for component in reversed(list(
+                networkx.topological_sort(condensed))):
+            members = condensed.nodes[component]['members']
+            if not (members & cyclic):
+                node = next(iter(members))
+                node_parents = parents[node]
+                top[node] = not node_parents
+                if not node_parents:
+                    continue
+                elif len(node_parents) == 1 and tree[node_parents[0]]:
+                    tree_parent[node] = node_parents[0]
+                    continue
+            # This component is not part of the tree so we collect the
+            # closure of each of its members explicitly
+            parts = [numpy.fromiter(members, dtype=numpy.int32,
+                                    count=len(members))] \
+                if members & cyclic else []
+            for node in members:
+                tree[node] = False
+                # A node whose only parent is itself via a self-loop is
+                # still considered to be at the top level
+                top[node] = (parents[node] == [node])
+                for parent in parents[node]:
+                    if parent in members:
+                        continue
+                    parts.append(numpy.array([parent], dtype=numpy.int32))
+                    parts.append(_get_closure(parent, tree, tree_parent,
+                                              closures))
+            closure = numpy.unique(numpy.concatenate(parts))
+            for node in members:
+                closures[node] = closure
+
+        pre, end = _get_forest_intervals(tree, tree_parent)
+        indptr = numpy.zeros(n_nodes + 1, dtype=numpy.int64)
+        for node, closure in closures.items():
+            indptr[node + 1] = len(closure)
+        indptr = numpy.cumsum(indptr)
+        indices = numpy.zeros(indptr[-1], dtype=numpy.int32)
+        for node, closure in closures.items():
+            indices[indptr[node]:indptr[node + 1]] = closure
+        return cls(tree, tree_parent, pre, end, indptr, indices, top)
+
+    def isrel(self, node1, node2):
+        """Return True if the second node is reachable from the first.
+
+        Parameters
+        ----------
+        node1 : int
+            The ID of the first node.
+        node2 : int
+            The ID of the second node.
+
+        Returns
+        -------
+        bool
+            True if there is a path from the first node to the second.
+        """
+        if self.tree[node1]:
+            return bool(self.tree[node2] and
+                        self.pre[node2] < self.pre[node1] < self.end[node2])
+        row = self.indices[self.indptr[node1]:self.indptr[node1 + 1]]
+        idx = numpy.searchsorted(row, node2)
+        return bool(idx < len(row) and row[idx] == node2)
+
+    def get_parents(self, node):
+        """Return the IDs of all nodes reachable from a given node.
+
+        Parameters
+        ----------
+        node : int
+            The ID of a node.
+
+        Returns
+        -------
+        list[int]
+            The IDs of the nodes reachable from the given node, not including
+            the node itself.
+        """
+        if self.tree[node]:
+            parents = []
+            parent = self.tree_parent[node]
+            while parent >= 0:
+                parents.append(int(parent))
+                parent = self.tree_parent[parent]
+            return parents
+        row = self.indices[self.indptr[node]:self.indptr[node + 1]]
+        return [int(parent) for parent in row if parent != node]
+
+    def get_top_level_parents(self, node):
+        """Return the IDs of all reachable nodes that have no parents.
+
+        Parameters
+        ----------
+        node : int
+            The ID of a node.
+
+        Returns
+        -------
+        list[int]
+            The IDs of the nodes reachable from the given node that don't
+            have any parents themselves.
+        """
+        return [parent for parent in self.get_parents(node)
+                if self.top[parent]]
+
+
+def _get_rel_key(rel_types):
+    return tuple(sorted(set(rel_types)))
+
+
+def _get_closure(node, tree, tree_parent, closures):
+    """Return the closure of a node that has already been processed."""
+    if not tree[node]:
+        return closures[node]
+    # The closures of tree nodes are not stored since they are simply
+    # the chain of tree parents
+    parents = []
+    parent = tree_parent[node]
+    while parent >= 0:
+        parents.append(parent)
+        parent = tree_parent[parent]
+    return numpy.array(parents, dtype=numpy.int32)
+
+
+def _get_forest_intervals(tree, tree_parent):
+    """Return pre-order intervals for the forest formed by tree nodes."""
+    n_nodes = len(tree)
+    children = {}
+    for node in numpy.nonzero(tree_parent >= 0)[0]:
+        children.setdefault(int(tree_parent[node]), []).append(int(node))
+    pre = numpy.full(n_nodes, -1, dtype=numpy.int32)
+    end = numpy.full(n_nodes, -1, dtype=numpy.int32)
+    counter = 0
+    for root in numpy.nonzero(tree & (tree_parent < 0))[0]:
+        stack = [(int(root), False)]
+        while stack:
+            node, finished = stack.pop()
+            if finished:
+                end[node] = counter
+                continue
+            pre[node] = counter
+            counter += 1
+            stack.append((node, True))
+            for child in children.get(node, []):
+                stack.append((child, False))
+    return pre, end
@@ -0,0 +1,3 @@
+"""This module implements a compiled ontology which is loaded from a
+compact, memory-mapped on-disk representation of an IndraOntology."""
+from .ontology import CompiledOntology, compile_ontology
@@ -0,0 +1,329 @@
+import os
+import json
+import logging
+import numpy
+from collections import defaultdict
+from ..ontology_graph import IndraOntology, with_initialize
+from ..closure import TransitiveClosure, ClosureIndex
+
+
+logger = logging.getLogger(__name__)
+
+# This version is incremented whenever the layout of the compiled files
+# changes so that outdated compiled ontologies are not loaded.
+FORMAT_VERSION = 2
+
+
+class CompiledOntology(IndraOntology):
+    """An ontology loaded from a compiled, memory-mapped representation.
+
+    A compiled ontology consists of a folder of flat arrays produced by
+    :py:func:`compile_ontology`. Node labels are interned as a sorted
+    table of UTF-8 strings, each edge type is represented as a pair of
+    CSR adjacency structures (one for each direction), and node properties
+    are stored in columnar string tables. The transitive closure index
+    of `isa` and `partof` relations is stored along with these so that
+    hierarchy queries don't require traversing edges. All arrays are
+    memory-mapped read-only, which makes loading the ontology nearly
+    instantaneous, and allows processes (e.g., forked workers) to share the
+    same pages of memory rather than each holding a copy of the ontology
+    graph.
+
+    Parameters
+    ----------
+    path : str
+        The path to a folder containing a compiled ontology.
+    """
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.labels = None
+        self.name_index = None
+        self.name_index_nodes = None
+        self.adjacency = {}
+        self.properties = {}
+
+    def __getstate__(self):
+        # Memory-mapped arrays would be pickled as full copies so we
+        # only pickle the path and reload lazily.
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def initialize(self):
+        """Memory-map the compiled ontology files."""
+        with open(os.path.join(self.path, 'meta.json'), 'r') as fh:
+            meta = json.load(fh)
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError('The compiled ontology at %s has format version '
+                             '%s, expected %s, it needs to be recompiled.'
+                             % (self.path, meta.get('format_version'),
+                                FORMAT_VERSION))
+        logger.info('Loading compiled %s ontology version %s from %s'
+                    % (meta['name'], meta['version'], self.path))
+        self.name = meta['name']
+        self.version = meta['version']
+        self.labels = _StringTable(self.path, 'labels')
+        self.adjacency = {
+            rel_type: (_Csr(self.path, 'edges_%d_out' % idx),
+                       _Csr(self.path, 'edges_%d_in' % idx))
+            for idx, rel_type in enumerate(meta['edge_types'])
+        }
+        self.properties = {
+            prop: _StringTable(self.path, 'property_%d' % idx)
+            for idx, prop in enumerate(meta['properties'])
+        }
+        self.name_index = _StringTable(self.path, 'name_index')
+        self.name_index_nodes = _load_array(self.path, 'name_index_nodes')
+        closure_indexes = {
+            tuple(rel_key): _load_closure_index(self.path, 'closure_%d' % idx)
+            for idx, rel_key in enumerate(meta['closure_rels'])
+        }
+        self.transitive_closure = TransitiveClosure(self.labels,
+                                                    closure_indexes)
+        self._initialized = True
+
+    @with_initialize
+    def get_node_index(self, ns, id):
+        """Return the integer index of a given entity's node.
+
+        Parameters
+        ----------
+        ns : str
+            An entity's name space.
+        id : str
+            An entity's ID.
+
+        Returns
+        -------
+        int or None
+            The index of the node in the compiled ontology or None if
+            the entity is not in the ontology.
+        """
+        return self.labels.find(self.label(ns, id))
+
+    @with_initialize
+    def child_rel(self, ns, id, rel_types):
+        node = self.get_node_index(ns, id)
+        if node is None:
+            return
+        for rel_type in rel_types:
+            csr = self.adjacency.get(rel_type)
+            if csr is None:
+                continue
+            for target in csr[0].row(node):
+                yield self.get_ns_id(self.labels[target])
+
+    @with_initialize
+    def parent_rel(self, ns, id, rel_types):
+        node = self.get_node_index(ns, id)
+        if node is None:
+            return
+        for rel_type in rel_types:
+            csr = self.adjacency.get(rel_type)
+            if csr is None:
+                continue
+            for source in csr[1].row(node):
+                yield self.get_ns_id(self.labels[source])
+
+    @with_initialize
+    def get_node_property(self, ns, id, property):
+        table = self.properties.get(property)
+        if table is None:
+            return None
+        node = self.get_node_index(ns, id)
+        if node is None:
+            return None
+        value = table.get_bytes(node)
+        # Missing properties are represented by empty entries
+        if not value:
+            return None
+        return json.loads(value.decode('utf-8'))
+
+    @with_initialize
+    def get_id_from_name(self, ns, name):
+        idx = self.name_index.find(_name_key(ns, name))
+        if idx is None:
+            return None
+        return self.get_ns_id(self.labels[self.name_index_nodes[idx]])
+
+    @with_initialize
+    def nodes_from_suffix(self, suffix):
+        return [label for label in self.labels if label.endswith(suffix)]
+
+    @with_initialize
+    def print_stats(self):
+        logger.info('Number of nodes: %d' % len(self.labels))
+        logger.info('Number of edges: %d' %
+                    sum(len(out.indices) for out, _ in
+                        self.adjacency.values()))
+
+
+def compile_ontology(ontology, path):
+    """Compile an IndraOntology into a memory-mappable folder of arrays.
+
+    Parameters
+    ----------
+    ontology : indra.ontology.IndraOntology
+        A graph-based IndraOntology instance to compile.
+    path : str
+        The path to a folder into which the compiled ontology is written.
+        The folder is created if it doesn't exist.
+    """
+    if not ontology._initialized:
+        ontology.initialize()
+    os.makedirs(path, exist_ok=True)
+    logger.info('Compiling ontology with %d nodes into %s'
+                % (len(ontology), path))
+    # We sort labels by their UTF-8 encoding so that they can be looked up
+    # with a binary search over the memory-mapped table.
+    labels = sorted(ontology.nodes, key=lambda label: label.encode('utf-8'))
+    node_idx = {label: idx for idx, label in enumerate(labels)}
+    _save_string_table(path, 'labels', labels)
+
+    # Edges by type
+    edges_by_type = defaultdict(lambda: ([], []))
+    for source, target, data in ontology.edges(data=True):
+        sources, targets = edges_by_type[data.get('type')]
+        sources.append(node_idx[source])
+        targets.append(node_idx[target])
+    edge_types = sorted(rel_type for rel_type in edges_by_type
+                        if rel_type is not None)
+    for idx, rel_type in enumerate(edge_types):
+        sources, targets = edges_by_type[rel_type]
+        _save_csr(path, 'edges_%d_out' % idx, sources, targets, len(labels))
+        _save_csr(path, 'edges_%d_in' % idx, targets, sources, len(labels))
+
+    # Node properties as columns in which missing values are empty strings
+    properties = sorted({prop for _, data in ontology.nodes(data=True)
+                         for prop in data})
+    for idx, prop in enumerate(properties):
+        values = [json.dumps(ontology.nodes[label][prop])
+                  if prop in ontology.nodes[label] else ''
+                  for label in labels]
+        _save_string_table(path, 'property_%d' % idx, values)
+
+    # Index from name space and name to node, in case of
+    # duplicates, the last node in the graph's order is used
+    name_to_node = {}
+    for label, data in ontology.nodes(data=True):
+        if 'name' in data:
+            name_to_node[_name_key(ontology.get_ns(label),
+                                   data['name'])] = node_idx[label]
+    name_keys = sorted(name_to_node, key=lambda key: key.encode('utf-8'))
+    _save_string_table(path, 'name_index', name_keys)
+    _save_array(path, 'name_index_nodes',
+                numpy.array([name_to_node[key] for key in name_keys],
+                            dtype=numpy.int32))
+
+    # Transitive closure index using the same node indices as the labels
+    closure = TransitiveClosure.from_ontology(ontology, labels=labels)
+    closure_rels = sorted(closure.rel_indexes)
+    for idx, rel_key in enumerate(closure_rels):
+        _save_closure_index(path, 'closure_%d' % idx,
+                            closure.rel_indexes[rel_key])
+
+    meta = {'format_version': FORMAT_VERSION,
+            'name': ontology.name,
+            'version': ontology.version,
+            'edge_types': edge_types,
+            'properties': properties,
+            'closure_rels': closure_rels}
+    with open(os.path.join(path, 'meta.json'), 'w') as fh:
+        json.dump(meta, fh, indent=1)
+
+
+def _name_key(ns, name):
+    return '%s\x00%s' % (ns, name)
+
+
+class _StringTable(object):
+    """A memory-mapped table of UTF-8 strings stored as a blob and offsets."""
+    def __init__(self, path, name):
+        self.blob = _load_array(path, name)
+        self.offsets = _load_array(path, '%s_offsets' % name)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getitem__(self, idx):
+        return self.get_bytes(idx).decode('utf-8')
+
+    def get_bytes(self, idx):
+        return self.blob[self.offsets[idx]:self.offsets[idx + 1]].tobytes()
+
+    def find(self, value):
+        """Return the index of a value in a sorted table, or None."""
+        key = value.encode('utf-8')
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.get_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self.get_bytes(lo) == key:
+            return lo
+        return None
+
+
+class _Csr(object):
+    """A memory-mapped adjacency structure in compressed sparse row form."""
+    def __init__(self, path, name):
+        self.indptr = _load_array(path, '%s_indptr' % name)
+        self.indices = _load_array(path, '%s_indices' % name)
+
+    def row(self, idx):
+        return self.indices[self.indptr[idx]:self.indptr[idx + 1]]
+
+
+def _save_string_table(path, name, values):
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = numpy.zeros(len(encoded) + 1, dtype=numpy.int64)
+    offsets[1:] = numpy.cumsum([len(value) for value in encoded])
+    _save_array(path, name, numpy.frombuffer(b''.join(encoded),
+                                             dtype=numpy.uint8))
+    _save_array(path, '%s_offsets' % name, offsets)
+
+
+def _save_csr(path, name, rows, cols, n_rows):
+    rows = numpy.array(rows, dtype=numpy.int64)
+    cols = numpy.array(cols, dtype=numpy.int32)
+    order = numpy.argsort(rows, kind='stable')
+    indptr = numpy.zeros(n_rows + 1, dtype=numpy.int64)
+    indptr[1:] = numpy.cumsum(numpy.bincount(rows, minlength=n_rows))
+    _save_array(path, '%s_indptr' % name, indptr)
+    _save_array(path, '%s_indices' % name, cols[order])
+
+
+_CLOSURE_ARRAYS = ['tree', 'tree_parent', 'pre', 'end', 'indptr', 'indices',
+                   'top']
+
+
+def _save_closure_index(path, name, index):
+    for array_name in _CLOSURE_ARRAYS:
+        _save_array(path, '%s_%s' % (name, array_name),
+                    getattr(index, array_name))
+
+
+def _load_closure_index(path, name):
+    return ClosureIndex(*[_load_array(path, '%s_%s' % (name, array_name))
+                          for array_name in _CLOSURE_ARRAYS])
+
+
+def _save_array(path, name, array):
+    numpy.save(os.path.join(path, '%s.npy' % name), array)
+
+
+def _load_array(path, name):
+    fname = os.path.join(path, '%s.npy' % name)
+    try:
+        return numpy.load(fname, mmap_mode='r')
+    # Empty arrays can't be memory-mapped
+    except ValueError:
+        return numpy.load(fname)
@@ -2,6 +2,7 @@ import logging
 import networkx
 import functools
 from collections import deque
+from .closure import TransitiveClosure
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +35,7 @@ class IndraOntology(networkx.DiGraph):
         super().__init__()
         self._initialized = False
         self.name_to_grounding = {}
-        self.transitive_closure = set()
+        self.transitive_closure = None
         self._isa_counter = 0
         self._isrel_counter = 0
 
@@ -140,6 +141,13 @@ class IndraOntology(networkx.DiGraph):
             Otherwise False.
         """
         self._isrel_counter += 1
+        index = self._get_closure_index(rels)
+        if index is not None:
+            node1 = self.transitive_closure.find(self.label(ns1, id1))
+            node2 = self.transitive_closure.find(self.label(ns2, id2))
+            if node1 is None or node2 is None:
+                return False
+            return index.isrel(node1, node2)
         return self._check_path(ns1, id1, ns2, id2, rels)
 
     @with_initialize
@@ -214,9 +222,6 @@ class IndraOntology(networkx.DiGraph):
             Otherwise False.
         """
         self._isa_counter += 1
-        if self.transitive_closure:
-            return (self.label(ns1, id1),
-                    self.label(ns2, id2)) in self.transitive_closure
         return self.isrel(ns1, id1, ns2, id2, rels={'isa', 'partof'})
 
     @with_initialize
@@ -384,6 +389,9 @@ class IndraOntology(networkx.DiGraph):
             A list of entities (name space, ID pairs) that are the
             parents of the given entity.
         """
+        index = self._get_closure_index({'isa', 'partof'})
+        if index is not None:
+            return self._get_closure_nodes(ns, id, index.get_parents)
         return self.descendants_rel(ns, id, {'isa', 'partof'})
 
     @with_initialize
@@ -409,6 +417,10 @@ class IndraOntology(networkx.DiGraph):
             A list of entities (name space, ID pairs) that are the
             top-level parents of the given entity.
         """
+        index = self._get_closure_index({'isa', 'partof'})
+        if index is not None:
+            return self._get_closure_nodes(ns, id,
+                                           index.get_top_level_parents)
         parents = self.get_parents(ns, id)
         return [p for p in parents if not self.get_parents(*p)]
 
@@ -620,18 +632,25 @@ class IndraOntology(networkx.DiGraph):
         return tuple(label.split(':', maxsplit=1))
 
     def _build_transitive_closure(self):
-        if self.transitive_closure:
+        if isinstance(self.transitive_closure, TransitiveClosure):
             return
         logger.info('Building transitive closure for faster '
                     'isa/partof lookups...')
-        self.transitive_closure = set()
-        for node in self.nodes():
-            ns, id = self.get_ns_id(node)
-            for pns, pid in self.descendants_rel(ns, id,
-                                                 rel_types={'isa',
-                                                            'partof'}):
-                self.transitive_closure.add((self.label(ns, id),
-                                             self.label(pns, pid)))
+        self.transitive_closure = TransitiveClosure.from_ontology(self)
+
+    def _get_closure_index(self, rel_types):
+        # Ontologies pickled by earlier versions may have a set of label
+        # pairs here which we don't use
+        if not isinstance(self.transitive_closure, TransitiveClosure):
+            return None
+        return self.transitive_closure.get_index(rel_types)
+
+    def _get_closure_nodes(self, ns, id, index_fun):
+        node = self.transitive_closure.find(self.label(ns, id))
+        if node is None:
+            return []
+        labels = self.transitive_closure.labels
+        return [self.get_ns_id(labels[idx]) for idx in index_fun(node)]
 
     @with_initialize
     def print_stats(self):
@@ -1,12 +1,23 @@
+import time
 import requests
+from collections import OrderedDict
 from ..ontology_graph import IndraOntology
 
 
+# A placeholder for the results of queries that aren't cached, since None
+# can be a cached result
+_missing = object()
+
+
 class VirtualOntology(IndraOntology):
     """A virtual ontology class which uses a remote REST service to perform
     all operations. It is particularly useful if the host machine has limited
     resources and keeping the ontology graph in memory is not desirable.
 
+    Requests are sent over a persistent session with a pool of keep-alive
+    connections, and the results of all queries are kept in a
+    least-recently-used cache whose entries expire after a given time.
+
     Parameters
     ----------
     url : str
@@ -14,42 +25,294 @@ class VirtualOntology(IndraOntology):
     ontology : Optional[str]
         The identifier of the ontology recognized by the web service.
         Default: bio
+    cache_size : Optional[int]
+        The maximum number of query results to keep in the cache.
+        Default: 100000
+    cache_ttl : Optional[float]
+        The number of seconds after which cached results expire. If None,
+        cached results don't expire. Default: 3600
+    batch_size : Optional[int]
+        The maximum number of queries sent to the service in a single
+        request when querying in bulk. Default: 5000
     """
-    def __init__(self, url, ontology='bio'):
+    def __init__(self, url, ontology='bio', cache_size=100000,
+                 cache_ttl=3600, batch_size=5000):
         super().__init__()
         self.url = url
         self.ontology = ontology
+        self.batch_size = batch_size
+        self.cache = TtlLruCache(cache_size, cache_ttl)
+        self._session = None
+
+    def __getstate__(self):
+        # Sessions hold open connections so they are not pickled
+        state = self.__dict__.copy()
+        state['_session'] = None
+        return state
 
     def initialize(self):
         self._initialized = True
 
+    @property
+    def session(self):
+        """Return a session with a pool of keep-alive connections."""
+        if self._session is None:
+            self._session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                    pool_maxsize=10)
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+        return self._session
+
     def child_rel(self, ns, id, rel_types):
-        res = _send_request(self.url, 'child_rel',
-                            ns=ns, id=id, rel_types=list(rel_types),
-                            ontology=self.ontology)
+        rel_types = sorted(rel_types)
+        res = self._cached_request(('child_rel', ns, id, tuple(rel_types)),
+                                   'child_rel', ns=ns, id=id,
+                                   rel_types=rel_types)
         yield from (tuple(r) for r in res)
 
     def parent_rel(self, ns, id, rel_types):
-        res = _send_request(self.url, 'parent_rel',
-                            ns=ns, id=id, rel_types=list(rel_types),
-                            ontology=self.ontology)
+        rel_types = sorted(rel_types)
+        res = self._cached_request(('parent_rel', ns, id, tuple(rel_types)),
+                                   'parent_rel', ns=ns, id=id,
+                                   rel_types=rel_types)
         yield from (tuple(r) for r in res)
 
     def get_node_property(self, ns, id, property):
-        return _send_request(self.url, 'get_node_property',
-                             ns=ns, id=id, property=property,
-                             ontology=self.ontology)
+        return self._cached_request(('get_node_property', ns, id, property),
+                                    'get_node_property', ns=ns, id=id,
+                                    property=property)
 
     def get_id_from_name(self, ns, name):
-        return _send_request(self.url, 'get_id_from_name',
-                             ns=ns, name=name, ontology=self.ontology)
+        return self._cached_request(('get_id_from_name', ns, name),
+                                    'get_id_from_name', ns=ns, name=name)
 
     def get_component_label(self, ns, id):
-        return _send_request(self.url, 'get_component_label',
-                             ns=ns, id=id, ontology=self.ontology)
+        return self._cached_request(('get_component_label', ns, id),
+                                    'get_component_label', ns=ns, id=id)
+
+    def get_parents(self, ns, id):
+        cache_key = ('get_parents', ns, id)
+        parents = self.cache.get(cache_key, _missing)
+        if parents is not _missing:
+            return list(parents)
+        parents = [tuple(r) for r in
+                   next(self._send_batch('get_parents_batch', [(ns, id)]))]
+        self.cache.set(cache_key, parents)
+        return list(parents)
+
+    def isrel(self, ns1, id1, ns2, id2, rels):
+        # The parents of an entity are retrieved with a single request
+        # rather than traversing the remote graph one edge at a time
+        if set(rels) == {'isa', 'partof'}:
+            self._isrel_counter += 1
+            return (ns2, id2) in self.get_parents(ns1, id1)
+        return super().isrel(ns1, id1, ns2, id2, rels)
+
+    def prefetch_parents(self, entities):
+        """Look up and cache the `isa` or `partof` parents of entities in bulk.
+
+        Parameters
+        ----------
+        entities : iterable of tuple
+            An iterable of (name space, ID) tuples whose parents should be
+            looked up. Entities whose parents are already cached are not
+            queried again.
+
+        Returns
+        -------
+        dict
+            A dict of the list of parents of each given entity.
+        """
+        parents = {}
+        queries = []
+        for ns, id in set(entities):
+            cached_parents = self.cache.get(('get_parents', ns, id), _missing)
+            if cached_parents is not _missing:
+                parents[(ns, id)] = list(cached_parents)
+            else:
+                queries.append((ns, id))
+        for query, res in zip(queries,
+                              self._send_batch('get_parents_batch',
+                                               queries)):
+            parents[query] = [tuple(r) for r in res]
+            self.cache.set(('get_parents', ) + query, parents[query])
+        return parents
+
+    def child_rel_batch(self, entities, rel_types):
+        """Return the child_rel results for a list of entities.
+
+        Parameters
+        ----------
+        entities : list of tuple
+            A list of (name space, ID) tuples.
+        rel_types : iterable of str
+            The edge types to follow.
+
+        Returns
+        -------
+        list of list
+            For each entity, the list of (name space, ID) tuples of
+            entities related to it with the given edge types.
+        """
+        return self._cached_batch('child_rel', entities,
+                                  rel_types=sorted(rel_types))
+
+    def parent_rel_batch(self, entities, rel_types):
+        """Return the parent_rel results for a list of entities.
+
+        Parameters
+        ----------
+        entities : list of tuple
+            A list of (name space, ID) tuples.
+        rel_types : iterable of str
+            The edge types to follow.
+
+        Returns
+        -------
+        list of list
+            For each entity, the list of (name space, ID) tuples of
+            entities from which it can be reached with the given edge types.
+        """
+        return self._cached_batch('parent_rel', entities,
+                                  rel_types=sorted(rel_types))
+
+    def get_node_property_batch(self, entities, property):
+        """Return a given property for a list of entities.
+
+        Parameters
+        ----------
+        entities : list of tuple
+            A list of (name space, ID) tuples.
+        property : str
+            The name of the property.
+
+        Returns
+        -------
+        list
+            The value of the property for each entity, None if not
+            available.
+        """
+        return self._cached_batch('get_node_property', entities,
+                                  property=property)
+
+    def get_id_from_name_batch(self, names):
+        """Return the IDs of a list of entity names.
+
+        Parameters
+        ----------
+        names : list of tuple
+            A list of (name space, name) tuples.
+
+        Returns
+        -------
+        list
+            For each name, the (name space, ID) of the entity with that
+            name, None if not available.
+        """
+        return self._cached_batch('get_id_from_name', names)
+
+    def _cached_request(self, cache_key, endpoint, **kwargs):
+        res = self.cache.get(cache_key, _missing)
+        if res is not _missing:
+            return res
+        res = _send_request(self.url, endpoint, session=self.session,
+                            ontology=self.ontology, **kwargs)
+        self.cache.set(cache_key, res)
+        return res
+
+    def _cached_batch(self, endpoint, entities, **kwargs):
+        extra_key = tuple(tuple(v) if isinstance(v, list) else v
+                          for _, v in sorted(kwargs.items()))
+
+        def get_cache_key(entity):
+            return (endpoint, ) + tuple(entity) + extra_key
+
+        results = {}
+        queries = []
+        for entity in entities:
+            cache_key = get_cache_key(entity)
+            if cache_key in results:
+                continue
+            results[cache_key] = self.cache.get(cache_key, _missing)
+            if results[cache_key] is _missing:
+                queries.append(entity)
+        for query, res in zip(queries,
+                              self._send_batch('%s_batch' % endpoint,
+                                               queries, **kwargs)):
+            results[get_cache_key(query)] = res
+            self.cache.set(get_cache_key(query), res)
+        results = [results[get_cache_key(entity)] for entity in entities]
+        if endpoint in {'child_rel', 'parent_rel'}:
+            results = [[tuple(r) for r in res] for res in results]
+        return results
+
+    def _send_batch(self, endpoint, queries, **kwargs):
+        queries = [list(query) for query in queries]
+        for start in range(0, len(queries), self.batch_size):
+            yield from _send_request(
+                self.url, endpoint, session=self.session,
+                queries=queries[start:start + self.batch_size],
+                ontology=self.ontology, **kwargs)
+
+
+class TtlLruCache(object):
+    """A least-recently-used cache whose entries expire after a given time.
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum number of entries in the cache.
+    ttl : Optional[float]
+        The number of seconds after which an entry expires. If None,
+        entries don't expire.
+    """
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return False
+        if self.ttl is not None and time.time() - entry[0] > self.ttl:
+            del self.data[key]
+            return False
+        return True
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key, default=None):
+        """Return the value for a given key or a default if not cached.
+
+        Checking whether a key is cached and getting its value in one step
+        means that an entry can't expire in between.
+        """
+        if key not in self:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.data.move_to_end(key)
+        return self.data[key][1]
+
+    def set(self, key, value):
+        """Cache a value for a given key."""
+        self.data[key] = (time.time(), value)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        self.data.clear()
 
 
-def _send_request(base_url, endpoint, **kwargs):
+def _send_request(base_url, endpoint, session=None, **kwargs):
     url = '%s/%s' % (base_url, endpoint)
-    res = requests.get(url, json=kwargs)
+    res = (session or requests).get(url, json=kwargs)
+    res.raise_for_status()
     return res.json()
@@ -180,6 +180,9 @@ class WorldOntology(IndraOntology):
                     matched_node = root[-1][part]
             root = matched_node
         self._load_yml(self.yml)
+        # The transitive closure needs to be rebuilt to reflect the new entry
+        self.transitive_closure = None
+        self._build_transitive_closure()
 
 
 @register_pipeline
@@ -1,8 +1,10 @@
+import copy
 import time
 import logging
 import itertools
 import functools
 import collections
+import multiprocessing
 import networkx as nx
 from indra.util import fast_deepcopy
 from indra.statements import *
@@ -34,6 +36,15 @@ class Preassembler(object):
         A set of name spaces that should be considered for constructing
         refinements. If not provided, all name spaces are considered.
         Default: None
+    copy_stmts : Optional[bool]
+        If True, the Preassembler works on deep copies of the statements
+        passed to it so that they are not changed by preassembly. If False,
+        the Preassembler takes ownership of the statements without copying
+        them, which avoids holding two copies of a large corpus in memory.
+        In that case, the evidences of the statements are annotated during
+        preassembly, the statements may be normalized in place, and the
+        statements returned by preassembly share their agents and evidences
+        with the statements passed in. Default: True
 
     Attributes
     ----------
@@ -47,13 +58,10 @@ class Preassembler(object):
         An INDRA Ontology object.
     """
     def __init__(self, ontology, stmts=None, matches_fun=None,
-                 refinement_fun=None, refinement_ns=None):
+                 refinement_fun=None, refinement_ns=None, copy_stmts=True):
         self.ontology = ontology
-        if stmts:
-            logger.debug("Deepcopying stmts in __init__")
-            self.stmts = fast_deepcopy(stmts)
-        else:
-            self.stmts = []
+        self.copy_stmts = copy_stmts
+        self.stmts = self._take_stmts(stmts) if stmts else []
         self.unique_stmts = None
         self.related_stmts = None
         self.matches_fun = matches_fun if matches_fun else \
@@ -62,6 +70,7 @@ class Preassembler(object):
             default_refinement_fun
         self.refinement_ns = refinement_ns
         self._comparison_counter = 0
+        self._contradiction_counter = 0
 
     def add_statements(self, stmts):
         """Add to the current list of statements.
@@ -69,9 +78,17 @@ class Preassembler(object):
         Parameters
         ----------
         stmts : list of :py:class:`indra.statements.Statement`
-            Statements to add to the current list.
+            Statements to add to the current list. They are deep-copied
+            unless the Preassembler was created with `copy_stmts=False`.
         """
-        self.stmts += fast_deepcopy(stmts)
+        self.stmts += self._take_stmts(stmts)
+
+    def _take_stmts(self, stmts):
+        """Return the statements to be owned by this Preassembler."""
+        if self.copy_stmts:
+            logger.debug("Deepcopying %d stmts" % len(stmts))
+            return fast_deepcopy(stmts)
+        return list(stmts)
 
     def combine_duplicates(self):
         """Combine duplicates among `stmts` and save result in `unique_stmts`.
@@ -138,68 +155,33 @@ class Preassembler(object):
         >>> sorted([e.text for e in uniq_stmts[0].evidence])
         ['evidence 1', 'evidence 2']
         """
-        # Helper function to get a list of evidence matches keys
-        def _ev_keys(sts):
-            ev_keys = []
-            for stmt in sts:
-                for ev in stmt.evidence:
-                    ev_keys.append(ev.matches_key())
-            return ev_keys
-        # Iterate over groups of duplicate statements
-        unique_stmts = []
-        for _, duplicates in self._get_stmt_matching_groups(stmts):
-            ev_keys = set()
-            # Get the first statement and add the evidence of all subsequent
-            # Statements to it
-            duplicates = list(duplicates)
-            start_ev_keys = _ev_keys(duplicates)
-            for stmt_ix, stmt in enumerate(duplicates):
-                if stmt_ix == 0:
-                    new_stmt = stmt.make_generic_copy()
-                if len(duplicates) == 1:
-                    new_stmt.uuid = stmt.uuid
-                raw_text = [None if ag is None else ag.db_refs.get('TEXT')
-                            for ag in stmt.agent_list(deep_sorted=True)]
-                raw_grounding = [None if ag is None else ag.db_refs
-                                 for ag in stmt.agent_list(deep_sorted=True)]
-                for ev in stmt.evidence:
-                    ev_key = ev.matches_key() + str(raw_text) + \
-                        str(raw_grounding)
-                    if ev_key not in ev_keys:
-                        # In case there are already agents annotations, we
-                        # just add a new key for raw_text, otherwise create
-                        # a new key
-                        if 'agents' in ev.annotations:
-                            ev.annotations['agents']['raw_text'] = raw_text
-                            ev.annotations['agents']['raw_grounding'] = \
-                                raw_grounding
-                        else:
-                            ev.annotations['agents'] = \
-                                {'raw_text': raw_text,
-                                 'raw_grounding': raw_grounding}
-                        if 'prior_uuids' not in ev.annotations:
-                            ev.annotations['prior_uuids'] = []
-                        ev.annotations['prior_uuids'].append(stmt.uuid)
-                        new_stmt.evidence.append(ev)
-                        ev_keys.add(ev_key)
-            end_ev_keys = _ev_keys([new_stmt])
-            if len(end_ev_keys) != len(start_ev_keys):
-                logger.debug('%d redundant evidences eliminated.' %
-                             (len(start_ev_keys) - len(end_ev_keys)))
-            # This should never be None or anything else
-            assert isinstance(new_stmt, Statement)
-            unique_stmts.append(new_stmt)
-        # At this point, we should do a hash refresh so that the statements
-        # returned don't have stale hashes.
-        for stmt in unique_stmts:
-            for shallow in (True, False):
-                stmt.get_hash(shallow=shallow, refresh=True,
-                              matches_fun=self.matches_fun)
+        # Freezing the statements makes sure that their matches keys are
+        # built only once while grouping and hashing them
+        frozen_stmts = _freeze_stmts(stmts)
+        frozen_ids = {id(stmt) for stmt in frozen_stmts}
+        try:
+            # Iterate over groups of duplicate statements
+            unique_stmts = []
+            for _, duplicates in self._get_stmt_matching_groups(stmts):
+                duplicates = list(duplicates)
+                new_stmt = _combine_duplicate_group(duplicates)
+                # The copy inherits the cached key of the first statement so
+                # it has to be unfrozen along with it
+                if id(duplicates[0]) in frozen_ids:
+                    frozen_stmts.append(new_stmt)
+                unique_stmts.append(new_stmt)
+            # At this point, we should do a hash refresh so that the statements
+            # returned don't have stale hashes.
+            for stmt in unique_stmts:
+                for shallow in (True, False):
+                    stmt.get_hash(shallow=shallow, refresh=True,
+                                  matches_fun=self.matches_fun)
+        finally:
+            _unfreeze_stmts(frozen_stmts)
         return unique_stmts
 
-    # Note that the kwargs here are just there for backwards compatibility
-    # with old code that uses arguments related to multiprocessing.
-    def combine_related(self, return_toplevel=True, filters=None, **kwargs):
+    def combine_related(self, return_toplevel=True, filters=None,
+                        poolsize=None, size_cutoff=None, **kwargs):
         """Connect related statements based on their refinement relationships.
 
         This function takes as a starting point the unique statements (with
@@ -263,6 +245,15 @@ class Preassembler(object):
             automatically appended to the list of filters. In this case,
             consider adding the `ontology_refinement_filter` function from this
             module to the filters list.
+        poolsize : Optional[int]
+            The number of worker processes to use to parallelize the
+            confirmation of possible refinements. If None (default) or 1,
+            refinements are confirmed serially in the current process.
+        size_cutoff : Optional[int]
+            Shards of possible refinements with fewer than size_cutoff
+            comparisons are confirmed in the parent process rather than
+            being sent to a worker process. Default: 100. Only relevant
+            when poolsize is set.
 
         Returns
         -------
@@ -305,8 +296,14 @@ class Preassembler(object):
         unique_stmts = self.combine_duplicates()
 
         # Generate the index map, linking related statements.
-        idx_map = self._generate_id_maps(unique_stmts,
-                                         filters=filters)
+        frozen_stmts = _freeze_stmts(unique_stmts)
+        try:
+            idx_map = self._generate_id_maps(unique_stmts,
+                                             filters=filters,
+                                             poolsize=poolsize,
+                                             size_cutoff=size_cutoff)
+        finally:
+            _unfreeze_stmts(frozen_stmts)
 
         # Now iterate over all indices and set supports/supported by
         for ix1, ix2 in idx_map:
@@ -320,10 +317,9 @@ class Preassembler(object):
         else:
             return unique_stmts
 
-    # Note that the kwargs here are just there for backwards compatibility
-    # with old code that uses arguments related to multiprocessing.
     def _generate_id_maps(self, unique_stmts, split_idx=None,
-                          filters=None, **kwargs):
+                          filters=None, poolsize=None, size_cutoff=None,
+                          **kwargs):
         """Return pairs of statement indices representing refinement relations.
 
         Parameters
@@ -341,6 +337,12 @@ class Preassembler(object):
             of possible refinements where the keys are statement hashes
             and the values are sets of statement hashes that the
             key statement possibly refines.
+        poolsize : Optional[int]
+            The number of worker processes to use for confirming possible
+            refinements. If None (default), no parallelization is performed.
+        size_cutoff : Optional[int]
+            Shards with fewer than size_cutoff comparisons are confirmed in
+            the parent process. Default: 100
 
         Returns
         -------
@@ -405,14 +407,17 @@ class Preassembler(object):
         maps = \
             self.confirm_possible_refinements(stmts_by_hash,
                                               stmts_to_compare,
-                                              split_groups=hash_to_split_group)
+                                              split_groups=hash_to_split_group,
+                                              poolsize=poolsize,
+                                              size_cutoff=size_cutoff)
 
         idx_maps = [(stmt_to_idx[refinement], stmt_to_idx[refined])
                     for refinement, refined in maps]
         return idx_maps
 
     def confirm_possible_refinements(self, stmts_by_hash, stmts_to_compare,
-                                     split_groups=None):
+                                     split_groups=None, poolsize=None,
+                                     size_cutoff=None):
         """Return confirmed pairs of statement refinement relationships.
 
         Parameters
@@ -430,6 +435,20 @@ class Preassembler(object):
             same group aren't compared, only statements in different
             groups are. This can be used to do "bipartite" refinement
             checking across a set of statements.
+        poolsize : Optional[int]
+            The number of worker processes to use for confirming possible
+            refinements. If None (default) or 1, all comparisons are made
+            serially in the current process. Otherwise, the possible
+            refinements are sharded by statement type and hash range, and
+            shards are confirmed in a pool of worker processes. Statements
+            are sent to workers without their evidence, therefore a
+            custom refinement_fun used with a pool must not depend on
+            evidence. The result is identical to that of the serial
+            confirmation.
+        size_cutoff : Optional[int]
+            Shards with fewer than size_cutoff comparisons are confirmed in
+            the parent process rather than being sent to a worker
+            process. Default: 100
 
         Returns
         -------
@@ -438,45 +457,95 @@ class Preassembler(object):
             hash of a statement which refines that statement whose hash
             is the second element of the tuple.
         """
-        maps = []
-        # We again iterate over statements
         ts = time.time()
-        # Given the possible refinements in stmts_to_compare, we confirm each
+        if poolsize is None or poolsize <= 1:
+            confirmed, n_comparisons = \
+                _confirm_refinements(stmts_by_hash, stmts_to_compare,
+                                     split_groups, self.refinement_fun,
+                                     self.ontology)
+            self._comparison_counter += n_comparisons
+        else:
+            confirmed = \
+                self._confirm_possible_refinements_parallel(
+                    stmts_by_hash, stmts_to_compare, split_groups,
+                    poolsize, size_cutoff if size_cutoff else 100)
+        # We assemble the confirmed refinements in the order in which
+        # they appear in stmts_to_compare so that the result doesn't depend
+        # on whether parallelization was used.
+        maps = []
         for stmt_hash, possible_refined_hashes in stmts_to_compare.items():
-            # We use the previously constructed set of statements that this one
-            # can possibly refine
+            confirmed_for_stmt = confirmed.get(stmt_hash)
+            if not confirmed_for_stmt:
+                continue
             for possible_refined_hash in possible_refined_hashes:
-                # We handle split groups here to only check refinements between
-                # statements that are in different groups to compare
-                if not split_groups or split_groups[stmt_hash] != \
-                        split_groups[possible_refined_hash]:
-                    # And then do the actual comparison. Here we use
-                    # entities_refined=True which means that we assert that
-                    # the entities, in each role, are already confirmed to
-                    # be "compatible" for refinement, and therefore, we
-                    # don't need to again confirm this (i.e., call "isa") in
-                    # the refinement_of function.
-                    self._comparison_counter += 1
-                    ref = self.refinement_fun(
-                        stmts_by_hash[stmt_hash],
-                        stmts_by_hash[possible_refined_hash],
-                        ontology=self.ontology,
-                        # NOTE: here we assume that the entities at this point
-                        # are definitely refined due to the use of an
-                        # ontology-based pre-filter. If this is not the case
-                        # for some reason then it is the responsibility of the
-                        # user-supplied self.refinement_fun to disregard the
-                        # entities_refined argument.
-                        entities_refined=True)
-                    if ref:
-                        maps.append((stmt_hash, possible_refined_hash))
+                if possible_refined_hash in confirmed_for_stmt:
+                    maps.append((stmt_hash, possible_refined_hash))
         te = time.time()
         logger.debug('Confirmed %d refinements in %.2fs' % (len(maps), te-ts))
         return maps
 
-    def find_contradicts(self):
+    def _confirm_possible_refinements_parallel(self, stmts_by_hash,
+                                               stmts_to_compare, split_groups,
+                                               poolsize, size_cutoff):
+        shards = _get_refinement_shards(stmts_by_hash, stmts_to_compare,
+                                        poolsize, size_cutoff)
+        local_shards = [shard for shard in shards
+                        if shard[1] < size_cutoff]
+        pool_shards = [shard for shard in shards
+                       if shard[1] >= size_cutoff]
+        logger.info('Confirming %d possible refinements in %d shards using '
+                    '%d worker processes'
+                    % (sum(shard[1] for shard in pool_shards),
+                       len(pool_shards), poolsize))
+        confirmed = {}
+        if pool_shards:
+            # The refinement function and the ontology are passed to the
+            # workers once, at initialization time, rather than with each
+            # shard. When processes are forked, they are inherited by the
+            # workers without serialization.
+            with multiprocessing.Pool(
+                    poolsize, initializer=_init_refinement_worker,
+                    initargs=(self.refinement_fun, self.ontology)) as pool:
+                shard_inputs = (
+                    _get_shard_input(stmts_by_hash, stmts_to_compare,
+                                     split_groups, shard_hashes)
+                    for shard_hashes, _ in pool_shards)
+                for shard_confirmed, n_comparisons in \
+                        pool.imap_unordered(_confirm_refinements_in_worker,
+                                            shard_inputs):
+                    confirmed.update(shard_confirmed)
+                    self._comparison_counter += n_comparisons
+        # Small shards are not worth the overhead of sending them to
+        # a worker so we confirm them here
+        for shard_hashes, _ in local_shards:
+            shard_confirmed, n_comparisons = \
+                _confirm_refinements(stmts_by_hash,
+                                     {sh: stmts_to_compare[sh]
+                                      for sh in shard_hashes},
+                                     split_groups, self.refinement_fun,
+                                     self.ontology)
+            confirmed.update(shard_confirmed)
+            self._comparison_counter += n_comparisons
+        return confirmed
+
+    def find_contradicts(self, poolsize=None):
         """Return pairs of contradicting Statements.
 
+        Statements are only compared if the Agents in each of their roles
+        match or are related in the ontology, and, for Modifications and
+        ActiveForms, if their site or activity is the same. These
+        candidates are found using agent key indexes in the same way as
+        possible refinements are found by
+        :py:func:`ontology_refinement_filter_by_stmt_type`.
+
+        Parameters
+        ----------
+        poolsize : Optional[int]
+            The number of worker processes to use to find contradictions
+            for different statement types in parallel. If None (default)
+            or 1, all statement types are handled serially in the current
+            process.
+
         Returns
         -------
         contradicts : list(tuple(Statement, Statement))
@@ -495,26 +564,44 @@ class Preassembler(object):
         pos_stmts += [Activation, IncreaseAmount]
         neg_stmts += [Inhibition, DecreaseAmount]
 
-        contradicts = []
-        # Handle statements with polarity first
-        # TODO: we could probably do some optimization here
-        # to not have to check statements combinatorially
+        # Each job is a list of positive statements and a list of negative
+        # statements to compare with each other, or a single list of
+        # neutral statements to compare among themselves
+        jobs = []
         for pst, nst in zip(pos_stmts, neg_stmts):
             poss = stmts_by_type.get(pst, [])
             negs = stmts_by_type.get(nst, [])
-
-            for ps, ns in itertools.product(poss, negs):
-                if ps.contradicts(ns, self.ontology):
-                    contradicts.append((ps, ns))
+            if poss and negs:
+                jobs.append((poss, negs))
 
         # Handle neutral Statements next
         neu_stmts = [Influence, ActiveForm]
         for stt in neu_stmts:
             stmts = stmts_by_type.get(stt, [])
-            for st1, st2 in itertools.combinations(stmts, 2):
-                if st1.contradicts(st2, self.ontology):
-                    contradicts.append((st1, st2))
+            if len(stmts) > 1:
+                jobs.append((stmts, None))
 
+        if poolsize is None or poolsize <= 1:
+            results = [_find_contradicts(stmts1, stmts2, self.ontology)
+                       for stmts1, stmts2 in jobs]
+        else:
+            # Statements are sent to workers without their evidence and
+            # the pairs are returned as indices
+            with multiprocessing.Pool(
+                    poolsize, initializer=_init_refinement_worker,
+                    initargs=(None, self.ontology)) as pool:
+                results = pool.map(
+                    _find_contradicts_in_worker,
+                    [([_get_compact_stmt(st) for st in stmts1],
+                      [_get_compact_stmt(st) for st in stmts2]
+                      if stmts2 is not None else None)
+                     for stmts1, stmts2 in jobs])
+        contradicts = []
+        for (stmts1, stmts2), (pairs, n_comparisons) in zip(jobs, results):
+            stmts2 = stmts2 if stmts2 is not None else stmts1
+            contradicts += [(stmts1[idx1], stmts2[idx2])
+                            for idx1, idx2 in pairs]
+            self._contradiction_counter += n_comparisons
         return contradicts
 
     def _normalize_relations(self, ns, rank_key, rel_fun, flip_polarity):
@@ -767,7 +854,7 @@ def flatten_stmts(stmts):
     return list(total_stmts)
 
 
-def flatten_evidence(stmts, collect_from=None):
+def flatten_evidence(stmts, collect_from=None, dedup_evidence=False):
     """Add evidence from *supporting* stmts to evidence for *supported* stmts.
 
     Parameters
@@ -780,6 +867,11 @@ def flatten_evidence(stmts, collect_from=None):
         String indicating whether to collect and flatten evidence from the
         `supports` attribute of each statement or the `supported_by` attribute.
         If not set, defaults to 'supported_by'.
+    dedup_evidence : Optional[bool]
+        If True, evidences collected from other statements are left out if
+        they have the same matches key as one of the statement's own
+        evidences. Otherwise, they are kept and, like the statement's own
+        evidences, annotated as direct. Default: False
 
     Returns
     -------
@@ -809,47 +901,412 @@ def flatten_evidence(stmts, collect_from=None):
     >>> sorted([e.text for e in flattened[0].evidence])
     ['bak', 'bar', 'baz', 'foo']
     """
-    if collect_from is None:
-        collect_from = 'supported_by'
-    if collect_from not in ('supports', 'supported_by'):
-        raise ValueError('collect_from must be one of "supports", '
-                         '"supported_by"')
+    collect_from = _check_collect_from(collect_from)
     logger.info('Flattening evidence based on %s' % collect_from)
     # Copy all of the statements--these will be the ones where we update
     # the evidence lists
     stmts = fast_deepcopy(stmts)
-    for stmt in stmts:
-        # We get the original evidence keys here so we can differentiate them
-        # from ones added during flattening.
-        orig_ev_keys = [ev.matches_key() for ev in stmt.evidence]
-        # We now do the flattening
-        total_evidence = _flatten_evidence_for_stmt(stmt, collect_from)
+    # The references are all collected before any evidence list is replaced
+    # since statements in the list can support each other
+    all_refs = get_flattened_evidence_refs(stmts, collect_from,
+                                           dedup_evidence=dedup_evidence)
+    get_ev_key = _make_ev_key_getter()
+    # Evidences added during flattening are copied only once and the copy is
+    # shared by all the statements they are added to
+    ev_copies = {}
+    new_evidences = []
+    for stmt, refs in zip(stmts, all_refs):
+        # Evidences from other statements with the same matches key as one of
+        # the statement's own evidences are treated as direct evidence
+        own_ev_keys = {get_ev_key(ev) for ev in stmt.evidence} \
+            if not dedup_evidence else set()
         # Here we add annotations for each evidence in the list,
         # depending on whether it's an original direct evidence or one that
         # was added during flattening
         new_evidence = []
-        for ev in total_evidence:
-            ev_key = ev.matches_key()
-            if ev_key in orig_ev_keys:
+        for ref_stmt, ev_idx in refs:
+            ev = ref_stmt.evidence[ev_idx]
+            if ref_stmt is stmt or \
+                    (own_ev_keys and get_ev_key(ev) in own_ev_keys):
                 ev.annotations['support_type'] = 'direct'
                 new_evidence.append(ev)
-            else:
+                continue
+            ev_copy = ev_copies.get(id(ev))
+            if ev_copy is None:
                 ev_copy = fast_deepcopy(ev)
                 ev_copy.annotations['support_type'] = collect_from
-                new_evidence.append(ev_copy)
-        # Now set the new evidence list as the copied statement's evidence
+                ev_copies[id(ev)] = ev_copy
+            new_evidence.append(ev_copy)
+        new_evidences.append(new_evidence)
+    # Now set the new evidence lists as the copied statements' evidence
+    for stmt, new_evidence in zip(stmts, new_evidences):
         stmt.evidence = new_evidence
     return stmts
 
 
-def _flatten_evidence_for_stmt(stmt, collect_from):
-    supp_stmts = (stmt.supports if collect_from == 'supports'
-                  else stmt.supported_by)
-    total_evidence = set(stmt.evidence)
-    for supp_stmt in supp_stmts:
-        child_evidence = _flatten_evidence_for_stmt(supp_stmt, collect_from)
-        total_evidence = total_evidence.union(child_evidence)
-    return list(total_evidence)
+def get_flattened_evidence_refs(stmts, collect_from=None,
+                                dedup_evidence=False):
+    """Return references to the evidence flattened into each statement.
+
+    The statement hierarchy is traversed once, children before parents,
+    and the evidence references of each statement are calculated once from
+    those of its children, so that the time this takes is proportional to
+    the size of the hierarchy and the number of references returned.
+    Evidences are referenced by the statement they belong to and their
+    index in its evidence list rather than copied, and the statements are
+    not changed, so that the flattened evidence can be materialized lazily.
+
+    Parameters
+    ----------
+    stmts : list of :py:class:`indra.statements.Statement`
+        A list of statements with associated supporting statements
+        resulting from building a statement hierarchy with
+        :py:meth:`combine_related`.
+    collect_from : str in ('supports', 'supported_by')
+        String indicating whether to collect evidence from the `supports`
+        attribute of each statement or the `supported_by` attribute.
+        If not set, defaults to 'supported_by'.
+    dedup_evidence : Optional[bool]
+        If True, evidences of other statements with the same matches key as
+        one of the statement's own evidences are left out. Default: False
+
+    Returns
+    -------
+    list of list of tuple
+        For each statement, a list of tuples of a statement and the index of
+        an evidence in its evidence list. The statement's own evidences come
+        first, followed by those of the statements it is supported by
+        (or supports), each of which appears once.
+
+    Examples
+    --------
+    >>> braf = Agent('BRAF')
+    >>> map2k1 = Agent('MAP2K1')
+    >>> st1 = Phosphorylation(braf, map2k1, evidence=[Evidence(text='foo')])
+    >>> st2 = Phosphorylation(braf, map2k1, residue='S',
+    ... evidence=[Evidence(text='bar')])
+    >>> st2.supported_by = [st1]
+    >>> [[ref_stmt.evidence[ev_idx].text for ref_stmt, ev_idx in refs]
+    ...  for refs in get_flattened_evidence_refs([st2])]
+    [['bar', 'foo']]
+    """
+    collect_from = _check_collect_from(collect_from)
+    # The evidence references of each statement in the hierarchy, keyed by
+    # the id of the statement
+    refs_by_stmt = {}
+    for root in stmts:
+        # We traverse the hierarchy iteratively to visit the statements
+        # collected from before the statements collecting from them
+        stack = [(root, False)]
+        while stack:
+            stmt, expanded = stack.pop()
+            if id(stmt) in refs_by_stmt:
+                continue
+            children = getattr(stmt, collect_from)
+            if not expanded:
+                stack.append((stmt, True))
+                stack += [(child, False) for child in children
+                          if id(child) not in refs_by_stmt]
+                continue
+            refs = [(stmt, ev_idx) for ev_idx in range(len(stmt.evidence))]
+            seen_evs = {id(ev) for ev in stmt.evidence}
+            for child in children:
+                for ref_stmt, ev_idx in refs_by_stmt[id(child)]:
+                    ev = ref_stmt.evidence[ev_idx]
+                    if id(ev) not in seen_evs:
+                        seen_evs.add(id(ev))
+                        refs.append((ref_stmt, ev_idx))
+            refs_by_stmt[id(stmt)] = refs
+
+    if not dedup_evidence:
+        return [refs_by_stmt[id(stmt)] for stmt in stmts]
+    get_ev_key = _make_ev_key_getter()
+    all_refs = []
+    for stmt in stmts:
+        own_ev_keys = {get_ev_key(ev) for ev in stmt.evidence}
+        all_refs.append([(ref_stmt, ev_idx)
+                         for ref_stmt, ev_idx in refs_by_stmt[id(stmt)]
+                         if ref_stmt is stmt or
+                         get_ev_key(ref_stmt.evidence[ev_idx])
+                         not in own_ev_keys])
+    return all_refs
+
+
+def _make_ev_key_getter():
+    """Return a function that gets matches keys of evidences memoized."""
+    ev_keys = {}
+
+    def get_ev_key(ev):
+        ev_key = ev_keys.get(id(ev))
+        if ev_key is None:
+            ev_key = ev.matches_key()
+            ev_keys[id(ev)] = ev_key
+        return ev_key
+    return get_ev_key
+
+
+def _check_collect_from(collect_from):
+    if collect_from is None:
+        collect_from = 'supported_by'
+    if collect_from not in ('supports', 'supported_by'):
+        raise ValueError('collect_from must be one of "supports", '
+                         '"supported_by"')
+    return collect_from
+
+
+def _confirm_refinements(stmts_by_hash, stmts_to_compare, split_groups,
+                         refinement_fun, ontology):
+    """Return confirmed refinements per statement hash and comparison count.
+    """
+    confirmed = {}
+    n_comparisons = 0
+    # Given the possible refinements in stmts_to_compare, we confirm each
+    for stmt_hash, possible_refined_hashes in stmts_to_compare.items():
+        if not possible_refined_hashes:
+            continue
+        # We use the previously constructed set of statements that this one
+        # can possibly refine
+        for possible_refined_hash in possible_refined_hashes:
+            # We handle split groups here to only check refinements between
+            # statements that are in different groups to compare
+            if not split_groups or split_groups[stmt_hash] != \
+                    split_groups[possible_refined_hash]:
+                # And then do the actual comparison. Here we use
+                # entities_refined=True which means that we assert that
+                # the entities, in each role, are already confirmed to
+                # be "compatible" for refinement, and therefore, we
+                # don't need to again confirm this (i.e., call "isa") in
+                # the refinement_of function.
+                n_comparisons += 1
+                ref = refinement_fun(
+                    stmts_by_hash[stmt_hash],
+                    stmts_by_hash[possible_refined_hash],
+                    ontology=ontology,
+                    # NOTE: here we assume that the entities at this point
+                    # are definitely refined due to the use of an
+                    # ontology-based pre-filter. If this is not the case
+                    # for some reason then it is the responsibility of the
+                    # user-supplied refinement_fun to disregard the
+                    # entities_refined argument.
+                    entities_refined=True)
+                if ref:
+                    if stmt_hash not in confirmed:
+                        confirmed[stmt_hash] = set()
+                    confirmed[stmt_hash].add(possible_refined_hash)
+    return confirmed, n_comparisons
+
+
+def _get_refinement_shards(stmts_by_hash, stmts_to_compare, poolsize,
+                           size_cutoff):
+    """Return shards of statement hashes by statement type and hash range.
+
+    Each shard is a tuple of a list of statement hashes (keys of
+    stmts_to_compare) and the number of comparisons the shard entails.
+    """
+    hashes_by_type = collections.defaultdict(list)
+    for stmt_hash, possible_refined_hashes in stmts_to_compare.items():
+        if possible_refined_hashes:
+            stmt_type = indra_stmt_type(stmts_by_hash[stmt_hash])
+            hashes_by_type[stmt_type].append(stmt_hash)
+    total_comparisons = sum(len(v) for v in stmts_to_compare.values() if v)
+    # We aim for a few shards per worker to balance load while making sure
+    # that a shard is never too small to be worth sending to a worker.
+    target_size = max(size_cutoff, total_comparisons // (4 * poolsize) + 1)
+    shards = []
+    for stmt_type in sorted(hashes_by_type, key=lambda t: t.__name__):
+        shard_hashes = []
+        shard_size = 0
+        for stmt_hash in sorted(hashes_by_type[stmt_type]):
+            shard_hashes.append(stmt_hash)
+            shard_size += len(stmts_to_compare[stmt_hash])
+            if shard_size >= target_size:
+                shards.append((shard_hashes, shard_size))
+                shard_hashes = []
+                shard_size = 0
+        if shard_hashes:
+            shards.append((shard_hashes, shard_size))
+    return shards
+
+
+def _get_shard_input(stmts_by_hash, stmts_to_compare, split_groups,
+                     shard_hashes):
+    """Return the compact data needed by a worker to confirm a shard."""
+    shard_to_compare = {sh: list(stmts_to_compare[sh])
+                        for sh in shard_hashes}
+    shard_stmt_hashes = set(shard_hashes)
+    for possible_refined_hashes in shard_to_compare.values():
+        shard_stmt_hashes |= set(possible_refined_hashes)
+    shard_stmts = {sh: _get_compact_stmt(stmts_by_hash[sh])
+                   for sh in shard_stmt_hashes}
+    shard_split_groups = {sh: split_groups[sh] for sh in shard_stmt_hashes} \
+        if split_groups else None
+    return shard_stmts, shard_to_compare, shard_split_groups
+
+
+def _get_compact_stmt(stmt):
+    """Return a shallow copy of a Statement without evidence and support."""
+    compact_stmt = copy.copy(stmt)
+    compact_stmt.evidence = []
+    compact_stmt.supports = []
+    compact_stmt.supported_by = []
+    return compact_stmt
+
+
+_refinement_worker_state = {}
+
+
+def _init_refinement_worker(refinement_fun, ontology):
+    _refinement_worker_state['refinement_fun'] = refinement_fun
+    _refinement_worker_state['ontology'] = ontology
+
+
+def _confirm_refinements_in_worker(shard_input):
+    shard_stmts, shard_to_compare, shard_split_groups = shard_input
+    return _confirm_refinements(shard_stmts, shard_to_compare,
+                                shard_split_groups,
+                                _refinement_worker_state['refinement_fun'],
+                                _refinement_worker_state['ontology'])
+
+
+def _find_contradicts(stmts1, stmts2, ontology):
+    """Return the indices of contradicting statements and comparison count.
+
+    If stmts2 is None, the statements in stmts1 are compared among
+    themselves, otherwise each statement in stmts1 is compared with each
+    statement in stmts2 that it can possibly contradict. The pairs of
+    indices are returned in the order in which they would be found by
+    comparing all pairs of statements.
+    """
+    candidates = _get_contradiction_candidates(stmts1, stmts2, ontology)
+    stmts2 = stmts2 if stmts2 is not None else stmts1
+    pairs = [(idx1, idx2) for idx1, idx2 in candidates
+             if stmts1[idx1].contradicts(stmts2[idx2], ontology)]
+    return pairs, len(candidates)
+
+
+def _find_contradicts_in_worker(job):
+    stmts1, stmts2 = job
+    return _find_contradicts(stmts1, stmts2,
+                             _refinement_worker_state['ontology'])
+
+
+def _get_contradiction_signature(stmt):
+    """Return the keys a statement has to share with contradicting ones.
+
+    The signature consists of the agent key in each role, and the
+    attributes that have to be the same for statements to contradict, or
+    None if the statement can't contradict others since it has a missing
+    agent.
+    """
+    agent_keys = []
+    for role in stmt._agent_order:
+        agent_key = get_agent_key(getattr(stmt, role))
+        if agent_key is None:
+            return None
+        agent_keys.append(agent_key)
+    if isinstance(stmt, Modification):
+        exact_key = (stmt.residue, stmt.position)
+    elif isinstance(stmt, ActiveForm):
+        exact_key = stmt.activity
+    else:
+        exact_key = None
+    return tuple(agent_keys), exact_key
+
+
+def _get_contradiction_candidates(stmts1, stmts2, ontology):
+    """Return sorted pairs of indices of statements that can contradict.
+
+    Two statements can contradict if they have the same exact key and if,
+    in each role, their agent keys are the same or one is an ontological
+    parent of the other. For Influences, the agent keys can also be
+    opposites.
+    """
+    neutral = stmts2 is None
+    stmts2 = stmts2 if not neutral else stmts1
+    sigs1 = [_get_contradiction_signature(stmt) for stmt in stmts1]
+    sigs2 = [_get_contradiction_signature(stmt) for stmt in stmts2] \
+        if not neutral else sigs1
+    n_roles = len(stmts1[0]._agent_order)
+    # Mapping agent keys in each role and exact keys to the indices of
+    # the statements in stmts2 that have them
+    agent_key_to_ids = [collections.defaultdict(set)
+                        for _ in range(n_roles)]
+    exact_key_to_ids = collections.defaultdict(set)
+    for idx, sig in enumerate(sigs2):
+        if sig is None:
+            continue
+        agent_keys, exact_key = sig
+        for role_idx, agent_key in enumerate(agent_keys):
+            agent_key_to_ids[role_idx][agent_key].add(idx)
+        exact_key_to_ids[exact_key].add(idx)
+    # Mapping each distinct signature to the indices of the statements in
+    # stmts1 that have it
+    signature_to_ids = collections.defaultdict(list)
+    for idx, sig in enumerate(sigs1):
+        if sig is not None:
+            signature_to_ids[sig].append(idx)
+
+    # The related keys of each agent key in each role, i.e., the keys among
+    # those in stmts2 that are the same, parents or children of it
+    all_keys_by_role = {role_idx: set(agent_key_to_ids[role_idx])
+                        for role_idx in range(n_roles)}
+    for agent_keys, _ in signature_to_ids:
+        for role_idx, agent_key in enumerate(agent_keys):
+            all_keys_by_role[role_idx].add(agent_key)
+    # Ungrounded agents can only be related to agents with the same name so
+    # the ontology is only queried for grounded ones
+    relevant_keys_by_role = _get_relevant_keys_by_role(
+        {role_idx: {key for key in keys if key[0] != 'NAME'}
+         for role_idx, keys in all_keys_by_role.items()}, ontology)
+    related_keys_by_role = {}
+    for role_idx, relevant_keys in relevant_keys_by_role.items():
+        related_keys = collections.defaultdict(set)
+        for agent_key in all_keys_by_role[role_idx]:
+            related_keys[agent_key].add(agent_key)
+        for agent_key, parent_keys in relevant_keys.items():
+            for parent_key in parent_keys - {None}:
+                related_keys[agent_key].add(parent_key)
+                related_keys[parent_key].add(agent_key)
+        if isinstance(stmts1[0], Influence):
+            for agent_key in all_keys_by_role[role_idx]:
+                related_keys[agent_key] |= \
+                    _get_opposite_keys(agent_key, ontology) & \
+                    all_keys_by_role[role_idx]
+        related_keys_by_role[role_idx] = related_keys
+
+    related_ids_cache = {}
+
+    def get_related_ids(role_idx, agent_key):
+        cache_key = (role_idx, agent_key)
+        related_ids = related_ids_cache.get(cache_key)
+        if related_ids is None:
+            related_ids = frozenset().union(
+                *[agent_key_to_ids[role_idx].get(rel, set())
+                  for rel in related_keys_by_role[role_idx][agent_key]])
+            related_ids_cache[cache_key] = related_ids
+        return related_ids
+
+    candidates = []
+    for (agent_keys, exact_key), ids in signature_to_ids.items():
+        related_id_sets = sorted(
+            [get_related_ids(role_idx, agent_key)
+             for role_idx, agent_key in enumerate(agent_keys)] +
+            [exact_key_to_ids.get(exact_key, set())], key=len)
+        related_ids = related_id_sets[0].intersection(*related_id_sets[1:])
+        for idx1 in ids:
+            candidates += [(idx1, idx2) for idx2 in related_ids
+                           if not neutral or idx2 > idx1]
+    candidates.sort()
+    return candidates
+
+
+def _get_opposite_keys(agent_key, ontology):
+    """Return the agent keys connected to an agent key as opposites."""
+    if agent_key is None or agent_key[0] == 'NAME':
+        return set()
+    rels = {'is_opposite'}
+    return set(ontology.descendants_rel(*agent_key, rels)) | \
+        set(ontology.ancestors_rel(*agent_key, rels))
 
 
 def default_refinement_fun(st1, st2, ontology, entities_refined):
@@ -860,6 +1317,78 @@ def default_matches_fun(st):
     return st.matches_key()
 
 
+def _combine_duplicate_group(duplicates):
+    """Return a new Statement with the combined evidence of duplicates.
+
+    The new Statement is a generic copy of the first of the duplicates, and
+    each unique evidence of the duplicates is annotated with the raw text
+    and grounding of the agents and the uuid of the Statement it came from.
+    """
+    # Helper function to get a list of evidence matches keys
+    def _ev_keys(sts):
+        ev_keys = []
+        for stmt in sts:
+            for ev in stmt.evidence:
+                ev_keys.append(ev.matches_key())
+        return ev_keys
+    ev_keys = set()
+    # Get the first statement and add the evidence of all
+    # subsequent Statements to it
+    start_ev_keys = _ev_keys(duplicates)
+    for stmt_ix, stmt in enumerate(duplicates):
+        if stmt_ix == 0:
+            new_stmt = stmt.make_generic_copy()
+        if len(duplicates) == 1:
+            new_stmt.uuid = stmt.uuid
+        raw_text = [None if ag is None else ag.db_refs.get('TEXT')
+                    for ag in stmt.agent_list(deep_sorted=True)]
+        raw_grounding = [None if ag is None else ag.db_refs
+                         for ag in stmt.agent_list(deep_sorted=True)]
+        for ev in stmt.evidence:
+            ev_key = ev.matches_key() + str(raw_text) + \
+                str(raw_grounding)
+            if ev_key not in ev_keys:
+                # In case there are already agents annotations, we
+                # just add a new key for raw_text, otherwise create
+                # a new key
+                if 'agents' in ev.annotations:
+                    ev.annotations['agents']['raw_text'] = raw_text
+                    ev.annotations['agents']['raw_grounding'] = \
+                        raw_grounding
+                else:
+                    ev.annotations['agents'] = \
+                        {'raw_text': raw_text,
+                         'raw_grounding': raw_grounding}
+                if 'prior_uuids' not in ev.annotations:
+                    ev.annotations['prior_uuids'] = []
+                ev.annotations['prior_uuids'].append(stmt.uuid)
+                new_stmt.evidence.append(ev)
+                ev_keys.add(ev_key)
+    end_ev_keys = _ev_keys([new_stmt])
+    if len(end_ev_keys) != len(start_ev_keys):
+        logger.debug('%d redundant evidences eliminated.' %
+                     (len(start_ev_keys) - len(end_ev_keys)))
+    # This should never be None or anything else
+    assert isinstance(new_stmt, Statement)
+    return new_stmt
+
+
+def _freeze_stmts(stmts):
+    """Freeze the statements that aren't frozen yet and return them."""
+    frozen_stmts = []
+    for stmt in stmts:
+        if not stmt.is_frozen:
+            stmt.freeze()
+            frozen_stmts.append(stmt)
+    return frozen_stmts
+
+
+def _unfreeze_stmts(stmts):
+    """Unfreeze the given statements."""
+    for stmt in stmts:
+        stmt.unfreeze()
+
+
 # TODO: we could make the agent key function parameterizable with the
 # preassembler to allow custom agent mappings to the ontology.
 def get_agent_key(agent):
@@ -976,6 +1505,12 @@ def ontology_refinement_filter_by_stmt_type(stmts_by_hash, ontology):
     Importantly, here we assume that all statements in stmts_by_hash
     are of a single type.
 
+    The ontology is queried only once for each distinct agent key, and
+    statements are represented by consecutive integer IDs while candidate
+    sets are constructed. Since statements that have the same agent keys in
+    each role have the same set of possible refinements, candidate sets are
+    only calculated once for each such distinct combination of agent keys.
+
     Parameters
     ----------
     stmts_by_hash : dict
@@ -987,88 +1522,149 @@ def ontology_refinement_filter_by_stmt_type(stmts_by_hash, ontology):
 
     Returns
     -------
-    list of tuple
-        A list of tuples where the first element of each tuple is the
-        hash of a statement which refines that statement whose hash
-        is the second element of the tuple.
+    dict
+        A dict whose keys are statement hashes and values are sets
+        of statement hashes that can potentially be refined by the
+        statement identified by the key.
     """
-    # Step 1. initialize data structures
     roles = stmts_by_hash[next(iter(stmts_by_hash))]._agent_order
-    # Mapping agent keys to statement hashes
-    agent_key_to_hash = {}
-    # Mapping statement hashes to agent keys
-    hash_to_agent_key = {}
-    # All agent keys for a given agent role
-    all_keys_by_role = {}
-    for role in roles:
-        agent_key_to_hash[role] = collections.defaultdict(set)
-        hash_to_agent_key[role] = collections.defaultdict(set)
+    stmt_signatures = [(sh, _get_stmt_signature(stmt, roles))
+                       for sh, stmt in stmts_by_hash.items()]
+    return _get_possible_refinements(roles, stmt_signatures, ontology)
+
+
+def _get_stmt_signature(stmt, roles):
+    """Return the tuple of the agent keys of a statement in each role."""
+    return tuple(_get_role_agent_keys(stmt, role) for role in roles)
+
+
+def _get_possible_refinements(roles, stmt_signatures, ontology):
+    """Return possible refinements among statements of a single type.
+
+    Parameters
+    ----------
+    roles : list[str]
+        The agent roles of the statement type.
+    stmt_signatures : list[tuple]
+        A list of tuples of a statement hash and the signature of the
+        statement, i.e., the set of its agent keys in each role as returned
+        by :py:func:`_get_stmt_signature`.
+    ontology : indra.ontology.IndraOntology
+        An IndraOntology instance with respect to which possible
+        refinements are found.
+
+    Returns
+    -------
+    dict
+        A dict whose keys are statement hashes and values are sets
+        of statement hashes that can potentially be refined by the
+        statement identified by the key.
+    """
+    # Step 1. initialize data structures
+    # We refer to statements by their position in this list
+    stmt_hashes = [sh for sh, _ in stmt_signatures]
+    # Mapping agent keys to statement IDs in each role
+    agent_key_to_ids = {role: collections.defaultdict(set) for role in roles}
+    # Mapping each distinct combination of agent keys across roles to the
+    # IDs of the statements that have that combination
+    signature_to_ids = collections.defaultdict(list)
 
     # Step 2. Fill up the initial data structures in preparation
     # for identifying potential refinements
-    for sh, stmt in stmts_by_hash.items():
-        for role in roles:
-            agents = getattr(stmt, role)
-            # Handle a special case here where a list=like agent
-            # role can be empty, here we will consider anything else
-            # to be a refinement, hence add a None key
-            if isinstance(agents, list) and not agents:
-                agent_keys = {None}
-            # Generally, we take all the agent keys for a single or
-            # list-like agent role.
-            else:
-                agent_keys = {get_agent_key(agent) for agent in
-                              (agents if isinstance(agents, list)
-                               else [agents])}
+    for stmt_id, (_, signature) in enumerate(stmt_signatures):
+        for role, agent_keys in zip(roles, signature):
             for agent_key in agent_keys:
-                agent_key_to_hash[role][agent_key].add(sh)
-                hash_to_agent_key[role][sh].add(agent_key)
-
-    agent_key_to_hash = dict(agent_key_to_hash)
-    hash_to_agent_key = dict(hash_to_agent_key)
+                agent_key_to_ids[role][agent_key].add(stmt_id)
+        signature_to_ids[signature].append(stmt_id)
 
-    for role in roles:
-        all_keys_by_role[role] = set(agent_key_to_hash[role].keys())
+    # Step 3. Find the relevant keys for each distinct agent key in each
+    # role, calling the ontology only once per distinct agent key
+    relevant_keys_by_role = \
+        _get_relevant_keys_by_role({role: set(agent_key_to_ids[role])
+                                    for role in roles}, ontology)
 
-    # Step 3. Identify all the pairs of statements which can be in a
+    # Step 4. Identify all the pairs of statements which can be in a
     # refinement relationship
+    # This is a cache of the IDs of statements in which an agent key
+    # that a given agent key can refine appears in a given role. Since each
+    # agent key only appears in a few statements, these are kept as sparse
+    # frozensets of IDs rather than as dense bitsets over all statements.
+    relevant_ids_cache = {}
+
+    def get_relevant_ids(role, agent_key):
+        cache_key = (role, agent_key)
+        relevant_ids = relevant_ids_cache.get(cache_key)
+        if relevant_ids is None:
+            relevant_ids = frozenset().union(
+                *[agent_key_to_ids[role][rel]
+                  for rel in relevant_keys_by_role[role][agent_key]])
+            relevant_ids_cache[cache_key] = relevant_ids
+        return relevant_ids
+
     stmts_to_compare = {}
-    # We iterate over each statement and find all other statements that it
-    # can potentially refine
-    ts = time.time()
-    for sh, stmt in stmts_by_hash.items():
-        relevants = None
-        # We now iterate over all the agent roles in the given statement
-        # type
-        for role, hash_to_agent_key_for_role in hash_to_agent_key.items():
-            # We get all the agent keys in all other statements that the
-            # agent
-            # in this role in this statement can be a refinement.
-            for agent_key in hash_to_agent_key_for_role[sh]:
-                relevant_keys = get_relevant_keys(
-                    agent_key,
-                    all_keys_by_role[role],
-                    ontology)
-                # We now get the actual statement hashes that these other
-                # potentially refined agent keys appear in in the given role
-                role_relevant_stmt_hashes = set.union(
-                    *[agent_key_to_hash[role][rel]
-                      for rel in relevant_keys]) - {sh}
-                # In the first iteration, we initialize the set with the
-                # relevant statement hashes
-                if relevants is None:
-                    relevants = role_relevant_stmt_hashes
-                # In subsequent iterations, we take the intersection of
-                # the relevant sets per role
-                else:
-                    relevants &= role_relevant_stmt_hashes
-        # These hashes are now the ones that this statement needs
-        # to be compared against. Importantly, the relationship is in
-        # a well-defined direction so we don't need to test both ways.
-        stmts_to_compare[sh] = relevants
+    for signature, stmt_ids in signature_to_ids.items():
+        # We take the intersection of the relevant statement IDs for each
+        # agent key in each role
+        relevant_id_sets = sorted(
+            (get_relevant_ids(role, agent_key)
+             for role, agent_keys in zip(roles, signature)
+             for agent_key in agent_keys), key=len)
+        relevants = relevant_id_sets[0].intersection(*relevant_id_sets[1:])
+        relevant_hashes = {stmt_hashes[rel] for rel in relevants}
+        # These hashes are now the ones that each statement needs
+        # to be compared against, except for itself. Importantly, the
+        # relationship is in a well-defined direction so we don't need to
+        # test both ways.
+        for stmt_id in stmt_ids:
+            sh = stmt_hashes[stmt_id]
+            stmts_to_compare[sh] = relevant_hashes - {sh}
     return stmts_to_compare
 
 
+def _get_role_agent_keys(stmt, role):
+    """Return the set of agent keys of a statement in a given role."""
+    agents = getattr(stmt, role)
+    # Handle a special case here where a list=like agent
+    # role can be empty, here we will consider anything else
+    # to be a refinement, hence add a None key
+    if isinstance(agents, list) and not agents:
+        return frozenset({None})
+    # Generally, we take all the agent keys for a single or
+    # list-like agent role.
+    return frozenset(get_agent_key(agent) for agent in
+                     (agents if isinstance(agents, list) else [agents]))
+
+
+def _get_relevant_keys_by_role(all_keys_by_role, ontology):
+    """Return relevant agent keys for each agent key in each role.
+
+    The ontology parents of each distinct agent key are looked up only once,
+    even if the agent key appears in multiple roles.
+    """
+    parents_by_key = {}
+    # Ontologies backed by a remote service can look up the parents of all
+    # the agent keys in bulk rather than one at a time
+    if hasattr(ontology, 'prefetch_parents'):
+        parents_by_key = {
+            agent_key: set(parents) for agent_key, parents in
+            ontology.prefetch_parents(
+                {agent_key for keys in all_keys_by_role.values()
+                 for agent_key in keys if agent_key is not None}).items()}
+    relevant_keys_by_role = {}
+    for role, all_keys_for_role in all_keys_by_role.items():
+        relevant_keys_by_role[role] = {}
+        for agent_key in all_keys_for_role:
+            if agent_key is not None and agent_key not in parents_by_key:
+                parents_by_key[agent_key] = \
+                    set(ontology.get_parents(*agent_key))
+            relevant_keys = {None, agent_key}
+            if agent_key is not None:
+                relevant_keys |= parents_by_key[agent_key]
+            relevant_keys &= all_keys_for_role
+            relevant_keys_by_role[role][agent_key] = relevant_keys
+    return relevant_keys_by_role
+
+
 def bio_ontology_refinement_filter(stmts_by_hash, stmts_to_compare):
     """An ontology refinement filter that works with the INDRA BioOntology."""
     from indra.ontology.bio import bio_ontology
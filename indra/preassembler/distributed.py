@@ -0,0 +1,385 @@
+"""Hash-partitioned preassembly with a coordinator and worker processes.
+
+The :py:class:`DistributedPreassembler` splits preassembly into tasks that
+only communicate through files in a scratch directory:
+
+1. The coordinator partitions the raw statements by their shallow hash, so
+   that all the duplicates of a statement end up in the same partition.
+2. Each partition is de-duplicated by a worker, which also sets the prior
+   beliefs of the unique statements and writes an index of their agent keys.
+3. The coordinator merges the indexes into a global agent key index and
+   finds the possible refinements among all the unique statements.
+4. The possible refinements are split by statement type and hash range into
+   tasks, which workers confirm on evidence-free copies of the statements.
+5. The coordinator merges the confirmed refinement pairs, links the unique
+   statements and sets their hierarchical beliefs.
+
+Locally, the tasks are run in pools of worker processes. Since the tasks
+only read and write files in the scratch directory, the scratch directory
+can be on a file system that is shared with other machines running the
+tasks. The result is the same as that of
+:py:func:`indra.tools.assemble_corpus.run_preassembly` with the default
+ontology-based refinement filter.
+"""
+__all__ = ['DistributedPreassembler']
+
+import os
+import time
+import pickle
+import logging
+import collections
+import multiprocessing
+from indra.belief import BeliefEngine
+from indra.statements import stmt_type as indra_stmt_type
+from indra.statements.util import make_hash
+from . import Preassembler, default_matches_fun, default_refinement_fun, \
+    _confirm_refinements, _get_compact_stmt, _get_stmt_signature, \
+    _get_possible_refinements
+
+logger = logging.getLogger(__name__)
+
+
+class DistributedPreassembler(object):
+    """Preassemble statements in hash partitions using worker processes.
+
+    Parameters
+    ----------
+    ontology : :py:class:`indra.ontology.IndraOntology`
+        An INDRA Ontology object.
+    scratch_dir : str
+        The path to a directory in which the partitions, indexes and tasks
+        are written. It is created if it doesn't exist, and can be on a
+        file system shared by multiple machines.
+    poolsize : Optional[int]
+        The number of worker processes. By default, the number of CPUs is
+        used.
+    n_partitions : Optional[int]
+        The number of hash partitions the raw statements are split into.
+        By default, four partitions per worker process are used.
+    matches_fun : Optional[function]
+        A functon which takes a Statement object as argument and
+        returns a string key that is used for duplicate recognition. If
+        supplied, it overrides the use of the built-in matches_key method of
+        each Statement being assembled.
+    refinement_fun : Optional[function]
+        A function which takes two Statement objects and an ontology
+        as an argument and returns True or False. If supplied, it overrides
+        the built-in refinement_of method of each Statement being assembled.
+        Since refinements are confirmed on copies of the statements without
+        evidence, the function must not depend on evidence.
+    belief_scorer : Optional[indra.belief.BeliefScorer]
+        Instance of BeliefScorer class to use in calculating Statement
+        probabilities. If None is provided (default), then the default
+        scorer is used.
+    """
+    def __init__(self, ontology, scratch_dir, poolsize=None,
+                 n_partitions=None, matches_fun=None, refinement_fun=None,
+                 belief_scorer=None):
+        self.ontology = ontology
+        self.scratch_dir = scratch_dir
+        self.poolsize = poolsize if poolsize else multiprocessing.cpu_count()
+        self.n_partitions = n_partitions if n_partitions else \
+            4 * self.poolsize
+        self.matches_fun = matches_fun if matches_fun \
+            else default_matches_fun
+        self.refinement_fun = refinement_fun if refinement_fun \
+            else default_refinement_fun
+        self.belief_scorer = belief_scorer
+        os.makedirs(scratch_dir, exist_ok=True)
+
+    def run(self, stmts, return_toplevel=True):
+        """Run deduplication and refinement finding on a list of statements.
+
+        Parameters
+        ----------
+        stmts : iterable[indra.statements.Statement]
+            The raw statements to preassemble. They are serialized into the
+            scratch directory and are therefore not changed.
+        return_toplevel : Optional[bool]
+            If True only the top level statements are returned.
+            If False, all unique statements are returned. Default: True
+
+        Returns
+        -------
+        list[indra.statements.Statement]
+            The preassembled statements, with their supports and
+            supported_by attributes set, and their beliefs calculated.
+        """
+        ts = time.time()
+        self.write_partitions(stmts)
+        self.run_dedup()
+        stmt_keys = self.get_stmt_keys()
+        stmts_to_compare = self.get_possible_refinements(stmt_keys)
+        confirmed = self.run_refinements(stmt_keys, stmts_to_compare)
+        unique_stmts = self.load_unique_stmts(stmt_keys)
+        # We link the statements in the order in which the refinements
+        # appear in stmts_to_compare, as done by the Preassembler
+        stmts_by_hash = {stmt.get_hash(matches_fun=self.matches_fun): stmt
+                         for stmt in unique_stmts}
+        n_refinements = 0
+        for stmt_hash, possible_refined_hashes in stmts_to_compare.items():
+            confirmed_for_stmt = confirmed.get(stmt_hash)
+            if not confirmed_for_stmt:
+                continue
+            for possible_refined_hash in possible_refined_hashes:
+                if possible_refined_hash in confirmed_for_stmt:
+                    stmts_by_hash[stmt_hash].supported_by.append(
+                        stmts_by_hash[possible_refined_hash])
+                    stmts_by_hash[possible_refined_hash].supports.append(
+                        stmts_by_hash[stmt_hash])
+                    n_refinements += 1
+        be = BeliefEngine(scorer=self.belief_scorer,
+                          matches_fun=self.matches_fun)
+        be.set_hierarchy_probs(unique_stmts)
+        logger.info('Preassembled %d unique statements with %d refinements '
+                    'in %.2fs' % (len(unique_stmts), n_refinements,
+                                  time.time() - ts))
+        if return_toplevel:
+            return [stmt for stmt in unique_stmts if not stmt.supports]
+        return unique_stmts
+
+    def write_partitions(self, stmts):
+        """Write the raw statements into partitions by their shallow hash.
+
+        Parameters
+        ----------
+        stmts : iterable[indra.statements.Statement]
+            The raw statements to partition.
+        """
+        partitions = [[] for _ in range(self.n_partitions)]
+        for stmt in stmts:
+            # The hash is computed without caching it on the statement
+            stmt_hash = make_hash(self.matches_fun(stmt), 14)
+            partitions[stmt_hash % self.n_partitions].append(stmt)
+        for idx, partition in enumerate(partitions):
+            _dump(partition, self._path('raw', idx))
+        logger.info('Wrote %d statements into %d partitions' %
+                    (sum(len(part) for part in partitions),
+                     self.n_partitions))
+
+    def run_dedup(self):
+        """De-duplicate each partition of raw statements in a worker."""
+        tasks = [(self.scratch_dir, idx) for idx in range(self.n_partitions)]
+        with multiprocessing.Pool(
+                min(self.poolsize, self.n_partitions),
+                initializer=_init_worker,
+                initargs=(None, self.matches_fun, None,
+                          self.belief_scorer)) as pool:
+            n_unique = sum(pool.imap_unordered(_dedup_partition, tasks))
+        logger.info('Got %d unique statements' % n_unique)
+
+    def get_stmt_keys(self):
+        """Return the index entries of all the unique statements.
+
+        Returns
+        -------
+        list[tuple]
+            A tuple for each unique statement with its matches key, hash,
+            type and the agent keys in each of its roles, in the order of
+            the matches keys.
+        """
+        stmt_keys = []
+        for idx in range(self.n_partitions):
+            stmt_keys += _load(self._path('index', idx))
+        # This is the order in which the Preassembler returns the unique
+        # statements
+        stmt_keys.sort(key=lambda entry: entry[0])
+        return stmt_keys
+
+    def get_possible_refinements(self, stmt_keys):
+        """Return possible refinements using a global agent key index.
+
+        Parameters
+        ----------
+        stmt_keys : list[tuple]
+            The index entries of the unique statements as returned by
+            :py:meth:`get_stmt_keys`.
+
+        Returns
+        -------
+        dict
+            A dict whose keys are statement hashes and values are sets
+            of statement hashes that can potentially be refined by the
+            statement identified by the key.
+        """
+        ts = time.time()
+        hashes_by_type = collections.defaultdict(set)
+        signatures = {}
+        for _, stmt_hash, stmt_type, signature in stmt_keys:
+            hashes_by_type[stmt_type].add(stmt_hash)
+            signatures[stmt_hash] = signature
+        stmts_to_compare = {}
+        for stmt_type, stmt_hashes in hashes_by_type.items():
+            logger.info('Finding ontology-based refinements for %d %s '
+                        'statements' % (len(stmt_hashes), stmt_type.__name__))
+            stmts_to_compare.update(
+                _get_possible_refinements(
+                    stmt_type._agent_order,
+                    [(sh, signatures[sh]) for sh in stmt_hashes],
+                    self.ontology))
+        logger.info('Found %d possible refinements in %.2fs' %
+                    (sum(len(v) for v in stmts_to_compare.values()),
+                     time.time() - ts))
+        return stmts_to_compare
+
+    def run_refinements(self, stmt_keys, stmts_to_compare):
+        """Confirm possible refinements in tasks run by workers.
+
+        Parameters
+        ----------
+        stmt_keys : list[tuple]
+            The index entries of the unique statements as returned by
+            :py:meth:`get_stmt_keys`.
+        stmts_to_compare : dict
+            A dict whose keys are statement hashes and values are sets
+            of statement hashes that can potentially be refined by the
+            statement identified by the key.
+
+        Returns
+        -------
+        dict
+            A dict whose keys are statement hashes and values are sets of
+            the hashes of the statements they were confirmed to refine.
+        """
+        n_tasks = self._write_refinement_tasks(stmt_keys, stmts_to_compare)
+        confirmed = {}
+        if not n_tasks:
+            return confirmed
+        tasks = [(self.scratch_dir, self.n_partitions, idx)
+                 for idx in range(n_tasks)]
+        # The pool is created once the ontology has been used to find
+        # possible refinements so that forked workers inherit it initialized
+        with multiprocessing.Pool(
+                min(self.poolsize, n_tasks), initializer=_init_worker,
+                initargs=(self.ontology, self.matches_fun,
+                          self.refinement_fun, None)) as pool:
+            for task_confirmed in pool.imap_unordered(_confirm_task, tasks):
+                confirmed.update(task_confirmed)
+        return confirmed
+
+    def load_unique_stmts(self, stmt_keys):
+        """Return the unique statements of all partitions.
+
+        Parameters
+        ----------
+        stmt_keys : list[tuple]
+            The index entries of the unique statements as returned by
+            :py:meth:`get_stmt_keys`.
+
+        Returns
+        -------
+        list[indra.statements.Statement]
+            The unique statements in the order of the index entries.
+        """
+        stmts_by_hash = {}
+        for idx in range(self.n_partitions):
+            for stmt in _load(self._path('unique', idx)):
+                stmts_by_hash[stmt.get_hash(matches_fun=self.matches_fun)] = \
+                    stmt
+        return [stmts_by_hash[stmt_hash] for _, stmt_hash, _, _ in stmt_keys]
+
+    def _write_refinement_tasks(self, stmt_keys, stmts_to_compare):
+        """Split possible refinements into tasks by type and hash range."""
+        hashes_by_type = collections.defaultdict(list)
+        types = {stmt_hash: stmt_type for _, stmt_hash, stmt_type, _
+                 in stmt_keys}
+        for stmt_hash, possible_refined_hashes in stmts_to_compare.items():
+            if possible_refined_hashes:
+                hashes_by_type[types[stmt_hash]].append(stmt_hash)
+        total_comparisons = sum(len(v) for v in stmts_to_compare.values())
+        # We aim for a few tasks per worker to balance load
+        target_size = total_comparisons // (4 * self.poolsize) + 1
+        n_tasks = 0
+        task = {}
+        task_size = 0
+        for stmt_type in sorted(hashes_by_type, key=lambda t: t.__name__):
+            for stmt_hash in sorted(hashes_by_type[stmt_type]):
+                task[stmt_hash] = list(stmts_to_compare[stmt_hash])
+                task_size += len(task[stmt_hash])
+                if task_size >= target_size:
+                    _dump(task, self._path('refine', n_tasks))
+                    n_tasks += 1
+                    task = {}
+                    task_size = 0
+            if task:
+                _dump(task, self._path('refine', n_tasks))
+                n_tasks += 1
+                task = {}
+                task_size = 0
+        logger.info('Wrote %d possible refinements into %d tasks' %
+                    (total_comparisons, n_tasks))
+        return n_tasks
+
+    def _path(self, kind, idx):
+        return _get_path(self.scratch_dir, kind, idx)
+
+
+def _get_path(scratch_dir, kind, idx):
+    return os.path.join(scratch_dir, '%s_%d.pkl' % (kind, idx))
+
+
+def _dump(obj, fname):
+    with open(fname, 'wb') as fh:
+        pickle.dump(obj, fh, protocol=4)
+
+
+def _load(fname):
+    with open(fname, 'rb') as fh:
+        return pickle.load(fh)
+
+
+_worker_state = {}
+
+
+def _init_worker(ontology, matches_fun, refinement_fun, belief_scorer):
+    _worker_state['ontology'] = ontology
+    _worker_state['matches_fun'] = matches_fun
+    _worker_state['refinement_fun'] = refinement_fun
+    _worker_state['belief_scorer'] = belief_scorer
+
+
+def _dedup_partition(task):
+    """De-duplicate a partition and write its unique statements and index.
+    """
+    scratch_dir, idx = task
+    matches_fun = _worker_state['matches_fun']
+    # The statements are loaded from the partition file so they don't need
+    # to be copied
+    pa = Preassembler(None, _load(_get_path(scratch_dir, 'raw', idx)),
+                      matches_fun=matches_fun, copy_stmts=False)
+    unique_stmts = pa.combine_duplicates()
+    be = BeliefEngine(scorer=_worker_state['belief_scorer'],
+                      matches_fun=matches_fun)
+    be.set_prior_probs(unique_stmts)
+    index = []
+    compact_stmts = {}
+    for stmt in unique_stmts:
+        stmt_hash = stmt.get_hash(matches_fun=matches_fun)
+        stmt_type = indra_stmt_type(stmt)
+        index.append((matches_fun(stmt), stmt_hash, stmt_type,
+                      _get_stmt_signature(stmt, stmt._agent_order)))
+        compact_stmts[stmt_hash] = _get_compact_stmt(stmt)
+    _dump(unique_stmts, _get_path(scratch_dir, 'unique', idx))
+    _dump(index, _get_path(scratch_dir, 'index', idx))
+    _dump(compact_stmts, _get_path(scratch_dir, 'compact', idx))
+    return len(unique_stmts)
+
+
+def _confirm_task(task):
+    """Confirm the possible refinements of a task."""
+    scratch_dir, n_partitions, idx = task
+    stmts_to_compare = _load(_get_path(scratch_dir, 'refine', idx))
+    stmt_hashes = set(stmts_to_compare)
+    for possible_refined_hashes in stmts_to_compare.values():
+        stmt_hashes |= set(possible_refined_hashes)
+    # Only the partitions with statements in this task are loaded
+    stmts_by_hash = {}
+    for partition in sorted({sh % n_partitions for sh in stmt_hashes}):
+        compact_stmts = _load(_get_path(scratch_dir, 'compact', partition))
+        stmts_by_hash.update({sh: compact_stmts[sh] for sh in stmt_hashes
+                              if sh in compact_stmts})
+    confirmed, _ = _confirm_refinements(stmts_by_hash, stmts_to_compare,
+                                        None,
+                                        _worker_state['refinement_fun'],
+                                        _worker_state['ontology'])
+    return confirmed
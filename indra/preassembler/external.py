@@ -0,0 +1,207 @@
+"""Out-of-core combination of duplicate statements.
+
+:py:meth:`indra.preassembler.Preassembler.combine_duplicate_stmts` holds all
+the statements to be de-duplicated in memory and sorts them by their matches
+keys. The functions in this module instead stream statements from shard
+files, spill sorted runs of (shallow hash, pickled statement) records to
+temporary files on disk and merge the runs, so that only one run and one
+group of duplicates have to be in memory at a time. The unique statements,
+with their evidence combined in the same way as by
+:py:meth:`indra.preassembler.Preassembler.combine_duplicate_stmts`, are
+yielded one at a time and can be written out with
+:py:func:`indra.statements.io.write_stmts_jsonl`.
+
+Example
+-------
+>>> from indra.statements.io import write_stmts_jsonl
+>>> stmts = iter_stmts_from_shards(['part1.jsonl.gz', 'part2.pkl']) \
+... # doctest: +SKIP
+>>> write_stmts_jsonl(iter_combined_duplicates(stmts), 'unique.jsonl.gz') \
+... # doctest: +SKIP
+"""
+__all__ = ['iter_stmts_from_shards', 'iter_combined_duplicates',
+           'combine_duplicates_from_shards']
+
+import os
+import heapq
+import pickle
+import shutil
+import logging
+import itertools
+import tempfile
+from indra.statements.io import iter_stmts_from_jsonl, write_stmts_jsonl, \
+    StatementBinaryReader
+from . import default_matches_fun, _combine_duplicate_group
+
+logger = logging.getLogger(__name__)
+
+
+def iter_stmts_from_shards(fnames):
+    """Iterate over the statements in a list of shard files.
+
+    Shards can be pickle files (.pkl) containing a list of statements,
+    JSONL files (.jsonl or .jsonl.gz), which are read one statement at a
+    time, and binary files (.bin) written by
+    :py:func:`indra.statements.io.write_stmts_binary`, which are read one
+    chunk at a time. Since the shards are read independently, the supports
+    and supported_by lists of the statements are not resolved.
+
+    Parameters
+    ----------
+    fnames : list[str]
+        The paths to the shard files.
+
+    Yields
+    ------
+    indra.statements.Statement
+        The statements in the shards, in order.
+    """
+    for fname in fnames:
+        logger.info('Reading statements from %s' % fname)
+        if fname.endswith('.pkl'):
+            with open(fname, 'rb') as fh:
+                stmts = pickle.load(fh)
+            yield from stmts
+            del stmts
+        elif fname.endswith(('.jsonl', '.jsonl.gz')):
+            yield from iter_stmts_from_jsonl(fname, index_supports=False)
+        elif fname.endswith('.bin'):
+            with StatementBinaryReader(fname) as reader:
+                yield from reader.iter_statements()
+        else:
+            raise ValueError('Unknown shard file format: %s' % fname)
+
+
+def iter_combined_duplicates(stmts, tmp_dir=None, run_size=100000,
+                             matches_fun=None):
+    """Combine duplicate statements from a stream using external memory.
+
+    Statements are read from the input in runs of `run_size`. Each run is
+    sorted by the shallow hash of its statements and written to a temporary
+    file, after which the runs are merged and each group of statements with
+    the same hash, and the same matches key in case of hash collisions, is
+    combined into a single statement. If the input fits into a single run,
+    nothing is written to disk.
+
+    Parameters
+    ----------
+    stmts : iterable[indra.statements.Statement]
+        The statements to de-duplicate, for instance, as returned by
+        :py:func:`iter_stmts_from_shards`.
+    tmp_dir : Optional[str]
+        The directory in which the temporary run files are created. By
+        default, the system's temporary directory is used.
+    run_size : Optional[int]
+        The number of statements held in memory while building each sorted
+        run. Default: 100000
+    matches_fun : Optional[function]
+        A function which takes a Statement object as argument and returns a
+        string key that is used for duplicate recognition. By default, the
+        matches_key method of each Statement is used.
+
+    Yields
+    ------
+    indra.statements.Statement
+        The unique statements with accumulated evidence across duplicates,
+        in the order of their shallow hashes. Within a group of duplicates,
+        evidence is combined in the order of the input.
+    """
+    matches_fun = matches_fun if matches_fun else default_matches_fun
+    run_dir = tempfile.mkdtemp(prefix='indra_dedup_', dir=tmp_dir)
+    try:
+        run_fnames = []
+        run = []
+        for idx, stmt in enumerate(stmts):
+            # The index of each statement in the input is part of its record
+            # so that duplicates are merged in input order
+            # Hashes are refreshed in case a cached one was made with a
+            # different matches function
+            stmt_hash = stmt.get_hash(shallow=True, refresh=True,
+                                      matches_fun=matches_fun)
+            run.append((stmt_hash, idx, pickle.dumps(stmt, protocol=4)))
+            if len(run) == run_size:
+                run_fnames.append(_write_run(run, run_dir, len(run_fnames)))
+                run = []
+        if run_fnames:
+            if run:
+                run_fnames.append(_write_run(run, run_dir, len(run_fnames)))
+            del run
+            logger.info('Merging %d sorted runs' % len(run_fnames))
+            records = heapq.merge(*[_read_run(fname)
+                                    for fname in run_fnames])
+        else:
+            run.sort()
+            records = iter(run)
+        n_unique = 0
+        for _, group in itertools.groupby(records, key=lambda rec: rec[0]):
+            # Statements with the same hash are split by their matches key
+            # in case the hash collides
+            by_key = {}
+            for _, _, stmt_bytes in group:
+                stmt = pickle.loads(stmt_bytes)
+                by_key.setdefault(matches_fun(stmt), []).append(stmt)
+            for duplicates in by_key.values():
+                new_stmt = _combine_duplicate_group(duplicates)
+                for shallow in (True, False):
+                    new_stmt.get_hash(shallow=shallow, refresh=True,
+                                      matches_fun=matches_fun)
+                n_unique += 1
+                yield new_stmt
+        logger.info('Got %d unique statements' % n_unique)
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def combine_duplicates_from_shards(fnames, out_fname, tmp_dir=None,
+                                   run_size=100000, matches_fun=None):
+    """Combine duplicate statements from shard files into a JSONL file.
+
+    Parameters
+    ----------
+    fnames : list[str]
+        The paths to the shard files, see :py:func:`iter_stmts_from_shards`
+        for the supported formats.
+    out_fname : str
+        The path to the JSONL file the unique statements are written into.
+        Files whose name ends with .gz are written with gzip compression.
+    tmp_dir : Optional[str]
+        The directory in which the temporary run files are created. By
+        default, the system's temporary directory is used.
+    run_size : Optional[int]
+        The number of statements held in memory while building each sorted
+        run. Default: 100000
+    matches_fun : Optional[function]
+        A function which takes a Statement object as argument and returns a
+        string key that is used for duplicate recognition. By default, the
+        matches_key method of each Statement is used.
+
+    Returns
+    -------
+    int
+        The number of unique statements written.
+    """
+    stmts = iter_combined_duplicates(iter_stmts_from_shards(fnames),
+                                     tmp_dir=tmp_dir, run_size=run_size,
+                                     matches_fun=matches_fun)
+    return write_stmts_jsonl(stmts, out_fname, matches_fun=matches_fun)
+
+
+def _write_run(run, run_dir, run_idx):
+    """Sort a run of records and write it into a file in a directory."""
+    run.sort()
+    fname = os.path.join(run_dir, 'run_%d.pkl' % run_idx)
+    logger.debug('Writing a run of %d statements to %s' % (len(run), fname))
+    with open(fname, 'wb') as fh:
+        for record in run:
+            pickle.dump(record, fh, protocol=4)
+    return fname
+
+
+def _read_run(fname):
+    """Iterate over the records in a run file."""
+    with open(fname, 'rb') as fh:
+        while True:
+            try:
+                yield pickle.load(fh)
+            except EOFError:
+                return
@@ -1,8 +1,10 @@
+import os
+import pickle
 import logging
 from indra.ontology.standardize \
     import standardize_agent_name
 
-from .gilda import ground_agent
+from .gilda import get_grounding, get_groundings, _set_agent_grounding
 
 logger = logging.getLogger(__name__)
 
@@ -24,8 +26,24 @@ class DisambManager(object):
 
     Has methods to run disambiguation with either adeft or gilda. Each instance
     of this class uses a single database connection.
+
+    Disambiguation can be run in two phases on a large number of Statements.
+    First, the texts used for disambiguation are fetched in bulk with
+    :py:meth:`prefetch_texts`, then each model is run once on all the texts
+    it has to disambiguate with :py:meth:`run_adeft_models` and
+    :py:meth:`run_gilda_models`. The texts and predictions are cached, and
+    used by :py:meth:`run_adeft_disambiguation` and
+    :py:meth:`run_gilda_disambiguation` when the Statements are
+    disambiguated one at a time.
+
+    Parameters
+    ----------
+    text_cache_path : Optional[str]
+        The path to a pickle file in which the texts fetched for
+        disambiguation are cached across runs. If not given, the texts are
+        only cached in memory.
     """
-    def __init__(self):
+    def __init__(self, text_cache_path=None):
         try:
             from indra_db.util.content_scripts import TextContentSessionHandler
             self.__tc = TextContentSessionHandler()
@@ -34,6 +52,129 @@ class DisambManager(object):
                         'retrieval for grounding disambiguation.')
             logger.debug('Could not connect to the DB: %s' % e)
             self.__tc = None
+        self.text_cache_path = text_cache_path
+        # Abstracts keyed by PMID and texts extracted from the DB keyed by
+        # text refs and agent text, None if no text was found
+        self._abstracts = {}
+        self._db_texts = {}
+        if text_cache_path and os.path.exists(text_cache_path):
+            with open(text_cache_path, 'rb') as fh:
+                text_cache = pickle.load(fh)
+            self._abstracts = text_cache['abstracts']
+            self._db_texts = text_cache['db_texts']
+        # Model predictions keyed by agent text and grounding text
+        self._adeft_predictions = {}
+        self._gilda_predictions = {}
+
+    def prefetch_texts(self, stmt_agent_txts):
+        """Fetch the texts for disambiguating Agents in bulk.
+
+        Texts are fetched once for each paper, and abstracts from PubMed are
+        fetched in batches. The texts are cached and, if a text cache path
+        was given, written to disk.
+
+        Parameters
+        ----------
+        stmt_agent_txts : list[tuple]
+            A list of (Statement, agent text) tuples, one for each Agent that
+            is to be disambiguated.
+        """
+        from indra.literature import pubmed_client
+        pmids = set()
+        db_contents = {}
+        for stmt, agent_txt in stmt_agent_txts:
+            if not stmt.evidence:
+                continue
+            ev = stmt.evidence[0]
+            if self.__tc is not None:
+                refs_key = _get_text_refs_key(ev)
+                if (refs_key, agent_txt) in self._db_texts:
+                    if self._db_texts[(refs_key, agent_txt)]:
+                        continue
+                else:
+                    self._db_texts[(refs_key, agent_txt)] = \
+                        self._get_db_text(dict(refs_key), agent_txt,
+                                          db_contents)
+                    if self._db_texts[(refs_key, agent_txt)]:
+                        continue
+            if ev.pmid and ev.pmid not in self._abstracts:
+                pmids.add(ev.pmid)
+        pmids = sorted(pmids)
+        logger.info('Fetching %d abstracts for disambiguation' % len(pmids))
+        # PubMed allows getting the metadata of up to 200 PMIDs at a time
+        for idx in range(0, len(pmids), 200):
+            pmid_batch = pmids[idx:idx + 200]
+            metadata = pubmed_client.get_metadata_for_ids(
+                pmid_batch, get_abstracts=True, prepend_title=True)
+            # If the request failed, or returned no entry for a PMID, the
+            # abstracts are fetched one at a time later
+            if metadata is None:
+                continue
+            for pmid in pmid_batch:
+                if pmid in metadata:
+                    self._abstracts[pmid] = metadata[pmid]['abstract']
+        if self.text_cache_path:
+            with open(self.text_cache_path, 'wb') as fh:
+                pickle.dump({'abstracts': self._abstracts,
+                             'db_texts': self._db_texts}, fh)
+
+    def run_adeft_models(self, stmt_agent_txts):
+        """Run each Adeft model once on all the texts it has to disambiguate.
+
+        Parameters
+        ----------
+        stmt_agent_txts : list[tuple]
+            A list of (Statement, agent text) tuples, one for each Agent that
+            is to be disambiguated with Adeft.
+        """
+        texts_by_agent_txt = \
+            self._get_grounding_texts_by_agent_txt(stmt_agent_txts,
+                                                   self._adeft_predictions)
+        for agent_txt, grounding_texts in texts_by_agent_txt.items():
+            grounding_texts = sorted(grounding_texts)
+            logger.info('Disambiguating %d texts for %s with Adeft' %
+                        (len(grounding_texts), agent_txt))
+            results = adeft_disambiguators[agent_txt].disambiguate(
+                grounding_texts)
+            for grounding_text, res in zip(grounding_texts, results):
+                self._adeft_predictions[(agent_txt, grounding_text)] = res
+
+    def run_gilda_models(self, stmt_agent_txts, mode='web'):
+        """Ground each agent text once for each text it appears in with Gilda.
+
+        Parameters
+        ----------
+        stmt_agent_txts : list[tuple]
+            A list of (Statement, agent text) tuples, one for each Agent that
+            is to be disambiguated with Gilda.
+        mode : Optional[str]
+            If 'web', the web service given in the GILDA_URL config setting or
+            environmental variable is used. Otherwise, the gilda package is
+            attempted to be imported and used. Default: web
+        """
+        texts_by_agent_txt = \
+            self._get_grounding_texts_by_agent_txt(stmt_agent_txts,
+                                                   self._gilda_predictions)
+        txt_contexts = [(agent_txt, grounding_text)
+                        for agent_txt, grounding_texts
+                        in sorted(texts_by_agent_txt.items())
+                        for grounding_text in sorted(grounding_texts)]
+        for txt_context, prediction in \
+                zip(txt_contexts, get_groundings(txt_contexts, mode=mode)):
+            self._gilda_predictions[txt_context] = prediction
+
+    def _get_grounding_texts_by_agent_txt(self, stmt_agent_txts, predictions):
+        """Return the texts without predictions grouped by agent text."""
+        texts_by_agent_txt = {}
+        for stmt, agent_txt in stmt_agent_txts:
+            if not stmt.evidence:
+                continue
+            grounding_text = self._get_text_for_grounding(stmt, agent_txt)
+            if grounding_text and \
+                    (agent_txt, grounding_text) not in predictions:
+                texts_by_agent_txt.setdefault(agent_txt, set()).add(
+                    grounding_text)
+        return texts_by_agent_txt
 
     def run_adeft_disambiguation(self, stmt, agent, idx, agent_txt):
         """Run Adeft disambiguation on an Agent in a given Statement.
@@ -101,8 +242,10 @@ class DisambManager(object):
 
         if grounding_text:
             da = adeft_disambiguators[agent_txt]
-            res = da.disambiguate([grounding_text])
-            ns_and_id, standard_name, disamb_scores = res[0]
+            res = self._adeft_predictions.get((agent_txt, grounding_text))
+            if res is None:
+                res = da.disambiguate([grounding_text])[0]
+            ns_and_id, standard_name, disamb_scores = res
             # If grounding with highest score is not a positive label we
             # explicitly remove grounding and reset the (potentially incorrectly
             # standardized) name to the original text value.
@@ -194,7 +337,12 @@ class DisambManager(object):
             annots['agents'] = {'gilda': [None for _ in stmt.agent_list()]}
         grounding_text = self._get_text_for_grounding(stmt, agent_txt)
         if grounding_text:
-            gilda_result = ground_agent(agent, agent_txt, grounding_text, mode)
+            prediction = self._gilda_predictions.get((agent_txt,
+                                                      grounding_text))
+            if prediction is None:
+                prediction = get_grounding(agent_txt, grounding_text, mode)
+            gr, gilda_result = prediction
+            _set_agent_grounding(agent, agent_txt, gr)
             if gilda_result:
                 logger.debug('Disambiguated %s to: %s' %
                              (agent_txt, agent.name))
@@ -227,31 +375,30 @@ class DisambManager(object):
         text = None
         # First we will try to get content from the DB
         if self.__tc is not None:
-            try:
-                from indra.literature.adeft_tools import universal_extract_text
+            refs_key = _get_text_refs_key(stmt.evidence[0])
+            if (refs_key, agent_text) in self._db_texts:
+                text = self._db_texts[(refs_key, agent_text)]
+            else:
                 refs = stmt.evidence[0].text_refs
                 # Prioritize the pmid attribute if given
                 if stmt.evidence[0].pmid:
                     refs['PMID'] = stmt.evidence[0].pmid
-                logger.debug('Obtaining text for disambiguation with refs: %s'
-                             % refs)
-                content = self.__tc.get_text_content_from_text_refs(refs)
-                if not content:
-                    raise ValueError('Text obtained from DB is empty')
-                text = universal_extract_text(content, contains=agent_text)
-                if text:
-                    return text
-            except Exception as e:
-                logger.info('Could not get text for disambiguation from DB: %s'
-                            % e)
+                text = self._get_db_text(refs, agent_text, {})
+                self._db_texts[(refs_key, agent_text)] = text
+            if text:
+                return text
         # If that doesn't work, we try PubMed next
         if text is None:
             from indra.literature import pubmed_client
             pmid = stmt.evidence[0].pmid
             if pmid:
-                logger.debug('Obtaining abstract for disambiguation for PMID%s'
-                             % pmid)
-                text = pubmed_client.get_abstract(pmid)
+                if pmid in self._abstracts:
+                    text = self._abstracts[pmid]
+                else:
+                    logger.debug('Obtaining abstract for disambiguation for '
+                                 'PMID%s' % pmid)
+                    text = pubmed_client.get_abstract(pmid)
+                    self._abstracts[pmid] = text
                 if text:
                     return text
         # Finally, falling back on the evidence sentence
@@ -260,3 +407,40 @@ class DisambManager(object):
             text = stmt.evidence[0].text
             return text
         return None
+
+    def _get_db_text(self, refs, agent_text, db_contents):
+        """Return the text for an agent text from the DB content for refs.
+
+        The content fetched from the DB is stored in db_contents so that
+        each content is only fetched once for different agent texts. None
+        is returned if no content or text could be obtained.
+        """
+        refs_key = tuple(sorted(refs.items()))
+        try:
+            from indra.literature.adeft_tools import universal_extract_text
+            if refs_key in db_contents:
+                content = db_contents[refs_key]
+            else:
+                logger.debug('Obtaining text for disambiguation with refs: %s'
+                             % refs)
+                content = self.__tc.get_text_content_from_text_refs(refs)
+                db_contents[refs_key] = content
+            if not content:
+                raise ValueError('Text obtained from DB is empty')
+            return universal_extract_text(content, contains=agent_text)
+        except Exception as e:
+            logger.info('Could not get text for disambiguation from DB: %s'
+                        % e)
+            return None
+
+
+def _get_text_refs_key(ev):
+    """Return a hashable key for the text refs of an Evidence.
+
+    The pmid attribute of the Evidence takes priority over the PMID in its
+    text refs.
+    """
+    refs = dict(ev.text_refs)
+    if ev.pmid:
+        refs['PMID'] = ev.pmid
+    return tuple(sorted(refs.items()))
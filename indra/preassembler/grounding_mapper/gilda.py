@@ -1,8 +1,18 @@
 """This module implements a client to the Gilda grounding web service,
-and contains functions to help apply it during the course of INDRA assembly."""
+and contains functions to help apply it during the course of INDRA assembly.
+
+Groundings are memoized in a least recently used cache keyed by text, context
+and mode, which can be saved to and loaded from a file with
+:py:func:`dump_grounding_cache` and :py:func:`load_grounding_cache`. Requests
+to the web service reuse a keep-alive connection in each thread."""
+import os
+import pickle
 import logging
+import threading
 import requests
 from copy import deepcopy
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin
 from indra.ontology.standardize \
     import standardize_agent_name
@@ -15,6 +25,12 @@ logger = logging.getLogger(__name__)
 grounding_service_url = get_config('GILDA_URL', failure_ok=True) \
     if has_config('GILDA_URL') else 'http://grounding.indra.bio/'
 
+# The maximum number of groundings kept in the cache
+grounding_cache_size = 100000
+_grounding_cache = OrderedDict()
+# Each thread has its own requests Session
+_sessions = threading.local()
+
 
 def get_grounding(txt, context=None, mode='web'):
     """Return the top Gilda grounding for a given text.
@@ -38,10 +54,108 @@ def get_grounding(txt, context=None, mode='web'):
     list
         The list of ScoredMatches
     """
+    key = (txt, context, mode)
+    if key in _grounding_cache:
+        _grounding_cache.move_to_end(key)
+        grounding, results = _grounding_cache[key]
+    else:
+        grounding, results = _get_grounding(txt, context, mode)
+        _cache_grounding(key, grounding, results)
+    # Copies are returned so that the cached groundings are not changed
+    return dict(grounding), deepcopy(results)
+
+
+def get_groundings(txt_contexts, mode='web', n_threads=4):
+    """Return the top Gilda groundings for a list of texts and contexts.
+
+    Each unique (text, context) pair that is not cached is grounded once. In
+    web mode, requests are sent from a pool of threads, each of which reuses
+    its connection to the web service.
+
+    Parameters
+    ----------
+    txt_contexts : list[tuple]
+        A list of (text, context) tuples to ground, where the context can be
+        None.
+    mode : Optional[str]
+        If 'web', the web service given in the GILDA_URL config setting or
+        environmental variable is used. Otherwise, the gilda package is
+        attempted to be imported and used. Default: web
+    n_threads : Optional[int]
+        The number of threads from which requests are sent to the web
+        service. Default: 4
+
+    Returns
+    -------
+    list[tuple]
+        A list of (grounding, results) tuples as returned by
+        :py:func:`get_grounding`, one for each (text, context) tuple.
+    """
+    keys = [(txt, context, mode) for txt, context in txt_contexts]
+    # The cached groundings are taken before any new ones are cached, since
+    # caching new groundings can evict them
+    cached_groundings = {}
+    for key in keys:
+        if key not in cached_groundings and key in _grounding_cache:
+            cached_groundings[key] = _grounding_cache[key]
+            _grounding_cache.move_to_end(key)
+    new_keys = list(OrderedDict.fromkeys(key for key in keys
+                                         if key not in cached_groundings))
+    logger.info('Grounding %d unique texts with Gilda' % len(new_keys))
+    if mode == 'web' and n_threads and n_threads > 1 and len(new_keys) > 1:
+        with ThreadPoolExecutor(n_threads) as executor:
+            new_groundings = list(executor.map(
+                lambda key: _get_grounding(*key), new_keys))
+    else:
+        new_groundings = [_get_grounding(*key) for key in new_keys]
+    new_groundings = dict(zip(new_keys, new_groundings))
+    for key, (grounding, results) in new_groundings.items():
+        _cache_grounding(key, grounding, results)
+    cached_groundings.update(new_groundings)
+    groundings = []
+    for key in keys:
+        grounding, results = cached_groundings[key]
+        groundings.append((dict(grounding), deepcopy(results)))
+    return groundings
+
+
+def load_grounding_cache(fname):
+    """Add the groundings in a file written by dump_grounding_cache to the
+    cache.
+
+    Parameters
+    ----------
+    fname : str
+        The path to the pickle file with the groundings.
+    """
+    with open(fname, 'rb') as fh:
+        groundings = pickle.load(fh)
+    for key, (grounding, results) in groundings.items():
+        _cache_grounding(key, grounding, results)
+
+
+def dump_grounding_cache(fname):
+    """Write the groundings in the cache into a file.
+
+    Parameters
+    ----------
+    fname : str
+        The path to the pickle file the groundings are written into.
+    """
+    with open(fname, 'wb') as fh:
+        pickle.dump(dict(_grounding_cache), fh)
+
+
+def clear_grounding_cache():
+    """Remove all groundings from the cache."""
+    _grounding_cache.clear()
+
+
+def _get_grounding(txt, context, mode):
     grounding = {}
     if mode == 'web':
-        resp = requests.post(urljoin(grounding_service_url, 'ground'),
-                             json={'text': txt, 'context': context})
+        resp = _get_session().post(urljoin(grounding_service_url, 'ground'),
+                                   json={'text': txt, 'context': context})
         results = resp.json()
         if results:
             grounding = {results[0]['term']['db']: results[0]['term']['id']}
@@ -54,6 +168,19 @@ def get_grounding(txt, context=None, mode='web'):
     return grounding, results
 
 
+def _cache_grounding(key, grounding, results):
+    _grounding_cache[key] = (grounding, results)
+    _grounding_cache.move_to_end(key)
+    while len(_grounding_cache) > grounding_cache_size:
+        _grounding_cache.popitem(last=False)
+
+
+def _get_session():
+    if not hasattr(_sessions, 'session'):
+        _sessions.session = requests.Session()
+    return _sessions.session
+
+
 def get_gilda_models(mode='web'):
     """Return a list of strings for which Gilda has a disambiguation model.
 
@@ -98,12 +225,17 @@ def ground_agent(agent, txt, context=None, mode='web'):
         attempted to be imported and used. Default: web
     """
     gr, results = get_grounding(txt, context, mode)
+    _set_agent_grounding(agent, txt, gr)
+    return results
+
+
+def _set_agent_grounding(agent, txt, gr):
+    """Set the grounding of an Agent to a grounding returned by Gilda."""
     if gr:
         db_refs = {'TEXT': txt}
         db_refs.update(gr)
         agent.db_refs = db_refs
         standardize_agent_name(agent, standardize_refs=True)
-    return results
 
 
 def ground_statement(stmt, mode='web', ungrounded_only=False):
@@ -136,10 +268,14 @@ def ground_statement(stmt, mode='web', ungrounded_only=False):
 
 
 @register_pipeline
-def ground_statements(stmts, mode='web', sources=None, ungrounded_only=False):
+def ground_statements(stmts, mode='web', sources=None, ungrounded_only=False,
+                      n_threads=4, cache_path=None):
     """Set grounding for Agents in a list of Statements using Gilda.
 
-    This function modifies the original Statements/Agents in place.
+    The texts and contexts of all the Agents to be grounded are collected
+    first, and each unique (text, context) pair is grounded once, see
+    :py:func:`get_groundings`. Only the Statements whose Agents get a new
+    grounding are copied and changed, other Statements are returned as is.
 
     Parameters
     ----------
@@ -157,16 +293,54 @@ def ground_statements(stmts, mode='web', sources=None, ungrounded_only=False):
     ungrounded_only : Optional[str]
         If True, only ungrounded Agents will be grounded, and ones that
         are already grounded will not be modified. Default: False
+    n_threads : Optional[int]
+        The number of threads from which requests are sent to the web
+        service. Default: 4
+    cache_path : Optional[str]
+        The path to a pickle file of groundings, see
+        :py:func:`dump_grounding_cache`. If given, the groundings in the file,
+        if it exists, are used, and all groundings are written into it
+        afterwards.
 
     Returns
     -------
     list[indra.statement.Statements]
-        The list of Statements that were changed in place by reference.
+        The list of grounded Statements.
     """
+    if cache_path and os.path.exists(cache_path):
+        load_grounding_cache(cache_path)
     source_filter = set(sources) if sources else set()
-    grounded_stmts = deepcopy(stmts)
-    for stmt in grounded_stmts:
-        if not source_filter or (stmt.evidence and stmt.evidence[0].source_api
-                                 in source_filter):
-            ground_statement(stmt, mode=mode, ungrounded_only=ungrounded_only)
+    # The Agents to be grounded as (statement index, agent index, text,
+    # context) tuples
+    agents_to_ground = []
+    for stmt_idx, stmt in enumerate(stmts):
+        if source_filter and not (stmt.evidence and
+                                  stmt.evidence[0].source_api in
+                                  source_filter):
+            continue
+        if stmt.evidence and stmt.evidence[0].text:
+            context = stmt.evidence[0].text
+        else:
+            context = None
+        for agent_idx, agent in enumerate(stmt.agent_list()):
+            if agent is not None and 'TEXT' in agent.db_refs:
+                txt = agent.db_refs['TEXT']
+                gr = agent.get_grounding()
+                if not ungrounded_only or gr[0] is None:
+                    agents_to_ground.append((stmt_idx, agent_idx, txt,
+                                             context))
+    groundings = get_groundings([(txt, context) for _, _, txt, context
+                                 in agents_to_ground], mode=mode,
+                                n_threads=n_threads)
+    grounded_stmts = list(stmts)
+    for (stmt_idx, agent_idx, txt, _), (gr, _) in zip(agents_to_ground,
+                                                      groundings):
+        if not gr:
+            continue
+        if grounded_stmts[stmt_idx] is stmts[stmt_idx]:
+            grounded_stmts[stmt_idx] = deepcopy(stmts[stmt_idx])
+        agent = grounded_stmts[stmt_idx].agent_list()[agent_idx]
+        _set_agent_grounding(agent, txt, gr)
+    if cache_path:
+        dump_grounding_cache(cache_path)
     return grounded_stmts
@@ -5,6 +5,7 @@ import os
 import csv
 import json
 import logging
+import multiprocessing
 from copy import deepcopy
 from indra.statements import Agent
 from indra.databases import hgnc_client
@@ -47,21 +48,41 @@ class GroundingMapper(object):
         is assumed to be the web service endpoint through which Gilda is used.
         If 'local', we assume that the gilda Python package is installed
         and will be used.
+    cache_size : Optional[int]
+        The maximum number of mapped groundings kept in memory, see
+        :py:meth:`map_agent`. If None, the cache is unbounded, if 0, no
+        mapped groundings are cached. Default: 100000
+
+    Attributes
+    ----------
+    cache_hits : int
+        The number of Agents whose grounding was mapped from the cache.
+    cache_misses : int
+        The number of Agents whose grounding had to be mapped.
     """
     def __init__(self, grounding_map=None, agent_map=None, ignores=None,
-                 misgrounding_map=None, use_adeft=True, gilda_mode=None):
+                 misgrounding_map=None, use_adeft=True, gilda_mode=None,
+                 cache_size=100000):
         self.grounding_map = grounding_map if grounding_map is not None \
             else default_grounding_map
         self.check_grounding_map(self.grounding_map)
         self.agent_map = agent_map if agent_map is not None \
             else default_agent_map
-        self.ignores = set(ignores) if ignores else default_ignores
+        self.ignores = set(ignores) if ignores else set(default_ignores)
         self.misgrounding_map = misgrounding_map if misgrounding_map \
             else default_misgrounding_map
         self.use_adeft = use_adeft
         self.disamb_manager = DisambManager()
         self.gilda_mode = gilda_mode
         self._gilda_models = None
+        self._gilda_model_set = None
+        self.cache_size = cache_size
+        self._grounding_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Entries added to the cache in a worker process, which are sent
+        # back to the parent process, or None if not in a worker
+        self._new_cache_entries = None
 
     @property
     def gilda_models(self):
@@ -73,6 +94,25 @@ class GroundingMapper(object):
     @gilda_models.setter
     def gilda_models(self, models):
         self._gilda_models = models
+        self._gilda_model_set = None
+
+    def _get_gilda_model_set(self):
+        # The set of texts with Gilda models is made once instead of for
+        # each Agent
+        if self._gilda_model_set is None:
+            self._gilda_model_set = set(self.gilda_models)
+        return self._gilda_model_set
+
+    def clear_cache(self):
+        """Clear the cache of mapped groundings and its hit/miss counters.
+
+        The cache has to be cleared if the grounding map, agent map or
+        misgrounding map of the GroundingMapper is changed after Agents
+        have been mapped.
+        """
+        self._grounding_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     @staticmethod
     def check_grounding_map(gm):
@@ -85,9 +125,13 @@ class GroundingMapper(object):
                 raise ValueError('HGNC:%s for key %s in the grounding map is '
                                  'not a valid ID' % (refs['HGNC'], key))
 
-    def map_stmts(self, stmts, do_rename=True):
+    def map_stmts(self, stmts, do_rename=True, n_jobs=None,
+                  batch_size=5000):
         """Return a new list of statements whose agents have been mapped
 
+        Statements are only copied if mapping changes them, Statements that
+        are unchanged are returned as is.
+
         Parameters
         ----------
         stmts : list of :py:class:`indra.statements.Statement`
@@ -97,6 +141,17 @@ class GroundingMapper(object):
             If do_rename is True the priority for setting the name is
             FamPlex ID, HGNC symbol, then the gene name
             from Uniprot. Default: True
+        n_jobs : Optional[int]
+            The number of worker processes in which statements are mapped.
+            By default, statements are mapped in this process. Each worker
+            starts with a copy of the grounding cache and the groundings it
+            maps are added to the cache of this GroundingMapper when its
+            batch is done. Since workers don't share the groundings they
+            map with each other, there are more cache misses than when
+            mapping in this process.
+        batch_size : Optional[int]
+            The number of statements sent to a worker process at a time if
+            n_jobs is greater than 1. Default: 5000
 
         Returns
         -------
@@ -104,12 +159,19 @@ class GroundingMapper(object):
             A list of statements given by mapping the agents from each
             statement in the input list
         """
-        # Make a copy of the stmts
         mapped_stmts = []
         num_skipped = 0
+        if (self.use_adeft and adeft_disambiguators) or self.gilda_mode:
+            stmts = list(stmts)
+            self._prepare_disambiguation(stmts)
+        if n_jobs is None or n_jobs <= 1:
+            mapped_stmt_iter = (self.map_agents_for_stmt(stmt, do_rename)
+                                for stmt in stmts)
+        else:
+            mapped_stmt_iter = self._map_stmts_in_pool(stmts, do_rename,
+                                                       n_jobs, batch_size)
         # Iterate over the statements
-        for stmt in stmts:
-            mapped_stmt = self.map_agents_for_stmt(stmt, do_rename)
+        for mapped_stmt in mapped_stmt_iter:
             # Check if we should skip the statement
             if mapped_stmt is not None:
                 mapped_stmts.append(mapped_stmt)
@@ -118,6 +180,87 @@ class GroundingMapper(object):
         logger.info('%s statements filtered out' % num_skipped)
         return mapped_stmts
 
+    def _prepare_disambiguation(self, stmts):
+        """Fetch texts and run disambiguation models on them in bulk.
+
+        The Agents that are to be disambiguated with Adeft or Gilda are
+        collected, their texts are fetched and each model is run on all its
+        texts at once. The results are cached by the DisambManager and used
+        when the Statements are mapped.
+        """
+        adeft_stmt_txts = []
+        gilda_stmt_txts = []
+        for stmt in stmts:
+            stmt_adeft_txts = []
+            stmt_gilda_txts = []
+            for agent in stmt.agent_list():
+                if agent is None:
+                    continue
+                agent_txts = {agent.db_refs[t] for t in {'TEXT', 'TEXT_NORM'}
+                              if t in agent.db_refs}
+                if not agent_txts:
+                    continue
+                # Statements that will be filtered out are not disambiguated
+                if agent_txts & self.ignores:
+                    break
+                # The longest match is used for disambiguation
+                if self.use_adeft and \
+                        agent_txts & adeft_disambiguators.keys():
+                    stmt_adeft_txts.append(
+                        sorted(agent_txts & adeft_disambiguators.keys(),
+                               key=lambda x: len(x))[-1])
+                elif self.gilda_mode and \
+                        not agent_txts & self.grounding_map.keys() and \
+                        agent_txts & self._get_gilda_model_set():
+                    stmt_gilda_txts.append(
+                        sorted(agent_txts & self._get_gilda_model_set(),
+                               key=lambda x: len(x))[-1])
+            else:
+                adeft_stmt_txts += [(stmt, txt) for txt in stmt_adeft_txts]
+                gilda_stmt_txts += [(stmt, txt) for txt in stmt_gilda_txts]
+        if not adeft_stmt_txts and not gilda_stmt_txts:
+            return
+        # If anything goes wrong here, the Agents are disambiguated one at
+        # a time while mapping
+        try:
+            self.disamb_manager.prefetch_texts(adeft_stmt_txts +
+                                               gilda_stmt_txts)
+            if adeft_stmt_txts:
+                self.disamb_manager.run_adeft_models(adeft_stmt_txts)
+            if gilda_stmt_txts:
+                self.disamb_manager.run_gilda_models(gilda_stmt_txts,
+                                                     mode=self.gilda_mode)
+        except Exception as e:
+            logger.error('There was an error during bulk disambiguation.')
+            logger.error(e)
+
+    def _map_stmts_in_pool(self, stmts, do_rename, n_jobs, batch_size):
+        """Yield the mapped statements, mapped in a pool of processes."""
+        stmts = list(stmts)
+        batches = [stmts[idx:idx + batch_size]
+                   for idx in range(0, len(stmts), batch_size)]
+        # The GroundingMapper, including its grounding map, agent map and
+        # misgrounding map, is passed to the workers once, at
+        # initialization time, rather than with each batch. When processes
+        # are forked, it is inherited by the workers without serialization.
+        with multiprocessing.Pool(
+                min(n_jobs, len(batches)) or 1,
+                initializer=_init_mapping_worker,
+                initargs=(self, do_rename)) as pool:
+            for batch, (changes, new_cache_entries, n_hits, n_misses) in \
+                    zip(batches, pool.imap(_map_batch_in_worker, batches)):
+                self.cache_hits += n_hits
+                self.cache_misses += n_misses
+                # Groundings mapped by the workers are added to the cache
+                # so that they are available to later calls
+                for key, mapping in new_cache_entries.items():
+                    if key not in self._grounding_cache:
+                        self._cache_mapping(key, mapping)
+                # Only the statements changed or filtered out by mapping
+                # are sent back by the workers
+                for idx, stmt in enumerate(batch):
+                    yield changes.get(idx, stmt)
+
     def map_agents_for_stmt(self, stmt, do_rename=True):
         """Return a new Statement whose agents have been grounding mapped.
 
@@ -134,8 +277,11 @@ class GroundingMapper(object):
         Returns
         -------
         mapped_stmt : :py:class:`indra.statements.Statement`
-            The mapped Statement.
+            The mapped Statement. If mapping doesn't change the Statement,
+            the given Statement is returned without copying it.
         """
+        if self._is_unchanged_by_mapping(stmt, do_rename):
+            return stmt
         mapped_stmt = deepcopy(stmt)
 
         # Iterate over the agents
@@ -149,17 +295,17 @@ class GroundingMapper(object):
             # then filter out the Statement
             agent_txts = {agent.db_refs[t] for t in {'TEXT', 'TEXT_NORM'}
                           if t in agent.db_refs}
-            if agent_txts and agent_txts & set(self.ignores):
+            if agent_txts and agent_txts & self.ignores:
                 return None
 
             # Check if an adeft model exists for agent text
             adeft_success = False
             if self.use_adeft and agent_txts and agent_txts & \
-                    set(adeft_disambiguators):
+                    adeft_disambiguators.keys():
                 try:
                     # Us the longest match for disambiguation
                     txt_for_adeft = sorted(agent_txts &
-                                           set(adeft_disambiguators),
+                                           adeft_disambiguators.keys(),
                                            key=lambda x: len(x))[-1]
                     adeft_success = self.disamb_manager.\
                         run_adeft_disambiguation(mapped_stmt, agent, idx,
@@ -172,11 +318,12 @@ class GroundingMapper(object):
             gilda_success = False
             # Gilda is not used if agent text is in the grounding map
             if not adeft_success and self.gilda_mode and \
-               not agent_txts & set(self.grounding_map) and \
-               agent_txts & set(self.gilda_models):
+               not agent_txts & self.grounding_map.keys() and \
+               agent_txts & self._get_gilda_model_set():
                 try:
                     # Us the longest match for disambiguation
-                    txt_for_gilda = sorted(agent_txts & set(self.gilda_models),
+                    txt_for_gilda = sorted(agent_txts &
+                                           self._get_gilda_model_set(),
                                            key=lambda x: len(x))[-1]
                     gilda_success = self.disamb_manager.\
                         run_gilda_disambiguation(mapped_stmt, agent, idx,
@@ -213,6 +360,57 @@ class GroundingMapper(object):
 
         return mapped_stmt
 
+    def _is_unchanged_by_mapping(self, stmt, do_rename):
+        """Return True if mapping is known to leave a Statement unchanged.
+
+        This is the case if the mapped groundings of all its Agents and the
+        Agents in their bound conditions are cached and equal to their
+        current groundings, and none of the Agents is ignored or
+        disambiguated. If this can't be determined from the cache, False is
+        returned.
+        """
+        agents = []
+        for agent in stmt.agent_list():
+            if agent is None:
+                continue
+            agent_txts = {agent.db_refs[t] for t in {'TEXT', 'TEXT_NORM'}
+                          if t in agent.db_refs}
+            if agent_txts:
+                if agent_txts & self.ignores:
+                    return False
+                if self.use_adeft and \
+                        agent_txts & adeft_disambiguators.keys():
+                    return False
+                if self.gilda_mode and \
+                        not agent_txts & self.grounding_map.keys() and \
+                        agent_txts & self._get_gilda_model_set():
+                    return False
+            agents.append(agent)
+            agents += [bc.agent for bc in agent.bound_conditions]
+        for agent in agents:
+            db_refs_key = _get_db_refs_key(agent.db_refs)
+            if db_refs_key is None:
+                return False
+            mapping = self._grounding_cache.get((db_refs_key, do_rename))
+            if mapping is None:
+                return False
+            mapped_agent, db_refs, name = mapping
+            if mapped_agent is not None or db_refs != agent.db_refs or \
+                    (name is not None and name != agent.name):
+                return False
+        # Each Agent counts as a cache hit as if it was mapped
+        self.cache_hits += len(agents)
+        return True
+
+    def _cache_mapping(self, key, mapping):
+        if self.cache_size is not None and \
+                len(self._grounding_cache) >= self.cache_size:
+            # Evict the oldest entry
+            del self._grounding_cache[next(iter(self._grounding_cache))]
+        self._grounding_cache[key] = mapping
+        if self._new_cache_entries is not None:
+            self._new_cache_entries[key] = mapping
+
     def map_agent(self, agent, do_rename):
         """Return the given Agent with its grounding mapped.
 
@@ -235,6 +433,45 @@ class GroundingMapper(object):
         grounded_agent : :py:class:`indra.statements.Agent`
             The grounded Agent.
         """
+        # The mapped grounding only depends on the db_refs of the Agent, so
+        # it is cached by db_refs to avoid repeating the same ontology
+        # lookups for the many Agents with the same TEXT and db_refs
+        db_refs_key = _get_db_refs_key(agent.db_refs)
+        if db_refs_key is None or self.cache_size == 0:
+            return self._map_agent(agent, do_rename)
+        key = (db_refs_key, do_rename)
+        mapping = self._grounding_cache.get(key)
+        if mapping is None:
+            self.cache_misses += 1
+            mapping = self._get_agent_mapping(agent.db_refs, do_rename)
+            self._cache_mapping(key, mapping)
+        else:
+            self.cache_hits += 1
+        mapped_agent, db_refs, name = mapping
+        # Agents from the agent map are copied so that mapped Agents
+        # never share state
+        if mapped_agent is not None:
+            return deepcopy(mapped_agent)
+        agent.db_refs = dict(db_refs)
+        if name is not None:
+            agent.name = name
+        return agent
+
+    def _get_agent_mapping(self, db_refs, do_rename):
+        """Return the result of mapping an Agent with the given db_refs.
+
+        The result is a tuple of the Agent from the agent map, if there is
+        one, otherwise None, the mapped db_refs and the new name of the
+        Agent, or None if the name is unchanged.
+        """
+        probe = Agent(_unchanged_name, db_refs=deepcopy(db_refs))
+        mapped_agent = self._map_agent(probe, do_rename)
+        if mapped_agent is not probe:
+            return mapped_agent, None, None
+        name = probe.name if probe.name is not _unchanged_name else None
+        return None, probe.db_refs, name
+
+    def _map_agent(self, agent, do_rename):
         # We always standardize DB refs as a functionality in the
         # GroundingMapper. If a new module is implemented which is
         # responsible for standardizing grounding, this can be removed.
@@ -392,6 +629,52 @@ class GroundingMapper(object):
         return mapped_stmts
 
 
+_mapping_worker_state = {}
+
+
+def _init_mapping_worker(mapper, do_rename):
+    mapper._new_cache_entries = {}
+    _mapping_worker_state['mapper'] = mapper
+    _mapping_worker_state['do_rename'] = do_rename
+
+
+def _map_batch_in_worker(batch):
+    """Map a batch of statements and return the ones that were changed.
+
+    The changed statements are returned in a dict keyed by their index in
+    the batch, with None values for statements that were filtered out,
+    along with the entries added to the grounding cache and the number of
+    cache hits and misses while mapping the batch.
+    """
+    mapper = _mapping_worker_state['mapper']
+    cache_hits, cache_misses = mapper.cache_hits, mapper.cache_misses
+    changes = {}
+    for idx, stmt in enumerate(batch):
+        mapped_stmt = mapper.map_agents_for_stmt(
+            stmt, _mapping_worker_state['do_rename'])
+        if mapped_stmt is not stmt:
+            changes[idx] = mapped_stmt
+    new_cache_entries = mapper._new_cache_entries
+    mapper._new_cache_entries = {}
+    return changes, new_cache_entries, mapper.cache_hits - cache_hits, \
+        mapper.cache_misses - cache_misses
+
+
+# A placeholder for the name of Agents in _get_agent_mapping to tell whether
+# mapping changed the name
+_unchanged_name = object()
+
+
+def _get_db_refs_key(db_refs):
+    """Return a hashable key for a db_refs dict or None if there isn't one."""
+    try:
+        key = tuple(sorted(db_refs.items()))
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
 # TODO: handle the cases when there is more than one entry for the same
 # key (e.g., ROS, ER)
 def load_grounding_map(grounding_map_path, lineterminator='\r\n',
@@ -0,0 +1,340 @@
+"""Incremental preassembly of new statements against an assembled corpus.
+
+The :py:class:`IncrementalPreassembler` keeps the state of a preassembled
+corpus (unique statements by hash, per-role agent key indexes, refinement
+edges and beliefs) and can be saved to and loaded from disk. Adding a batch
+of new raw statements merges duplicates into the existing unique statements
+and only checks refinements that involve at least one new statement, so
+that the cost of an update is proportional to the size of the batch rather
+than the size of the corpus.
+"""
+import os
+import copy
+import pickle
+import logging
+import collections
+from indra.belief import BeliefEngine
+from indra.statements import stmt_type as indra_stmt_type
+from . import Preassembler, default_matches_fun, default_refinement_fun, \
+    _confirm_refinements, _get_role_agent_keys
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalPreassembler(object):
+    """Preassemble batches of statements incrementally.
+
+    Parameters
+    ----------
+    ontology : :py:class:`indra.ontology.IndraOntology`
+        An INDRA Ontology object.
+    state_path : Optional[str]
+        The path to a pickle file in which the state of the preassembler
+        is persisted. If the file exists, the state is loaded from it upon
+        instantiation.
+    matches_fun : Optional[function]
+        A functon which takes a Statement object as argument and
+        returns a string key that is used for duplicate recognition. If
+        supplied, it overrides the use of the built-in matches_key method of
+        each Statement being assembled.
+    refinement_fun : Optional[function]
+        A function which takes two Statement objects and an ontology
+        as an argument and returns True or False. If supplied, it overrides
+        the built-in refinement_of method of each Statement being assembled.
+    belief_scorer : Optional[indra.belief.BeliefScorer]
+        Instance of BeliefScorer class to use in calculating Statement
+        probabilities. If None is provided (default), then the default
+        scorer is used.
+
+    Attributes
+    ----------
+    stmts_by_hash : dict
+        The unique statements of the corpus keyed by their hashes. The
+        statements are stored without their supports/supported_by links,
+        which are instead represented by the `supports` and `supported_by`
+        attributes.
+    agent_key_to_hash : dict
+        A dict keyed by statement type whose values are dicts keyed by
+        agent role, which in turn map agent keys to the set of statement
+        hashes in which the agent key appears in the given role.
+    supports : dict
+        A dict mapping each statement hash to the set of hashes of the
+        statements it supports, i.e., statements that refine it.
+    supported_by : dict
+        A dict mapping each statement hash to the set of hashes of the
+        statements it is supported by, i.e., statements that it refines.
+    """
+    def __init__(self, ontology, state_path=None, matches_fun=None,
+                 refinement_fun=None, belief_scorer=None):
+        self.ontology = ontology
+        self.state_path = state_path
+        self.matches_fun = matches_fun if matches_fun else \
+            default_matches_fun
+        self.refinement_fun = refinement_fun if refinement_fun else \
+            default_refinement_fun
+        self.belief_engine = BeliefEngine(scorer=belief_scorer,
+                                          matches_fun=matches_fun)
+        self.stmts_by_hash = {}
+        self.agent_key_to_hash = {}
+        self.supports = collections.defaultdict(set)
+        self.supported_by = collections.defaultdict(set)
+        self._comparison_counter = 0
+        if state_path and os.path.exists(state_path):
+            self.load(state_path)
+
+    def load(self, state_path):
+        """Load the state of the preassembler from a pickle file.
+
+        Parameters
+        ----------
+        state_path : str
+            The path to the pickle file to load the state from.
+        """
+        logger.info('Loading incremental preassembly state from %s'
+                    % state_path)
+        with open(state_path, 'rb') as fh:
+            state = pickle.load(fh)
+        self.stmts_by_hash = state['stmts_by_hash']
+        self.agent_key_to_hash = state['agent_key_to_hash']
+        self.supports = state['supports']
+        self.supported_by = state['supported_by']
+        logger.info('Loaded %d unique statements' % len(self.stmts_by_hash))
+
+    def save(self, state_path=None):
+        """Save the state of the preassembler into a pickle file.
+
+        Parameters
+        ----------
+        state_path : Optional[str]
+            The path to the pickle file to save the state into. If not
+            given, the state_path the preassembler was instantiated with
+            is used.
+        """
+        state_path = state_path if state_path else self.state_path
+        if not state_path:
+            raise ValueError('No path given to save the state into.')
+        logger.info('Saving incremental preassembly state with %d unique '
+                    'statements into %s' % (len(self.stmts_by_hash),
+                                            state_path))
+        state = {'stmts_by_hash': self.stmts_by_hash,
+                 'agent_key_to_hash': self.agent_key_to_hash,
+                 'supports': self.supports,
+                 'supported_by': self.supported_by}
+        with open(state_path, 'wb') as fh:
+            pickle.dump(state, fh, protocol=4)
+
+    def add_statements(self, stmts):
+        """Add a batch of new raw statements to the assembled corpus.
+
+        The statements are first de-duplicated among each other, then
+        merged into existing unique statements where possible. Refinements
+        are only checked between pairs of statements in which at least
+        one statement is new, and beliefs are only recalculated for
+        statements whose evidence changed, either directly or through
+        the refinement hierarchy.
+
+        Parameters
+        ----------
+        stmts : list of :py:class:`indra.statements.Statement`
+            A list of new raw statements.
+
+        Returns
+        -------
+        list of :py:class:`indra.statements.Statement`
+            The list of new unique statements that were added to the
+            corpus.
+        """
+        pa = Preassembler(self.ontology, stmts, matches_fun=self.matches_fun)
+        batch_stmts = pa.combine_duplicates()
+        new_hashes = []
+        updated_hashes = []
+        for stmt in batch_stmts:
+            stmt_hash = stmt.get_hash(matches_fun=self.matches_fun)
+            existing_stmt = self.stmts_by_hash.get(stmt_hash)
+            if existing_stmt is None:
+                self.stmts_by_hash[stmt_hash] = stmt
+                self._add_to_index(stmt_hash, stmt)
+                new_hashes.append(stmt_hash)
+            elif _merge_evidence(existing_stmt, stmt):
+                existing_stmt.get_hash(shallow=False, refresh=True)
+                updated_hashes.append(stmt_hash)
+        logger.info('%d new and %d updated unique statements'
+                    % (len(new_hashes), len(updated_hashes)))
+        self._add_refinements(new_hashes)
+        self._update_beliefs(set(new_hashes) | set(updated_hashes))
+        return [self.stmts_by_hash[sh] for sh in new_hashes]
+
+    def get_statements(self, return_toplevel=True):
+        """Return the assembled statements with their hierarchy.
+
+        The returned statements are shallow copies of the stored ones, with
+        their supports/supported_by attributes set.
+
+        Parameters
+        ----------
+        return_toplevel : Optional[bool]
+            If True only the top level statements are returned.
+            If False, all statements are returned. Default: True
+
+        Returns
+        -------
+        list of :py:class:`indra.statements.Statement`
+            The list of assembled statements.
+        """
+        stmts_by_hash = {sh: copy.copy(stmt)
+                         for sh, stmt in self.stmts_by_hash.items()}
+        for sh, stmt in stmts_by_hash.items():
+            stmt.supports = [stmts_by_hash[s]
+                             for s in self.supports.get(sh, ())]
+            stmt.supported_by = [stmts_by_hash[s]
+                                 for s in self.supported_by.get(sh, ())]
+        if return_toplevel:
+            return [stmt for stmt in stmts_by_hash.values()
+                    if not stmt.supports]
+        return list(stmts_by_hash.values())
+
+    def _add_to_index(self, stmt_hash, stmt):
+        index = self.agent_key_to_hash.setdefault(indra_stmt_type(stmt), {})
+        for role in stmt._agent_order:
+            index_for_role = index.setdefault(role, {})
+            for agent_key in _get_role_agent_keys(stmt, role):
+                index_for_role.setdefault(agent_key, set()).add(stmt_hash)
+
+    def _add_refinements(self, new_hashes):
+        """Find and add refinements involving at least one new statement."""
+        new_hash_set = set(new_hashes)
+        stmts_to_compare = collections.defaultdict(set)
+        for stmt_hash in new_hashes:
+            stmt = self.stmts_by_hash[stmt_hash]
+            index = self.agent_key_to_hash[indra_stmt_type(stmt)]
+            # Statements that the new statement can possibly refine,
+            # including other new statements
+            refined = self._get_possibly_refined(stmt_hash, stmt, index)
+            stmts_to_compare[stmt_hash] |= refined
+            # Existing statements that can possibly refine the new
+            # statement. Refinements of the new statement by other new
+            # statements are covered above.
+            for refinement in self._get_possible_refinements(stmt_hash,
+                                                             stmt, index):
+                if refinement not in new_hash_set:
+                    stmts_to_compare[refinement].add(stmt_hash)
+        confirmed, n_comparisons = \
+            _confirm_refinements(self.stmts_by_hash, stmts_to_compare, None,
+                                 self.refinement_fun, self.ontology)
+        self._comparison_counter += n_comparisons
+        n_refinements = 0
+        for refinement, refined_hashes in confirmed.items():
+            for refined in refined_hashes:
+                self.supported_by[refinement].add(refined)
+                self.supports[refined].add(refinement)
+                n_refinements += 1
+        logger.info('Found %d new refinements in %d comparisons'
+                    % (n_refinements, n_comparisons))
+
+    def _get_possibly_refined(self, stmt_hash, stmt, index):
+        # This mirrors the logic of the ontology-based refinement filter:
+        # in each role, each agent key can refine itself, its ontological
+        # parents and None.
+        candidates = None
+        for role in stmt._agent_order:
+            index_for_role = index[role]
+            for agent_key in _get_role_agent_keys(stmt, role):
+                relevant_keys = {None, agent_key}
+                if agent_key is not None:
+                    relevant_keys |= set(self.ontology.get_parents(*agent_key))
+                role_hashes = set()
+                for key in relevant_keys:
+                    role_hashes |= index_for_role.get(key, set())
+                candidates = role_hashes if candidates is None \
+                    else candidates & role_hashes
+        candidates = candidates if candidates is not None else set()
+        candidates.discard(stmt_hash)
+        return candidates
+
+    def _get_possible_refinements(self, stmt_hash, stmt, index):
+        # This is the reverse of _get_possibly_refined: another statement
+        # can refine this one in a given role if all its agent keys in that
+        # role are this statement's agent keys or their ontological
+        # children. A None key in this statement can be refined by anything.
+        candidates = None
+        for role in stmt._agent_order:
+            agent_keys = _get_role_agent_keys(stmt, role)
+            if None in agent_keys:
+                continue
+            index_for_role = index[role]
+            allowed_keys = set()
+            for agent_key in agent_keys:
+                allowed_keys.add(agent_key)
+                allowed_keys |= set(self.ontology.get_children(*agent_key))
+            role_hashes = set()
+            for key in allowed_keys:
+                role_hashes |= index_for_role.get(key, set())
+            role_hashes = {
+                sh for sh in role_hashes
+                if _get_role_agent_keys(self.stmts_by_hash[sh], role) <=
+                allowed_keys}
+            candidates = role_hashes if candidates is None \
+                else candidates & role_hashes
+        if candidates is None:
+            candidates = set().union(*index[stmt._agent_order[0]].values())
+        candidates.discard(stmt_hash)
+        return candidates
+
+    def _update_beliefs(self, changed_hashes):
+        """Recalculate beliefs affected by a set of changed statements."""
+        # A change in a statement's evidence affects its own belief and the
+        # belief of all the statements it (transitively) refines.
+        affected = _get_closure(changed_hashes, self.supported_by)
+        # To calculate these beliefs, we need all the statements that
+        # (transitively) refine the affected ones.
+        needed = _get_closure(affected, self.supports)
+        logger.info('Updating beliefs for %d statements' % len(affected))
+        stmts = []
+        for sh in needed:
+            stmt = copy.copy(self.stmts_by_hash[sh])
+            stmts.append((sh, stmt))
+        stmts_by_hash = dict(stmts)
+        for sh, stmt in stmts:
+            stmt.supports = [stmts_by_hash[s]
+                             for s in self.supports.get(sh, ())]
+            stmt.supported_by = [stmts_by_hash[s]
+                                 for s in self.supported_by.get(sh, ())
+                                 if s in stmts_by_hash]
+        self.belief_engine.set_hierarchy_probs([stmt for _, stmt in stmts])
+        for sh, stmt in stmts:
+            self.stmts_by_hash[sh].belief = stmt.belief
+
+
+def _get_closure(hashes, edges):
+    closure = set(hashes)
+    stack = list(hashes)
+    while stack:
+        sh = stack.pop()
+        for next_sh in edges.get(sh, ()):
+            if next_sh not in closure:
+                closure.add(next_sh)
+                stack.append(next_sh)
+    return closure
+
+
+def _merge_evidence(stmt, new_stmt):
+    """Add evidence from a duplicate statement, return True if any added."""
+    ev_keys = {_get_evidence_key(ev) for ev in stmt.evidence}
+    added = False
+    for ev in new_stmt.evidence:
+        ev_key = _get_evidence_key(ev)
+        if ev_key not in ev_keys:
+            stmt.evidence.append(ev)
+            ev_keys.add(ev_key)
+            added = True
+    return added
+
+
+def _get_evidence_key(ev):
+    # The prior_uuids annotation refers to the raw statement the evidence
+    # came from and is not part of what makes evidences duplicates.
+    annotations = {k: v for k, v in ev.annotations.items()
+                   if k != 'prior_uuids'}
+    return str((ev.source_api, ev.source_id, ev.pmid, ev.text,
+                sorted(annotations.items()),
+                sorted(ev.epistemics.items())))
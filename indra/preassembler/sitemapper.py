@@ -1,7 +1,12 @@
+import os
+import pickle
+import hashlib
 import logging
 import textwrap
+import multiprocessing
 from copy import deepcopy
 from functools import lru_cache
+import protmapper
 from protmapper.api import ProtMapper, default_site_map
 from indra.statements import *
 from indra.databases import hgnc_client
@@ -84,6 +89,11 @@ class SiteMapper(ProtMapper):
         in other human isoforms of the protein (based on PhosphoSitePlus
         data). If a site is found that is linked to a site in the human
         reference sequence, a mapping is created. Default is True.
+    site_cache_path : Optional[str]
+        The path to a pickle file in which the results of mapping each
+        unique site are cached across runs. The cache is only used if it was
+        made with the same protmapper version, site map and mapping options.
+        If not given, results are only cached in memory.
 
     Examples
     --------
@@ -117,11 +127,42 @@ class SiteMapper(ProtMapper):
     """
     def __init__(self, site_map=None, use_cache=False, cache_path=None,
                  do_methionine_offset=True, do_orthology_mapping=True,
-                 do_isoform_mapping=True):
+                 do_isoform_mapping=True, site_cache_path=None):
         super(SiteMapper, self).__init__(site_map, use_cache, cache_path)
         self.do_methionine_offset = do_methionine_offset
         self.do_orthology_mapping = do_orthology_mapping
         self.do_isoform_mapping = do_isoform_mapping
+        self.site_cache_path = site_cache_path
+        # MappedSites keyed by (UniProt ID, residue, position)
+        self._mapped_sites = {}
+        if site_cache_path and os.path.exists(site_cache_path):
+            self._load_site_cache()
+
+    def save_site_cache(self):
+        """Write the results of mapping sites into the site cache file."""
+        with open(self.site_cache_path, 'wb') as fh:
+            pickle.dump({'version': self._get_site_cache_version(),
+                         'sites': self._mapped_sites}, fh, protocol=4)
+
+    def _load_site_cache(self):
+        with open(self.site_cache_path, 'rb') as fh:
+            site_cache = pickle.load(fh)
+        if site_cache['version'] != self._get_site_cache_version():
+            logger.info('Not using the site cache in %s since it was made '
+                        'with a different site map or options' %
+                        self.site_cache_path)
+            return
+        self._mapped_sites = site_cache['sites']
+        logger.info('Loaded %d mapped sites from %s' %
+                    (len(self._mapped_sites), self.site_cache_path))
+
+    def _get_site_cache_version(self):
+        """Return the version of the site map and options used for mapping."""
+        site_map_hash = \
+            hashlib.md5(str(sorted(self.site_map.items())).encode('utf-8'))
+        return (getattr(protmapper, '__version__', None),
+                site_map_hash.hexdigest(), self.do_methionine_offset,
+                self.do_orthology_mapping, self.do_isoform_mapping)
 
     def map_stmt_sites(self, stmt):
         stmt_copy = deepcopy(stmt)
@@ -189,7 +230,7 @@ class SiteMapper(ProtMapper):
             mapped_stmt = None
         return mapped_stmt
 
-    def map_sites(self, stmts):
+    def map_sites(self, stmts, n_jobs=None):
         """Check a set of statements for invalid modification sites.
 
         Statements are checked against Uniprot reference sequences to determine
@@ -207,6 +248,10 @@ class SiteMapper(ProtMapper):
         ----------
         stmts : list of :py:class:`indra.statement.Statement`
             The statements to check for site errors.
+        n_jobs : Optional[int]
+            The number of worker processes in which the unique sites in the
+            statements are mapped. By default, sites are mapped in this
+            process.
 
         Returns
         -------
@@ -222,13 +267,16 @@ class SiteMapper(ProtMapper):
         valid_statements = []
         mapped_statements = []
 
+        # Check for errors in the position str
+        # TODO: this could also be used on agent conditions, here
+        # it's only applied to statement position arguments
+        stmts = [stmt for stmt in stmts
+                 if not isinstance(stmt, (Modification, SelfModification))
+                 or _valid_position_str(stmt.position)]
+        # Each unique site is mapped once before the statements are
+        # checked one by one
+        self.map_unique_sites(stmts, n_jobs=n_jobs)
         for stmt in stmts:
-            # Check for errors in the position str
-            # TODO: this could also be used on agent conditions, here
-            # it's only applied to statement position arguments
-            if isinstance(stmt, (Modification, SelfModification)) and \
-                    not _valid_position_str(stmt.position):
-                continue
             mapped_stmt = self.map_stmt_sites(stmt)
             # If we got a MappedStatement as a return value, we add that to the
             # list of mapped statements, otherwise, the original Statement is
@@ -238,8 +286,54 @@ class SiteMapper(ProtMapper):
             else:
                 valid_statements.append(stmt)
 
+        if self.site_cache_path:
+            self.save_site_cache()
         return valid_statements, mapped_statements
 
+    def map_unique_sites(self, stmts, n_jobs=None):
+        """Map each unique site in a list of statements once.
+
+        The sites of the modifications of all Agents, including the Agents
+        in bound conditions, and of modification statements are collected,
+        and each unique (UniProt ID, residue, position) site that isn't
+        cached is mapped. The results are cached and used when the sites of
+        the statements are mapped.
+
+        Parameters
+        ----------
+        stmts : list of :py:class:`indra.statement.Statement`
+            The statements whose sites are mapped.
+        n_jobs : Optional[int]
+            The number of worker processes in which the sites are mapped. By
+            default, sites are mapped in this process.
+        """
+        # The unique sites are kept in the order they first appear in
+        site_keys = {}
+        for stmt in stmts:
+            for agent, residue, position in _get_stmt_sites(stmt):
+                site_key = self._get_site_key(agent, residue, position)
+                if site_key is not None and \
+                        site_key not in self._mapped_sites:
+                    site_keys[site_key] = None
+        site_keys = list(site_keys)
+        logger.info('Mapping %d unique sites' % len(site_keys))
+        if n_jobs is None or n_jobs <= 1 or len(site_keys) < 2:
+            for site_key in site_keys:
+                self._mapped_sites[site_key] = self._map_site(*site_key)
+            return
+        chunk_size = -(-len(site_keys) // n_jobs)
+        chunks = [site_keys[idx:idx + chunk_size]
+                  for idx in range(0, len(site_keys), chunk_size)]
+        # The SiteMapper is passed to the workers once, at initialization
+        # time. When processes are forked, it is inherited by the workers
+        # without serialization.
+        with multiprocessing.Pool(len(chunks),
+                                  initializer=_init_site_worker,
+                                  initargs=(self,)) as pool:
+            for chunk, mapped_sites in \
+                    zip(chunks, pool.imap(_map_sites_in_worker, chunks)):
+                self._mapped_sites.update(zip(chunk, mapped_sites))
+
     def _map_agent_sites(self, agent):
         """Check an agent for invalid sites and update if necessary.
 
@@ -300,28 +394,79 @@ class SiteMapper(ProtMapper):
             agent, and if both the position and residue for the modification
             condition were available. Otherwise None is returned.
         """
+        site_key = self._get_site_key(agent, mod_condition.residue,
+                                      mod_condition.position)
+        if site_key is None:
+            return None
+        # Otherwise, try to map it and return the mapped site
+        mapped_site = self._mapped_sites.get(site_key)
+        if mapped_site is None:
+            mapped_site = self._map_site(*site_key)
+            self._mapped_sites[site_key] = mapped_site
+        return mapped_site
+
+    @staticmethod
+    def _get_site_key(agent, residue, position):
+        """Return the (UniProt ID, residue, position) key of a site or None.
+
+        None is returned if the Agent has no UniProt ID or the site has no
+        residue or position.
+        """
         # Get the UniProt ID of the agent, if not found, return
         up_id = _get_uniprot_id(agent)
         if not up_id:
             logger.debug("No uniprot ID for %s" % agent.name)
             return None
         # If no site information for this residue, skip
-        if mod_condition.position is None or mod_condition.residue is None:
+        if position is None or residue is None:
             return None
-        # Otherwise, try to map it and return the mapped site
-        mapped_site = \
-            self.map_to_human_ref(up_id, 'uniprot',
-                mod_condition.residue,
-                mod_condition.position,
-                do_methionine_offset=self.do_methionine_offset,
-                do_orthology_mapping=self.do_orthology_mapping,
-                do_isoform_mapping=self.do_isoform_mapping)
-        return mapped_site
+        return up_id, residue, position
+
+    def _map_site(self, up_id, residue, position):
+        return self.map_to_human_ref(
+            up_id, 'uniprot', residue, position,
+            do_methionine_offset=self.do_methionine_offset,
+            do_orthology_mapping=self.do_orthology_mapping,
+            do_isoform_mapping=self.do_isoform_mapping)
 
 
 default_mapper = SiteMapper(default_site_map)
 
 
+_site_worker_state = {}
+
+
+def _init_site_worker(site_mapper):
+    _site_worker_state['site_mapper'] = site_mapper
+
+
+def _map_sites_in_worker(site_keys):
+    site_mapper = _site_worker_state['site_mapper']
+    return [site_mapper._map_site(*site_key) for site_key in site_keys]
+
+
+def _get_stmt_sites(stmt):
+    """Yield the (Agent, residue, position) sites checked in a statement.
+
+    These are the sites of the modifications of the Agents of the statement
+    and the Agents in their bound conditions, and the site of modification
+    statements, on the substrate or, for SelfModifications, the enzyme.
+    """
+    for agent in stmt.agent_list():
+        if agent is None:
+            continue
+        for ag in [agent] + [bc.agent for bc in agent.bound_conditions]:
+            if ag is None:
+                continue
+            for mod_condition in ag.mods:
+                yield ag, mod_condition.residue, mod_condition.position
+    if isinstance(stmt, (Modification, SelfModification)) and \
+            stmt.residue is not None and stmt.position is not None:
+        agent = stmt.sub if isinstance(stmt, Modification) else stmt.enz
+        if agent is not None:
+            yield agent, stmt.residue, stmt.position
+
+
 # TODO: determine if this should be done in the protmapper or if this is the
 # preferred place
 @lru_cache(maxsize=10000)
@@ -2,10 +2,12 @@ __all__ = ['Agent', 'BoundCondition', 'MutCondition', 'ModCondition',
            'ActivityCondition', 'default_ns_order']
 
 
+import sys
 import logging
 from collections import OrderedDict as _o
 from indra.statements.statements import modtype_conditions, modtype_to_modclass
-from .concept import Concept
+from .concept import Concept, _intern_db_refs
+from .util import _Slotted
 from .resources import get_valid_residue, activity_types, amino_acids
 
 
@@ -38,6 +40,12 @@ class Agent(Concept):
     db_refs : dict
         Dictionary of database identifiers associated with this agent.
     """
+    __slots__ = ['mods', 'bound_conditions', 'mutations', 'activity',
+                 'location']
+    _state_attrs = Concept._state_attrs + ('mods', 'bound_conditions',
+                                           'mutations', 'activity',
+                                           'location')
+
     def __init__(self, name, mods=None, activity=None,
                  bound_conditions=None, mutations=None,
                  location=None, db_refs=None):
@@ -69,8 +77,35 @@ class Agent(Concept):
         self.activity = activity
         self.location = location
 
+    def freeze(self):
+        """Compute the matches keys of the Agent once and cache them.
+
+        Agents in bound conditions are frozen along with the Agent. A frozen
+        Agent must not be modified; call :py:meth:`unfreeze` before changing
+        its grounding, mods, mutations, bound conditions, activity or
+        location.
+        """
+        self._frozen_keys = None
+        for bc in self.bound_conditions:
+            bc.agent.freeze()
+        self._frozen_keys = self._get_keys()
+
+    def unfreeze(self):
+        """Discard the cached matches keys of the Agent."""
+        self._frozen_keys = None
+        for bc in self.bound_conditions:
+            bc.agent.unfreeze()
+
+    def _get_keys(self):
+        entity_key = self.entity_matches_key()
+        state_key = self.state_matches_key()
+        return {'entity': entity_key, 'state': state_key,
+                'matches': str((entity_key, state_key))}
+
     def matches_key(self):
         """Return a key to identify the identity and state of the Agent."""
+        if self._frozen_keys is not None:
+            return self._frozen_keys['matches']
         key = (self.entity_matches_key(),
                self.state_matches_key())
         return str(key)
@@ -86,6 +121,8 @@ class Agent(Concept):
         str
             The key used to identify the Agent.
         """
+        if self._frozen_keys is not None:
+            return self._frozen_keys['entity']
         db_ns, db_id = self.get_grounding()
         if db_ns and db_id:
             return str((db_ns, db_id))
@@ -93,6 +130,8 @@ class Agent(Concept):
 
     def state_matches_key(self):
         """Return a key to identify the state of the Agent."""
+        if self._frozen_keys is not None:
+            return self._frozen_keys['state']
         # NOTE: Making a set of the mod matches_keys might break if
         # you have an agent with two phosphorylations at serine
         # with unknown sites.
@@ -303,12 +342,12 @@ class Agent(Concept):
             return None
         if not db_refs:
             db_refs = {}
-        agent = Agent(name, db_refs=db_refs)
+        agent = Agent(name, db_refs=_intern_db_refs(db_refs))
         agent.mods = [ModCondition._from_json(mod) for mod in mods]
         agent.mutations = [MutCondition._from_json(mut) for mut in mutations]
         agent.bound_conditions = [BoundCondition._from_json(bc)
                                   for bc in bound_conditions]
-        agent.location = location
+        agent.location = sys.intern(location) if location else location
         if activity:
             agent.activity = ActivityCondition._from_json(activity)
         return agent
@@ -341,7 +380,7 @@ class Agent(Concept):
         return '%s(%s)' % (agent_name, attr_str)
 
 
-class BoundCondition(object):
+class BoundCondition(_Slotted):
     """Identify Agents bound (or not bound) to a given Agent in a given context.
 
     Parameters
@@ -364,6 +403,9 @@ class BoundCondition(object):
     >>> ywhab = Agent('YWHAB')
     >>> braf = Agent('BRAF', bound_conditions=[BoundCondition(ywhab, False)])
     """
+    __slots__ = ['agent', 'is_bound']
+    _state_attrs = ('agent', 'is_bound')
+
     def __init__(self, agent, is_bound=True):
         self.agent = agent
         self.is_bound = is_bound
@@ -398,7 +440,7 @@ class BoundCondition(object):
         return bc
 
 
-class MutCondition(object):
+class MutCondition(_Slotted):
     """Mutation state of an amino acid position of an Agent.
 
     Parameters
@@ -416,6 +458,9 @@ class MutCondition(object):
 
     >>> egfr_mutant = Agent('EGFR', mutations=[MutCondition('858', 'L', 'R')])
     """
+    __slots__ = ['position', 'residue_from', 'residue_to']
+    _state_attrs = ('position', 'residue_from', 'residue_to')
+
     def __init__(self, position, residue_from, residue_to=None):
         self.position = position
         self.residue_from = get_valid_residue(residue_from)
@@ -478,7 +523,7 @@ class MutCondition(object):
         return (from_match and to_match and pos_match)
 
 
-class ModCondition(object):
+class ModCondition(_Slotted):
     """Post-translational modification state at an amino acid position.
 
     Parameters
@@ -514,6 +559,9 @@ class ModCondition(object):
     >>> unphos_erk = Agent('MAPK1', mods=(
     ... ModCondition('phosphorylation', 'Y', '187', is_modified=False)))
     """
+    __slots__ = ['mod_type', 'residue', 'position', 'is_modified']
+    _state_attrs = ('mod_type', 'residue', 'position', 'is_modified')
+
     def __init__(self, mod_type, residue=None, position=None,
                  is_modified=True):
         if mod_type not in modtype_conditions:
@@ -584,7 +632,8 @@ class ModCondition(object):
             logger.warning('ModCondition missing is_modified, defaulting '
                            'to True')
             is_modified = True
-        mc = ModCondition(mod_type, residue, position, is_modified)
+        mc = ModCondition(sys.intern(mod_type), residue, position,
+                          is_modified)
         return mc
 
     def equals(self, other):
@@ -598,7 +647,7 @@ class ModCondition(object):
         return hash(self.matches_key())
 
 
-class ActivityCondition(object):
+class ActivityCondition(_Slotted):
     """An active or inactive state of a protein.
 
     Examples
@@ -624,6 +673,9 @@ class ActivityCondition(object):
     is_active : bool
         Specifies whether the given activity type is present or absent.
     """
+    __slots__ = ['activity_type', 'is_active']
+    _state_attrs = ('activity_type', 'is_active')
+
     def __init__(self, activity_type, is_active):
         if activity_type not in activity_types:
             logger.warning('Invalid activity type: %s' % activity_type)
@@ -668,7 +720,7 @@ class ActivityCondition(object):
             logger.warning('ActivityCondition missing is_active, ' +
                            'defaulting to True')
             is_active = True
-        ac = ActivityCondition(activity_type, is_active)
+        ac = ActivityCondition(sys.intern(activity_type), is_active)
         return ac
 
     def __str__(self):
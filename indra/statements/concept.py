@@ -1,5 +1,7 @@
+import sys
 import logging
 from collections import OrderedDict as _o
+from .util import _Slotted
 
 
 logger = logging.getLogger(__name__)
@@ -7,7 +9,7 @@ logger = logging.getLogger(__name__)
 default_ns_order = ['WM', 'UN', 'HUME', 'SOFIA', 'CWMS']
 
 
-class Concept(object):
+class Concept(_Slotted):
     """A concept/entity of interest that is the argument of a Statement
 
     Parameters
@@ -17,14 +19,46 @@ class Concept(object):
     db_refs : dict
         Dictionary of database identifiers associated with this concept.
     """
+    # The keys cached by freeze() are stored in _frozen_keys, which is None
+    # if the concept is not frozen
+    __slots__ = ['name', 'db_refs', '_frozen_keys']
+    _state_attrs = ('name', 'db_refs')
+
     def __init__(self, name, db_refs=None):
         self.name = name
         self.db_refs = db_refs if db_refs else {}
+        self._frozen_keys = None
+
+    def freeze(self):
+        """Compute the matches keys of the concept once and cache them.
+
+        While a concept is frozen, its matches keys are returned from the
+        cache instead of being rebuilt on each call. A frozen concept must
+        not be modified; call :py:meth:`unfreeze` before changing its
+        grounding or any other attribute that its keys are built from.
+        """
+        self._frozen_keys = None
+        self._frozen_keys = self._get_keys()
+
+    def unfreeze(self):
+        """Discard the cached matches keys of the concept."""
+        self._frozen_keys = None
+
+    @property
+    def is_frozen(self):
+        """True if the matches keys of the concept are cached."""
+        return self._frozen_keys is not None
+
+    def _get_keys(self):
+        return {'entity': self.entity_matches_key(),
+                'matches': self.matches_key()}
 
     def matches(self, other):
         return self.matches_key() == other.matches_key()
 
     def matches_key(self):
+        if self._frozen_keys is not None:
+            return self._frozen_keys['matches']
         key = self.entity_matches_key()
         return str(key)
 
@@ -32,6 +66,8 @@ class Concept(object):
         return self.entity_matches_key() == other.entity_matches_key()
 
     def entity_matches_key(self):
+        if self._frozen_keys is not None:
+            return self._frozen_keys['entity']
         # Get the grounding first
         db_ns, db_id = self.get_grounding()
         # If there's no grounding, just use the name as key
@@ -138,7 +174,7 @@ class Concept(object):
         for key, val in db_refs.items():
             if isinstance(val, list):
                 db_refs[key] = [tuple(v) for v in val]
-        concept = Concept(name, db_refs=db_refs)
+        concept = Concept(name, db_refs=_intern_db_refs(db_refs))
         return concept
 
     def __str__(self):
@@ -148,6 +184,17 @@ class Concept(object):
         return str(self)
 
 
+def _intern_db_refs(db_refs):
+    """Return db_refs with interned name spaces and string IDs.
+
+    The same name spaces and IDs occur in the db_refs of many Agents, so
+    interning them when deserializing large numbers of Agents saves memory.
+    """
+    return {sys.intern(db_ns): (sys.intern(db_id) if isinstance(db_id, str)
+                                else db_id)
+            for db_ns, db_id in db_refs.items()}
+
+
 def get_top_compositional_grounding(groundings):
     def sort_key(entry):
         scores = [grounding[1] for grounding in entry
@@ -11,11 +11,12 @@ import json
 import textwrap
 from collections import OrderedDict as _o
 from .util import *
+from .util import _Slotted
 from .context import Context
 
 
 @python_2_unicode_compatible
-class Evidence(object):
+class Evidence(_Slotted):
     """Container for evidence supporting a given statement.
 
     Parameters
@@ -53,42 +54,111 @@ class Evidence(object):
         This is a hash calculated by a Statement to which this evidence refers,
         and is set by said Statement. It is useful for tracing ownership of
         an Evidence object.
+
+    Empty text_refs, annotations and epistemics dicts are only created when
+    they are first accessed, and :py:meth:`compact` can be used to further
+    reduce the memory used by Evidence objects that are kept around in large
+    numbers.
     """
+    __slots__ = ['source_api', 'source_id', 'pmid', 'text', '_text_refs',
+                 '_annotations', '_epistemics', 'context', 'source_hash',
+                 'stmt_tag']
+
     def __init__(self, source_api=None, source_id=None, pmid=None, text=None,
                  annotations=None, epistemics=None, context=None,
                  text_refs=None):
-        self.source_api = source_api
+        self.source_api = sys.intern(source_api) \
+            if isinstance(source_api, str) else source_api
         self.source_id = source_id
         self.pmid = pmid
-        self.text_refs = {}
+        self._text_refs = None
         if pmid is not None:
             self.text_refs['PMID'] = pmid
-        if text_refs is not None:
+        if text_refs:
             self.text_refs.update(text_refs)
         self.text = text
-        if annotations:
-            self.annotations = annotations
-        else:
-            self.annotations = {}
-        if epistemics:
-            self.epistemics = epistemics
-        else:
-            self.epistemics = {}
+        self._annotations = annotations if annotations else None
+        self._epistemics = epistemics if epistemics else None
         self.context = context
         self.source_hash = None
         self.get_source_hash()
         self.stmt_tag = None
 
-    def __setstate__(self, state):
-        if 'context' not in state:
-            state['context'] = None
-        if 'text_refs' not in state:
-            state['text_refs'] = {}
-        if 'stmt_tag' not in state:
-            state['stmt_tag'] = None
-        if 'source_hash' not in state:
-            state['source_hash'] = None
-        self.__dict__ = state
+    @property
+    def text_refs(self):
+        if self._text_refs is None:
+            self._text_refs = {}
+        return self._text_refs
+
+    @text_refs.setter
+    def text_refs(self, text_refs):
+        self._text_refs = text_refs
+
+    @property
+    def annotations(self):
+        # Annotations can be stored as encoded JSON by compact() in which
+        # case they are decoded when first accessed
+        if self._annotations is None:
+            self._annotations = {}
+        elif isinstance(self._annotations, bytes):
+            self._annotations = _decode_annotations(self._annotations)
+        return self._annotations
+
+    @annotations.setter
+    def annotations(self, annotations):
+        self._annotations = annotations
+
+    @property
+    def epistemics(self):
+        if self._epistemics is None:
+            self._epistemics = {}
+        return self._epistemics
+
+    @epistemics.setter
+    def epistemics(self, epistemics):
+        self._epistemics = epistemics
+
+    def __getstate__(self):
+        # Pickling shouldn't undo compact() so the private attributes are
+        # used here instead of the properties
+        return {'source_api': self.source_api, 'source_id': self.source_id,
+                'pmid': self.pmid, 'text_refs': self._text_refs or {},
+                'text': self.text, 'annotations': self._get_annotations(),
+                'epistemics': self._epistemics or {}, 'context': self.context,
+                'source_hash': self.source_hash, 'stmt_tag': self.stmt_tag}
+
+    def _get_annotations(self):
+        """Return the annotations without creating or decoding them in place.
+        """
+        if isinstance(self._annotations, bytes):
+            return _decode_annotations(self._annotations)
+        return self._annotations if self._annotations is not None else {}
+
+    def compact(self):
+        """Reduce the memory used by this Evidence.
+
+        Empty text_refs, annotations and epistemics dicts are released,
+        their keys are interned, and annotations are stored as encoded JSON
+        which is decoded the next time the `annotations` attribute is
+        accessed. Annotations that can't be represented as JSON without
+        loss (e.g., because they contain tuples) are left as they are.
+        """
+        for attr in ['_text_refs', '_epistemics']:
+            value = getattr(self, attr)
+            if not value:
+                setattr(self, attr, None)
+            elif type(value) is dict:
+                setattr(self, attr, {sys.intern(k) if isinstance(k, str)
+                                     else k: v for k, v in value.items()})
+        if not self._annotations:
+            self._annotations = None
+        elif isinstance(self._annotations, dict):
+            try:
+                encoded = json.dumps(self._annotations).encode('utf-8')
+            except (TypeError, ValueError):
+                return
+            if _decode_annotations(encoded) == self._annotations:
+                self._annotations = encoded
 
     def get_source_hash(self, refresh=False):
         """Get a hash based off of the source of this statement.
@@ -110,7 +180,7 @@ class Evidence(object):
     def matches_key(self):
         key_lst = [self.source_api, self.source_id, self.pmid,
                    self.text]
-        for d in [self.annotations, self.epistemics]:
+        for d in [self._get_annotations(), self._epistemics or {}]:
             d_key = list(d.items())
             d_key.sort()
             key_lst.append(d_key)
@@ -122,8 +192,8 @@ class Evidence(object):
                   (self.source_id == other.source_id) and \
                   (self.pmid == other.pmid) and \
                   (self.text == other.text) and \
-                  (self.annotations == other.annotations) and \
-                  (self.epistemics == other.epistemics) and \
+                  (self._get_annotations() == other._get_annotations()) and \
+                  ((self._epistemics or {}) == (other._epistemics or {})) and \
                   (self.context == other.context)
         return matches
 
@@ -138,14 +208,14 @@ class Evidence(object):
             json_dict['source_id'] = self.source_id
         if self.text:
             json_dict['text'] = self.text
-        if self.annotations:
-            json_dict['annotations'] = self.annotations
-        if self.epistemics:
-            json_dict['epistemics'] = self.epistemics
+        if self._annotations:
+            json_dict['annotations'] = self._get_annotations()
+        if self._epistemics:
+            json_dict['epistemics'] = self._epistemics
         if self.context:
             json_dict['context'] = self.context.to_json()
-        if self.text_refs:
-            json_dict['text_refs'] = self.text_refs
+        if self._text_refs:
+            json_dict['text_refs'] = self._text_refs
         json_dict['source_hash'] = self.get_source_hash()
         if self.stmt_tag:
             json_dict['stmt_tag'] = self.stmt_tag
@@ -229,3 +299,5 @@ class Evidence(object):
             return str(self).encode('utf-8')
 
 
+def _decode_annotations(encoded):
+    return json.loads(encoded.decode('utf-8'))
@@ -2,18 +2,30 @@ from __future__ import absolute_import, print_function, unicode_literals
 from builtins import dict, str
 
 __all__ = ['stmts_from_json', 'stmts_from_json_file', 'stmts_to_json',
-           'stmts_to_json_file', 'draw_stmt_graph',
-           'UnresolvedUuidError', 'InputError']
-
+           'stmts_to_json_file', 'iter_stmts_from_jsonl', 'write_stmts_jsonl',
+           'write_stmts_binary', 'stmts_from_binary_file',
+           'StatementBinaryReader', 'draw_stmt_graph', 'UnresolvedUuidError',
+           'InputError']
+
+import gc
+import io
+import mmap
+import zlib
+import gzip
 import json
+import struct
 import logging
+import itertools
+import multiprocessing
+import numpy
 from indra.statements.statements import Statement, Unresolved
 
 
 logger = logging.getLogger(__name__)
 
 
-def stmts_from_json(json_in, on_missing_support='handle'):
+def stmts_from_json(json_in, on_missing_support='handle', n_jobs=1,
+                    chunk_size=10000):
     """Get a list of Statements from Statement jsons.
 
     In the case of pre-assembled Statements which have `supports` and
@@ -41,30 +53,30 @@ def stmts_from_json(json_in, on_missing_support='handle'):
         - *'ignore'* : Simply omit any uuids that cannot be linked to any
           Statements in the list.
         - *'error'* : Raise an error upon hitting an un-linkable uuid.
+    n_jobs : Optional[int]
+        The number of worker processes used to deserialize Statements. If
+        larger than 1, the input is split into chunks which are deserialized
+        in parallel, and the Statements are returned in their original order.
+        Default: 1
+    chunk_size : Optional[int]
+        The number of Statement jsons deserialized by a worker process at a
+        time when `n_jobs` is larger than 1. Default: 10000
 
     Returns
     -------
     stmts : list[:py:class:`Statement`]
         A list of INDRA Statements.
     """
-
-    stmts = []
-    uuid_dict = {}
-    for json_stmt in json_in:
-        try:
-            st = Statement._from_json(json_stmt)
-        except Exception as e:
-            logger.warning("Error creating statement: %s" % e)
-            continue
-        stmts.append(st)
-        uuid_dict[st.uuid] = st
-    for st in stmts:
-        _promote_support(st.supports, uuid_dict, on_missing_support)
-        _promote_support(st.supported_by, uuid_dict, on_missing_support)
+    if n_jobs is not None and n_jobs > 1:
+        stmts = _deserialize_parallel(_stmts_from_json_chunk, json_in,
+                                      n_jobs, chunk_size)
+    else:
+        stmts = _stmts_from_json_chunk(json_in)
+    _resolve_supports(stmts, on_missing_support)
     return stmts
 
 
-def stmts_from_json_file(fname, format='json'):
+def stmts_from_json_file(fname, format='json', n_jobs=1, chunk_size=10000):
     """Return a list of statements loaded from a JSON file.
 
     Parameters
@@ -74,18 +86,31 @@ def stmts_from_json_file(fname, format='json'):
     format : Optional[str]
         One of 'json' to assume regular JSON formatting or
         'jsonl' assuming each statement is on a new line.
+    n_jobs : Optional[int]
+        The number of worker processes used to deserialize Statements, see
+        :py:func:`stmts_from_json`. For the 'jsonl' format, the lines
+        are also parsed in the worker processes. Default: 1
+    chunk_size : Optional[int]
+        The number of Statements deserialized by a worker process at a time
+        when `n_jobs` is larger than 1. Default: 10000
 
     Returns
     -------
     list[indra.statements.Statement]
         The list of INDRA Statements loaded from the JSOn file.
     """
-    with open(fname, 'r') as fh:
+    with _open_json_file(fname, 'r') as fh:
         if format == 'json':
-            return stmts_from_json(json.load(fh))
+            return stmts_from_json(json.load(fh), n_jobs=n_jobs,
+                                   chunk_size=chunk_size)
+        elif n_jobs is not None and n_jobs > 1:
+            stmts = _deserialize_parallel(_stmts_from_jsonl_chunk, fh,
+                                          n_jobs, chunk_size)
+            _resolve_supports(stmts)
+            return stmts
         else:
-            return stmts_from_json([json.loads(line)
-                                    for line in fh.readlines()])
+            return stmts_from_json(json.loads(line) for line in fh
+                                   if line.strip())
 
 
 def stmts_to_json_file(stmts, fname, format='json', **kwargs):
@@ -101,14 +126,496 @@ def stmts_to_json_file(stmts, fname, format='json', **kwargs):
         One of 'json' to use regular JSON with indent=1 formatting or
         'jsonl' to put each statement on a new line without indents.
     """
+    if format != 'json':
+        write_stmts_jsonl(stmts, fname, **kwargs)
+        return
     sj = stmts_to_json(stmts, **kwargs)
-    with open(fname, 'w') as fh:
-        if format == 'json':
-            json.dump(sj, fh, indent=1)
+    with _open_json_file(fname, 'w') as fh:
+        json.dump(sj, fh, indent=1)
+
+
+def iter_stmts_from_jsonl(fname, on_missing_support='handle',
+                          index_supports=True):
+    """Iterate over the Statements in a JSONL file one at a time.
+
+    Only a single Statement is held in memory at a time, which makes it
+    possible to process files that are too large to be loaded as a whole.
+    Files whose name ends with .gz are read as gzip-compressed files.
+
+    Since the Statements referenced in the `supports` and `supported_by`
+    lists are not kept in memory, their uuids are replaced with
+    :py:class:`Unresolved` Statement objects rather than references to the
+    Statements themselves. If `index_supports` is True, a first pass over the
+    file builds an index from the uuid of each Statement to its matches hash
+    so that each Unresolved object also carries the matches hash of the
+    Statement it refers to, and so that `on_missing_support` can distinguish
+    uuids of Statements which are in the file from ones that are not.
+
+    Parameters
+    ----------
+    fname : str
+        Path to the JSONL file to load statements from.
+    on_missing_support : Optional[str]
+        Handles the behavior when a uuid reference in `supports` or
+        `supported_by` is not the uuid of any Statement in the file, see
+        :py:func:`stmts_from_json` for the options. If `index_supports` is
+        False, all uuids are considered to be missing. Default: 'handle'
+    index_supports : Optional[bool]
+        If True, the file is read twice, the first time to index the uuids
+        of all the Statements in it. Default: True
+
+    Yields
+    ------
+    indra.statements.Statement
+        The INDRA Statements in the file, in order.
+    """
+    uuid_index = _get_jsonl_uuid_index(fname) if index_supports else {}
+    with _open_json_file(fname, 'r') as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            try:
+                st = Statement._from_json(json.loads(line))
+            except Exception as e:
+                logger.warning("Error creating statement: %s" % e)
+                continue
+            _promote_support_from_index(st.supports, uuid_index,
+                                        on_missing_support)
+            _promote_support_from_index(st.supported_by, uuid_index,
+                                        on_missing_support)
+            yield st
+
+
+def write_stmts_jsonl(stmts, fname, use_sbo=False, matches_fun=None):
+    """Write INDRA Statements into a JSONL file one at a time.
+
+    Statements are serialized and written one by one so that any iterable,
+    including a generator, can be written without the JSON of all the
+    Statements being held in memory. Files whose name ends with .gz are
+    written with gzip compression.
+
+    Parameters
+    ----------
+    stmts : iterable[indra.statements.Statement]
+        The INDRA Statements to serialize into the JSONL file.
+    fname : str
+        Path to the JSONL file to serialize Statements into.
+    use_sbo : Optional[bool]
+        If True, SBO annotations are added to each applicable element of the
+        JSON. Default: False
+    matches_fun : Optional[function]
+        A custom function which, if provided, is used to construct the
+        matches key which is then hashed and put into the JSON.
+        Default: None
+
+    Returns
+    -------
+    int
+        The number of Statements written.
+    """
+    count = 0
+    with _open_json_file(fname, 'w') as fh:
+        for st in stmts:
+            json.dump(st.to_json(use_sbo=use_sbo, matches_fun=matches_fun),
+                      fh)
+            fh.write('\n')
+            count += 1
+    return count
+
+
+def _open_json_file(fname, mode):
+    """Open a file for reading or writing text, decompressing gzip files."""
+    if fname.endswith('.gz'):
+        return gzip.open(fname, mode + 't', encoding='utf-8')
+    return open(fname, mode)
+
+
+def _get_jsonl_uuid_index(fname):
+    """Return a dict of the matches hash of each Statement by uuid."""
+    uuid_index = {}
+    with _open_json_file(fname, 'r') as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            json_stmt = json.loads(line)
+            stmt_uuid = json_stmt.get('id')
+            if stmt_uuid:
+                matches_hash = json_stmt.get('matches_hash')
+                uuid_index[stmt_uuid] = \
+                    int(matches_hash) if matches_hash else None
+    return uuid_index
+
+
+# The binary format starts with a file header made up of a magic string and
+# a format version. It is followed by any number of chunks, each of which
+# starts with a chunk header giving the number of Statements in the chunk and
+# the byte lengths of its metadata and body. The chunk header is followed by
+# fixed width columns that can be read without copying (the matches hash and
+# belief of each Statement, the offsets of each Statement in the decompressed
+# body and the type code of each Statement), the UTF-8 encoded JSON metadata
+# of the chunk (the list of Statement type names indexed by the type codes
+# and the uuids of the Statements) and finally the zlib-compressed body made
+# up of the compact JSON list of the Statements in the chunk, the JSON of
+# Statement i being at body[offsets[i]:offsets[i + 1] - 1] so that single
+# Statements can be decoded on their own. Chunks are padded so that the
+# columns of each chunk are 8-byte aligned.
+_BINARY_MAGIC = b'INDRASTB'
+_BINARY_VERSION = 1
+_BINARY_FILE_HEADER = struct.Struct('<8sII')
+_BINARY_CHUNK_HEADER = struct.Struct('<IIQ')
+
+
+def write_stmts_binary(stmts, fname, chunk_size=10000, use_sbo=False,
+                       matches_fun=None):
+    """Write INDRA Statements into a binary file in chunks.
+
+    The binary format is compact and fast to load, does not depend on the
+    Python classes being unpickled, and makes it possible to read the
+    matches hashes, types and beliefs of Statements without deserializing
+    them, see :py:class:`StatementBinaryReader`. Statements are serialized
+    and written one chunk at a time so that any iterable, including a
+    generator, can be written.
+
+    Parameters
+    ----------
+    stmts : iterable[indra.statements.Statement]
+        The INDRA Statements to serialize into the binary file.
+    fname : str
+        Path to the binary file to serialize Statements into.
+    chunk_size : Optional[int]
+        The number of Statements in each chunk of the file. Default: 10000
+    use_sbo : Optional[bool]
+        If True, SBO annotations are added to each applicable element of the
+        JSON of the Statements. Default: False
+    matches_fun : Optional[function]
+        A custom function which, if provided, is used to construct the
+        matches key which is then hashed and put into the file.
+        Default: None
+
+    Returns
+    -------
+    int
+        The number of Statements written.
+    """
+    count = 0
+    stmts = iter(stmts)
+    with open(fname, 'wb') as fh:
+        fh.write(_BINARY_FILE_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, 0))
+        while True:
+            chunk = list(itertools.islice(stmts, chunk_size))
+            if not chunk:
+                break
+            fh.write(_encode_binary_chunk(
+                [st.to_json(use_sbo=use_sbo, matches_fun=matches_fun)
+                 for st in chunk]))
+            count += len(chunk)
+    return count
+
+
+def stmts_from_binary_file(fname, on_missing_support='handle', n_jobs=1):
+    """Return a list of Statements loaded from a binary file.
+
+    Parameters
+    ----------
+    fname : str
+        Path to the binary file written by :py:func:`write_stmts_binary` to
+        load Statements from.
+    on_missing_support : Optional[str]
+        Handles the behavior when a uuid reference in `supports` or
+        `supported_by` is not the uuid of any Statement in the file, see
+        :py:func:`stmts_from_json` for the options. Default: 'handle'
+    n_jobs : Optional[int]
+        The number of worker processes used to deserialize Statements. If
+        larger than 1, chunks of the file are decompressed and deserialized
+        in parallel. Default: 1
+
+    Returns
+    -------
+    list[indra.statements.Statement]
+        The list of INDRA Statements loaded from the binary file.
+    """
+    with StatementBinaryReader(fname) as reader:
+        if n_jobs is not None and n_jobs > 1:
+            # The chunks are sent to the workers compressed, and are
+            # decompressed there
+            bodies = (reader._get_compressed_body(chunk)
+                      for chunk in range(len(reader._chunks)))
+            stmts = _deserialize_parallel(_stmts_from_compressed_chunks,
+                                          bodies, n_jobs, 1)
         else:
-            for json_stmt in sj:
-                json.dump(json_stmt, fh)
-                fh.write('\n')
+            bodies = (reader._get_body(chunk)
+                      for chunk in range(len(reader._chunks)))
+            # As in _deserialize_parallel, garbage collection over the
+            # Statements created so far would dominate the run time
+            gc_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                stmts = _stmts_from_binary_chunks(bodies)
+            finally:
+                if gc_enabled:
+                    gc.enable()
+    _resolve_supports(stmts, on_missing_support)
+    return stmts
+
+
+class StatementBinaryReader(object):
+    """Read Statements and their properties from a binary file on demand.
+
+    The file is memory-mapped, and the matches hashes, types and beliefs of
+    the Statements are read from it without deserializing the Statements.
+    Statements are only deserialized when they are accessed, one at a time
+    or chunk by chunk. The reader can be used as a context manager to close
+    the file when done.
+
+    Parameters
+    ----------
+    fname : str
+        Path to a binary file written by :py:func:`write_stmts_binary`.
+
+    Examples
+    --------
+    >>> with StatementBinaryReader('stmts.bin') as reader: # doctest: +SKIP
+    ...     keep = reader.get_beliefs() > 0.9
+    ...     stmts = [reader.get_statement(idx) for idx in keep.nonzero()[0]]
+    """
+    def __init__(self, fname):
+        self.fname = fname
+        self._fh = open(fname, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._fh.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be memory-mapped
+            self._mmap = b''
+        if len(self._mmap) < _BINARY_FILE_HEADER.size:
+            self.close()
+            raise InputError('%s is not an INDRA Statement binary file.'
+                             % fname)
+        magic, version, _ = _BINARY_FILE_HEADER.unpack_from(self._mmap, 0)
+        if magic != _BINARY_MAGIC or version != _BINARY_VERSION:
+            self.close()
+            raise InputError('%s is not an INDRA Statement binary file of '
+                             'version %d.' % (fname, _BINARY_VERSION))
+        self._chunks = []
+        self._chunk_starts = []
+        self._metadata = {}
+        # The most recently decompressed chunk body
+        self._body_cache = (None, None)
+        offset = _BINARY_FILE_HEADER.size
+        n_stmts = 0
+        while offset < len(self._mmap):
+            n, meta_len, body_len = \
+                _BINARY_CHUNK_HEADER.unpack_from(self._mmap, offset)
+            self._chunks.append((offset, n, meta_len, body_len))
+            self._chunk_starts.append(n_stmts)
+            n_stmts += n
+            offset += _binary_chunk_size(n, meta_len, body_len)
+        self._n_stmts = n_stmts
+
+    def __len__(self):
+        return self._n_stmts
+
+    def __iter__(self):
+        return self.iter_statements()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the file."""
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._fh.close()
+
+    def get_hashes(self):
+        """Return the matches hashes of the Statements in the file.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of the matches hash of each Statement. If the file has
+            a single chunk, the array is a read-only view of the file.
+        """
+        return self._get_column(0, numpy.int64)
+
+    def get_beliefs(self):
+        """Return the beliefs of the Statements in the file.
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of the belief of each Statement. If the file has a
+            single chunk, the array is a read-only view of the file.
+        """
+        return self._get_column(1, numpy.float64)
+
+    def get_types(self):
+        """Return the type names of the Statements in the file.
+
+        Returns
+        -------
+        list[str]
+            The name of the type of each Statement.
+        """
+        types = []
+        for chunk in range(len(self._chunks)):
+            type_names = self._get_metadata(chunk)['types']
+            types += [type_names[code] for code in
+                      self._get_chunk_column(chunk, 3, numpy.uint16)]
+        return types
+
+    def get_uuids(self):
+        """Return the uuids of the Statements in the file.
+
+        Returns
+        -------
+        list[str]
+            The uuid of each Statement.
+        """
+        uuids = []
+        for chunk in range(len(self._chunks)):
+            uuids += self._get_metadata(chunk)['uuids']
+        return uuids
+
+    def get_statement(self, idx):
+        """Return the Statement at a given position in the file.
+
+        Only the chunk containing the Statement is decompressed. The uuids
+        in the `supports` and `supported_by` lists of the Statement are
+        replaced with :py:class:`Unresolved` Statement objects.
+
+        Parameters
+        ----------
+        idx : int
+            The position of the Statement in the file.
+
+        Returns
+        -------
+        indra.statements.Statement
+            The deserialized Statement.
+        """
+        if idx < 0:
+            idx += self._n_stmts
+        if not 0 <= idx < self._n_stmts:
+            raise IndexError('Statement index out of range')
+        chunk = numpy.searchsorted(self._chunk_starts, idx, side='right') - 1
+        pos = idx - self._chunk_starts[chunk]
+        offsets = self._get_offsets(chunk)
+        body = self._get_body(chunk)
+        st = Statement._from_json(json.loads(
+            body[int(offsets[pos]):int(offsets[pos + 1]) - 1].decode('utf-8')))
+        _promote_support_from_index(st.supports, {})
+        _promote_support_from_index(st.supported_by, {})
+        return st
+
+    def iter_statements(self):
+        """Iterate over the Statements in the file one chunk at a time.
+
+        Only the Statements of a single chunk are held in memory at a time.
+        As with :py:func:`iter_stmts_from_jsonl`, the uuids in `supports`
+        and `supported_by` lists are replaced with :py:class:`Unresolved`
+        Statement objects.
+
+        Yields
+        ------
+        indra.statements.Statement
+            The INDRA Statements in the file, in order.
+        """
+        for chunk in range(len(self._chunks)):
+            for st in _stmts_from_binary_chunks([self._get_body(chunk)]):
+                _promote_support_from_index(st.supports, {})
+                _promote_support_from_index(st.supported_by, {})
+                yield st
+
+    def _get_column(self, column, dtype):
+        columns = [self._get_chunk_column(chunk, column, dtype)
+                   for chunk in range(len(self._chunks))]
+        if len(columns) == 1:
+            return columns[0]
+        return numpy.concatenate(columns) if columns \
+            else numpy.array([], dtype=dtype)
+
+    def _get_chunk_column(self, chunk, column, dtype):
+        offset, n, _, _ = self._chunks[chunk]
+        # The columns are in the order of the hashes, beliefs, body offsets
+        # and type codes, of which the body offsets have n + 1 entries
+        start = offset + _BINARY_CHUNK_HEADER.size + \
+            8 * (column * n + (1 if column > 2 else 0))
+        count = n + 1 if column == 2 else n
+        return numpy.frombuffer(self._mmap, dtype=dtype, count=count,
+                                offset=start)
+
+    def _get_offsets(self, chunk):
+        return self._get_chunk_column(chunk, 2, numpy.uint64)
+
+    def _get_metadata(self, chunk):
+        if chunk not in self._metadata:
+            offset, n, meta_len, _ = self._chunks[chunk]
+            start = offset + _binary_columns_end(n)
+            self._metadata[chunk] = \
+                json.loads(self._mmap[start:start + meta_len].decode('utf-8'))
+        return self._metadata[chunk]
+
+    def _get_body(self, chunk):
+        if self._body_cache[0] == chunk:
+            return self._body_cache[1]
+        body = zlib.decompress(self._get_compressed_body(chunk))
+        self._body_cache = (chunk, body)
+        return body
+
+    def _get_compressed_body(self, chunk):
+        offset, n, meta_len, body_len = self._chunks[chunk]
+        start = offset + _binary_columns_end(n) + meta_len
+        return self._mmap[start:start + body_len]
+
+
+def _binary_columns_end(n_stmts):
+    """Return the offset of the end of the columns from the chunk start."""
+    return _BINARY_CHUNK_HEADER.size + 8 * (3 * n_stmts + 1) + 2 * n_stmts
+
+
+def _binary_chunk_size(n_stmts, meta_len, body_len):
+    """Return the size of a chunk in bytes, including its padding."""
+    size = _binary_columns_end(n_stmts) + meta_len + body_len
+    return size + (-size % 8)
+
+
+def _encode_binary_chunk(json_stmts):
+    """Return the bytes of a binary file chunk of Statement jsons."""
+    type_codes = {}
+    hashes = numpy.zeros(len(json_stmts), dtype=numpy.int64)
+    beliefs = numpy.zeros(len(json_stmts), dtype=numpy.float64)
+    offsets = numpy.zeros(len(json_stmts) + 1, dtype=numpy.uint64)
+    types = numpy.zeros(len(json_stmts), dtype=numpy.uint16)
+    uuids = []
+    body = io.BytesIO()
+    body.write(b'[')
+    offsets[0] = 1
+    for idx, json_stmt in enumerate(json_stmts):
+        hashes[idx] = int(json_stmt.get('matches_hash') or 0)
+        beliefs[idx] = json_stmt.get('belief', 1.0)
+        types[idx] = type_codes.setdefault(json_stmt['type'],
+                                           len(type_codes))
+        uuids.append(json_stmt.get('id'))
+        if idx:
+            body.write(b',')
+        body.write(json.dumps(json_stmt,
+                              separators=(',', ':')).encode('utf-8'))
+        offsets[idx + 1] = body.tell() + 1
+    body.write(b']')
+    metadata = json.dumps({'types': list(type_codes),
+                           'uuids': uuids}).encode('utf-8')
+    compressed = zlib.compress(body.getvalue())
+    parts = [_BINARY_CHUNK_HEADER.pack(len(json_stmts), len(metadata),
+                                       len(compressed)),
+             hashes.tobytes(), beliefs.tobytes(), offsets.tobytes(),
+             types.tobytes(), metadata, compressed]
+    size = sum(len(part) for part in parts)
+    parts.append(b'\0' * (-size % 8))
+    return b''.join(parts)
 
 
 def stmts_to_json(stmts_in, use_sbo=False, matches_fun=None):
@@ -140,6 +647,69 @@ def stmts_to_json(stmts_in, use_sbo=False, matches_fun=None):
     return json_dict
 
 
+def _stmts_from_json_chunk(json_stmts):
+    """Return Statements deserialized from jsons without resolving supports.
+    """
+    stmts = []
+    for json_stmt in json_stmts:
+        try:
+            st = Statement._from_json(json_stmt)
+        except Exception as e:
+            logger.warning("Error creating statement: %s" % e)
+            continue
+        stmts.append(st)
+    return stmts
+
+
+def _stmts_from_jsonl_chunk(lines):
+    """Return Statements deserialized from JSONL lines."""
+    return _stmts_from_json_chunk(json.loads(line) for line in lines
+                                  if line.strip())
+
+
+def _stmts_from_binary_chunks(bodies):
+    """Return Statements deserialized from decompressed chunk bodies."""
+    stmts = []
+    for body in bodies:
+        stmts += _stmts_from_json_chunk(json.loads(body.decode('utf-8')))
+    return stmts
+
+
+def _stmts_from_compressed_chunks(bodies):
+    """Return Statements deserialized from compressed chunk bodies."""
+    return _stmts_from_binary_chunks(zlib.decompress(body) for body in bodies)
+
+
+def _deserialize_parallel(chunk_fun, items, n_jobs, chunk_size):
+    """Return Statements deserialized from chunks of items in a process pool.
+    """
+    items = iter(items)
+    chunks = iter(lambda: list(itertools.islice(items, chunk_size)), [])
+    stmts = []
+    # Unpickling the many objects making up the Statements of each chunk
+    # repeatedly triggers garbage collection over all the Statements
+    # received so far which would dominate the run time.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with multiprocessing.Pool(n_jobs) as pool:
+            # Chunks are returned in the order in which they were submitted
+            for chunk_stmts in pool.imap(chunk_fun, chunks):
+                stmts += chunk_stmts
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return stmts
+
+
+def _resolve_supports(stmts, on_missing_support='handle'):
+    """Replace support uuids with the Statements they refer to in place."""
+    uuid_dict = {st.uuid: st for st in stmts}
+    for st in stmts:
+        _promote_support(st.supports, uuid_dict, on_missing_support)
+        _promote_support(st.supported_by, uuid_dict, on_missing_support)
+
+
 def _promote_support(sup_list, uuid_dict, on_missing='handle'):
     """Promote the list of support-related uuids to Statements, if possible."""
     valid_handling_choices = ['handle', 'error', 'ignore']
@@ -160,6 +730,26 @@ def _promote_support(sup_list, uuid_dict, on_missing='handle'):
     return
 
 
+def _promote_support_from_index(sup_list, uuid_index, on_missing='handle'):
+    """Promote support-related uuids to Unresolved Statements using an index.
+    """
+    valid_handling_choices = ['handle', 'error', 'ignore']
+    if on_missing not in valid_handling_choices:
+        raise InputError('Invalid option for `on_missing_support`: \'%s\'\n'
+                         'Choices are: %s.'
+                         % (on_missing, str(valid_handling_choices)))
+    promoted = []
+    for uuid in sup_list:
+        if uuid in uuid_index:
+            promoted.append(Unresolved(uuid, shallow_hash=uuid_index[uuid]))
+        elif on_missing == 'handle':
+            promoted.append(Unresolved(uuid))
+        elif on_missing == 'error':
+            raise UnresolvedUuidError("Uuid %s not found in stmt jsons."
+                                      % uuid)
+    sup_list[:] = promoted
+
+
 def draw_stmt_graph(stmts):
     """Render the attributes of a list of Statements as directed graphs.
 
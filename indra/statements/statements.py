@@ -222,12 +222,15 @@ __all__ = [
 
     # Functions and values
     'stmts_from_json', 'get_unresolved_support_uuids', 'stmts_to_json',
-    'stmts_from_json_file', 'stmts_to_json_file', 'get_valid_residue',
+    'stmts_from_json_file', 'stmts_to_json_file', 'iter_stmts_from_jsonl',
+    'write_stmts_jsonl', 'write_stmts_binary', 'stmts_from_binary_file',
+    'StatementBinaryReader', 'get_valid_residue',
     'draw_stmt_graph', 'get_all_descendants','make_statement_camel',
     'amino_acids', 'amino_acids_reverse', 'activity_types',
     'modtype_to_modclass',
     'modclass_to_modtype', 'modtype_conditions', 'modtype_to_inverse',
-    'modclass_to_inverse', 'get_statement_by_name', 'make_hash', 'stmt_type',
+    'modclass_to_inverse', 'get_statement_by_name', 'make_hash', 'get_hashes',
+    'LEGACY_HASH_VERSION', 'FAST_HASH_VERSION', 'stmt_type',
     'default_ns_order', 'mk_str'
     ]
 
@@ -237,6 +240,7 @@ import uuid
 import logging
 import networkx
 import itertools
+import functools
 from copy import deepcopy
 from collections import OrderedDict as _o
 from .util import *
@@ -255,6 +259,16 @@ except NameError:  # Python 3
     basestring = str
 
 
+def _frozen_matches_key(matches_key):
+    """Wrap a matches_key method to return the key cached by freeze()."""
+    @functools.wraps(matches_key)
+    def wrapper(self):
+        if self._frozen_key is not None:
+            return self._frozen_key
+        return matches_key(self)
+    return wrapper
+
+
 class Statement(object):
     """The parent class of all statements.
 
@@ -272,6 +286,18 @@ class Statement(object):
     """
 
     _agent_order = NotImplemented
+    # The key cached by freeze(), None if the statement is not frozen
+    _frozen_key = None
+    # Hashes of versions other than the legacy one, keyed by
+    # (version, shallow), see get_hash
+    _hashes = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # The matches_key implemented by each Statement type is wrapped
+        # so that the key of frozen statements is not rebuilt
+        if 'matches_key' in cls.__dict__:
+            cls.matches_key = _frozen_matches_key(cls.__dict__['matches_key'])
 
     def __init__(self, evidence=None, supports=None, supported_by=None):
         if evidence is None:
@@ -296,10 +322,41 @@ class Statement(object):
     def matches_key(self):
         raise NotImplementedError("Method must be implemented in child class.")
 
+    def freeze(self):
+        """Compute the matches key of the statement once and cache it.
+
+        The agents of the statement are frozen along with it so that their
+        keys are also only built once. While a statement is frozen, its
+        `matches_key` (and that of its agents) is returned from the cache,
+        which makes repeated sorting, grouping and hashing of statements
+        cheaper. A frozen statement must not be modified; call
+        :py:meth:`unfreeze` before changing its agents or other attributes
+        that its key is built from. Copies made with
+        :py:meth:`make_generic_copy` inherit the cached key.
+        """
+        self._frozen_key = None
+        for agent in self.agent_list():
+            if agent is not None:
+                agent.freeze()
+        self._frozen_key = self.matches_key()
+
+    def unfreeze(self):
+        """Discard the cached matches key of the statement and its agents."""
+        self._frozen_key = None
+        for agent in self.agent_list():
+            if agent is not None:
+                agent.unfreeze()
+
+    @property
+    def is_frozen(self):
+        """True if the matches key of the statement is cached."""
+        return self._frozen_key is not None
+
     def matches(self, other):
         return self.matches_key() == other.matches_key()
 
-    def get_hash(self, shallow=True, refresh=False, matches_fun=None):
+    def get_hash(self, shallow=True, refresh=False, matches_fun=None,
+                 version=LEGACY_HASH_VERSION):
         """Get a hash for this Statement.
 
         There are two types of hash, "shallow" and "full". A shallow hash is
@@ -333,29 +390,60 @@ class Statement(object):
             A function which takes a Statement as argument and returns a string
             matches key which is then hashed. If not provided the Statement's
             built-in matches_key method is used.
+        version : Optional[int]
+            The version of the hash function. By default, the legacy md5-based
+            hash (LEGACY_HASH_VERSION) is returned, which is the one stored
+            in databases and JSON. With FAST_HASH_VERSION, a faster
+            blake2b-based hash is returned, which is cached separately and
+            differs from the legacy one.
 
         Returns
         -------
         hash : int
             A long integer hash.
         """
+        stmt_hash = None if refresh else \
+            self._get_cached_hash(shallow, version)
+        if stmt_hash is None:
+            stmt_hash = make_hash(self._get_hash_key(shallow, matches_fun),
+                                  14 if shallow else 16, version)
+            self._set_cached_hash(shallow, version, stmt_hash)
+        return stmt_hash
+
+    def _get_hash_key(self, shallow=True, matches_fun=None):
+        """Return the string from which the shallow or full hash is made."""
         if shallow:
-            if not hasattr(self, '_shallow_hash') or self._shallow_hash is None\
-                    or refresh:
-                if not matches_fun:
-                    matches_key = self.matches_key()
-                else:
-                    matches_key = matches_fun(self)
-                self._shallow_hash = make_hash(matches_key, 14)
-            ret = self._shallow_hash
+            return matches_fun(self) if matches_fun else self.matches_key()
+        ev_mk_list = sorted([ev.matches_key() for ev in self.evidence])
+        return self.matches_key() + str(ev_mk_list)
+
+    def _get_cached_hash(self, shallow, version):
+        """Return a cached hash of the given version or None."""
+        if version == LEGACY_HASH_VERSION:
+            return getattr(self, '_shallow_hash' if shallow else '_full_hash',
+                           None)
+        elif self._hashes is None:
+            return None
+        return self._hashes.get((version, shallow))
+
+    def _set_cached_hash(self, shallow, version, stmt_hash):
+        """Cache a hash of the given version."""
+        if version == LEGACY_HASH_VERSION:
+            if shallow:
+                self._shallow_hash = stmt_hash
+            else:
+                self._full_hash = stmt_hash
+            # The legacy hash is (re)made when the Statement may have
+            # changed, so cached hashes of other versions may be stale
+            if self._hashes:
+                self._hashes = {key: val for key, val in self._hashes.items()
+                                if key[1] != shallow}
         else:
-            if not hasattr(self, '_full_hash') or self._full_hash is None \
-                    or refresh:
-                ev_mk_list = sorted([ev.matches_key() for ev in self.evidence])
-                self._full_hash = \
-                    make_hash(self.matches_key() + str(ev_mk_list), 16)
-            ret = self._full_hash
-        return ret
+            # Hashes of other versions are kept in a separate dict so that
+            # the legacy attributes are unaffected
+            if self._hashes is None:
+                self._hashes = {}
+            self._hashes[(version, shallow)] = stmt_hash
 
     def _tag_evidence(self):
         """Set all the Evidence stmt_tag to my deep matches-key hash."""
@@ -602,6 +690,8 @@ class Statement(object):
             kwargs.pop(attr, None)
         my_hash = kwargs.pop('_full_hash', None)
         my_shallow_hash = kwargs.pop('_shallow_hash', None)
+        my_frozen_key = kwargs.pop('_frozen_key', None)
+        my_hashes = kwargs.pop('_hashes', None)
         for attr in self._agent_order:
             attr_value = kwargs.get(attr)
             if isinstance(attr_value, list):
@@ -609,6 +699,12 @@ class Statement(object):
         new_instance = self.__class__(**kwargs)
         new_instance._full_hash = my_hash
         new_instance._shallow_hash = my_shallow_hash
+        if my_frozen_key is not None:
+            new_instance._frozen_key = my_frozen_key
+        if my_hashes is not None:
+            # The copy has no evidence so only shallow hashes carry over
+            new_instance._hashes = {key: val for key, val in my_hashes.items()
+                                    if key[1]}
         return new_instance
 
     def flip_polarity(self, agent_idx=None):
@@ -2643,6 +2739,78 @@ def get_unresolved_support_uuids(stmts):
             if isinstance(s, Unresolved)}
 
 
+def get_hashes(stmts, shallow=True, refresh=False, matches_fun=None,
+               version=LEGACY_HASH_VERSION, n_threads=None):
+    """Return the hashes of a list of Statements.
+
+    This is equivalent to calling
+    :py:meth:`get_hash <indra.statements.statements.Statement.get_hash>` on
+    each Statement, and the hashes are cached on the Statements in the same
+    way, but the digests of all the keys can be computed in a pool of
+    threads. Since hashlib releases the GIL while digesting long strings,
+    this mostly speeds up full hashes, whose keys include the evidence of
+    each Statement. The keys themselves are always made in the calling
+    thread.
+
+    Parameters
+    ----------
+    stmts : list[indra.statements.Statement]
+        The Statements to hash.
+    shallow : Optional[bool]
+        Choose between the shallow and full hashes, see
+        :py:meth:`get_hash <indra.statements.statements.Statement.get_hash>`.
+        Default: True
+    refresh : Optional[bool]
+        If True, all hashes are recalculated, otherwise, cached hashes are
+        reused. Default: False
+    matches_fun : Optional[function]
+        A function which takes a Statement as argument and returns a string
+        matches key which is then hashed. If not provided the Statement's
+        built-in matches_key method is used.
+    version : Optional[int]
+        The version of the hash function, either LEGACY_HASH_VERSION (md5)
+        or FAST_HASH_VERSION (blake2b). Default: LEGACY_HASH_VERSION
+    n_threads : Optional[int]
+        The number of threads in which the keys are digested. By default,
+        they are digested in the calling thread.
+
+    Returns
+    -------
+    list[int]
+        The hashes of the Statements, in order.
+    """
+    stmts = list(stmts)
+    n_bytes = 14 if shallow else 16
+    hashes = [None if refresh else stmt._get_cached_hash(shallow, version)
+              for stmt in stmts]
+    missing = [idx for idx, stmt_hash in enumerate(hashes)
+               if stmt_hash is None]
+    keys = [stmts[idx]._get_hash_key(shallow, matches_fun) for idx in missing]
+    if n_threads and n_threads > 1 and len(keys) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        # Each thread digests a contiguous chunk of keys to keep the
+        # overhead of the pool low
+        chunk_size = -(-len(keys) // n_threads)
+        chunks = [keys[i:i + chunk_size]
+                  for i in range(0, len(keys), chunk_size)]
+        with ThreadPoolExecutor(n_threads) as executor:
+            new_hashes = [stmt_hash for chunk_hashes in
+                          executor.map(_make_hashes, chunks,
+                                       itertools.repeat(n_bytes),
+                                       itertools.repeat(version))
+                          for stmt_hash in chunk_hashes]
+    else:
+        new_hashes = _make_hashes(keys, n_bytes, version)
+    for idx, stmt_hash in zip(missing, new_hashes):
+        stmts[idx]._set_cached_hash(shallow, version, stmt_hash)
+        hashes[idx] = stmt_hash
+    return hashes
+
+
+def _make_hashes(keys, n_bytes, version):
+    return [make_hash(key, n_bytes, version) for key in keys]
+
+
 def stmt_type(obj, mk=True):
     """Return standardized, backwards compatible object type String.
 
@@ -3,14 +3,97 @@ from builtins import dict, str
 from future.utils import python_2_unicode_compatible
 
 
-__all__ = ['make_hash']
+__all__ = ['make_hash', 'LEGACY_HASH_VERSION', 'FAST_HASH_VERSION']
 
 
-from hashlib import md5
+import logging
+from types import MappingProxyType
+from hashlib import md5, blake2b
 
 
-def make_hash(s, n_bytes):
-    """Make the hash from a matches key."""
-    raw_h = int(md5(s.encode('utf-8')).hexdigest()[:n_bytes], 16)
+logger = logging.getLogger(__name__)
+
+
+#: The version of the md5-based hashes of Statements, which are the ones
+#: stored in databases and serialized into JSON.
+LEGACY_HASH_VERSION = 0
+#: The version of the blake2b-based hashes of Statements, which are faster
+#: to compute but different from the legacy ones.
+FAST_HASH_VERSION = 1
+
+
+def make_hash(s, n_bytes, version=LEGACY_HASH_VERSION):
+    """Make the hash from a matches key.
+
+    Parameters
+    ----------
+    s : str
+        The string to hash.
+    n_bytes : int
+        The number of hex digits of the digest used for the hash.
+    version : Optional[int]
+        The version of the hash function, either LEGACY_HASH_VERSION (md5)
+        or FAST_HASH_VERSION (blake2b). Default: LEGACY_HASH_VERSION
+
+    Returns
+    -------
+    int
+        A signed integer hash.
+    """
+    if version == LEGACY_HASH_VERSION:
+        raw_h = int(md5(s.encode('utf-8')).hexdigest()[:n_bytes], 16)
+    elif version == FAST_HASH_VERSION:
+        digest_size = (n_bytes + 1) // 2
+        raw_h = int.from_bytes(blake2b(s.encode('utf-8'),
+                                       digest_size=digest_size).digest(),
+                               'big')
+        # Keep the same number of hex digits as the legacy hash so that the
+        # hashes have the same range
+        raw_h >>= 8 * digest_size - 4 * n_bytes
+    else:
+        raise ValueError('Unknown hash version: %s' % version)
     # Make it a signed int.
-    return 16**n_bytes//2 - raw_h
\ No newline at end of file
+    return 16**n_bytes//2 - raw_h
+
+
+class _Slotted(object):
+    """A base class for compact objects that store attributes in slots.
+
+    Objects with slots have no attribute dict, which makes them smaller, but
+    also changes how they are pickled by default. This base class pickles the
+    attributes listed in `_state_attrs` as a dict, which is how the same
+    objects were pickled before they had slots, so that pickles remain
+    compatible in both directions. For code that inspects the attributes
+    of these objects through `__dict__`, a read-only view of the same dict
+    is provided.
+    """
+    __slots__ = ()
+    _state_attrs = ()
+
+    @property
+    def __dict__(self):
+        return MappingProxyType(self.__getstate__())
+
+    def __getstate__(self):
+        return {attr: getattr(self, attr) for attr in self._state_attrs}
+
+    def __setstate__(self, state):
+        # The default state of objects with slots is a tuple of the
+        # attribute dict and the dict of slot values
+        if isinstance(state, tuple):
+            dict_state, slots_state = state
+            state = dict(dict_state or {}, **(slots_state or {}))
+        # Attributes missing from old pickles default to None
+        for cls in type(self).__mro__:
+            for attr in getattr(cls, '__slots__', ()):
+                object.__setattr__(self, attr, None)
+        dropped = []
+        for attr, value in state.items():
+            try:
+                setattr(self, attr, value)
+            except AttributeError:
+                dropped.append(attr)
+        if dropped:
+            logger.warning('Dropped unknown attributes %s when unpickling '
+                           'a %s' % (', '.join(sorted(dropped)),
+                                     type(self).__name__))
@@ -3,6 +3,7 @@ from copy import deepcopy
 from collections import namedtuple
 from indra.statements import *
 from indra.tools import assemble_corpus as ac
+from indra.tools.statement_table import StatementTable
 from indra.ontology.world import world_ontology
 
 a = Agent('a', db_refs={'HGNC': '1234', 'TEXT': 'a'})
@@ -796,3 +797,48 @@ def test_filter_large_complexes():
     stmts = ac.filter_complexes_by_size([stmt1, stmt2, stmt3],
                                         members_allowed=2)
     assert len(stmts) == 2
+
+
+def test_statement_table_filters():
+    stmts = [st1, st2, st3, st4, st5, st6, st7, st8, st9, st10, st12, st13,
+             st16, st17, st18, st19, st20, st21,
+             Complex([a, e], evidence=[Evidence(source_api='reach')])]
+    filters = [
+        (ac.filter_by_type, {'stmt_type': Phosphorylation}),
+        (ac.filter_by_type, {'stmt_type': 'Complex', 'invert': True}),
+        (ac.filter_grounded_only, {}),
+        (ac.filter_genes_only, {}),
+        (ac.filter_genes_only, {'specific_only': True}),
+        (ac.filter_belief, {'belief_cutoff': 0.75}),
+        (ac.filter_gene_list, {'gene_list': ['a', 'b'], 'policy': 'one'}),
+        (ac.filter_gene_list, {'gene_list': ['a', 'b'], 'policy': 'all',
+                               'invert': True}),
+        (ac.filter_concept_names, {'name_list': ['a'], 'policy': 'all'}),
+        (ac.filter_by_db_refs, {'namespace': 'HGNC', 'values': ['1234'],
+                                'policy': 'one', 'invert': True}),
+        (ac.filter_by_db_refs, {'namespace': 'UP', 'values': ['056'],
+                                'policy': 'all', 'match_suffix': True}),
+        (ac.filter_evidence_source, {'source_apis': ['assertion', 'reach'],
+                                     'policy': 'all'}),
+        (ac.filter_evidence_source, {'source_apis': ['reach'],
+                                     'policy': 'none'}),
+    ]
+    for filter_fun, kwargs in filters:
+        stmts_out = filter_fun(stmts, **kwargs)
+        table = filter_fun(ac.make_statement_table(stmts), **kwargs)
+        assert isinstance(table, StatementTable)
+        assert table.statements == stmts_out, (filter_fun, kwargs)
+        assert table.evidence_count.tolist() == \
+            [len(st.evidence) for st in stmts_out]
+
+    # Filters can be chained and the table can be dumped like a list
+    table = ac.filter_by_type(StatementTable(stmts), Phosphorylation)
+    table = ac.filter_grounded_only(table)
+    table = ac.filter_evidence_source(table, ['assertion'])
+    assert table.statements == [st1, st4, st5, st7, st8, st9, st10]
+    ac.dump_statements(table, '_test.pkl')
+    stmts_loaded = ac.load_statements('_test.pkl')
+    assert [st.get_hash() for st in stmts_loaded] == \
+        [st.get_hash() for st in table]
+    df = table.to_dataframe()
+    assert df['assertion'].tolist() == [1] * 7
@@ -126,6 +126,45 @@ def test_hierarchy_probs4():
     assert_close_enough(st4.belief, 1-0.35*(0.05 + 0.3*0.3*0.3))
 
 
+def test_hierarchy_probs_deep():
+    # A chain of refinements deeper than the recursion limit
+    be = BeliefEngine()
+    stmts = [Phosphorylation(None, Agent('a%d' % idx), evidence=[ev1])
+             for idx in range(1200)]
+    for generic, specific in zip(stmts[:-1], stmts[1:]):
+        generic.supports = [specific]
+        specific.supported_by = [generic]
+    be.set_hierarchy_probs(stmts)
+    assert_close_enough(stmts[-1].belief, 1-0.35)
+    assert_close_enough(stmts[0].belief, 1-(0.05 + 0.3**1200))
+    package = _get_belief_package(stmts[0], lambda st: st.matches_key())
+    assert [pkg.statement_key for pkg in package] == \
+        [st.matches_key() for st in stmts[::-1]]
+
+
+def test_score_statements_batch():
+    ev_neg = Evidence(source_api='reach', epistemics={'negated': True})
+    ev_sub = Evidence(source_api='biopax',
+                      annotations={'source_sub_id': 'pc11'})
+    stmts = [Phosphorylation(None, Agent('a'), evidence=[ev1]),
+             Phosphorylation(None, Agent('b'), evidence=[ev1, ev2, ev1]),
+             Phosphorylation(None, Agent('c'), evidence=[ev_neg, ev4]),
+             Phosphorylation(None, Agent('d'), evidence=[ev_neg]),
+             Phosphorylation(None, Agent('e'), evidence=[]),
+             Phosphorylation(None, Agent('f'), evidence=[ev_sub, ev3])]
+    extra_evidences = [[], [ev4], None, [ev2], [ev1], [ev_neg]]
+    for scorer in [SimpleScorer(),
+                   SimpleScorer(subtype_probs={'biopax': {'pc11': 0.01}})]:
+        beliefs = scorer.score_statements(stmts, extra_evidences)
+        for st, extra_evidence, belief in zip(stmts, extra_evidences,
+                                              beliefs):
+            assert abs(scorer.score_statement(st, extra_evidence) -
+                       belief) < 1e-12
+        beliefs = scorer.score_statements(stmts)
+        for st, belief in zip(stmts, beliefs):
+            assert abs(scorer.score_statement(st) - belief) < 1e-12
+
+
 def test_get_belief_package1():
     matches_fun = lambda st: st.matches_key()
     st1 = Phosphorylation(None, Agent('a'), evidence=[ev1])
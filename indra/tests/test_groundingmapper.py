@@ -3,6 +3,8 @@ from indra.preassembler.grounding_mapper import GroundingMapper
 from indra.preassembler.grounding_mapper.analysis import *
 from indra.preassembler.grounding_mapper.gilda import ground_statements, \
     get_gilda_models, ground_statement
+from indra.preassembler.grounding_mapper import gilda
+from indra.preassembler.grounding_mapper.disambiguate import DisambManager
 from indra.statements import Agent, Phosphorylation, Complex, Inhibition, \
     Evidence, BoundCondition
 from indra.util import unicode_strs
@@ -558,3 +560,164 @@ def test_none_text_corner_case():
     stmt = Phosphorylation(None, ag)
     res = gm.map_stmts([stmt])
     assert res[0].sub.name == 'x', res[0]
+
+
+def test_grounding_cache():
+    g_map = {'ERK1': {'TEXT': 'ERK1', 'UP': 'P28482'}}
+    gm = GroundingMapper(g_map, agent_map={}, ignores=['xyz'],
+                         misgrounding_map={}, use_adeft=False)
+    # Agents with the same db_refs but different names
+    stmts = [Phosphorylation(Agent('ERK1', db_refs={'TEXT': 'ERK1'}),
+                             Agent('x%d' % i, db_refs={'TEXT': 'abc'}))
+             for i in range(3)]
+    mapped_stmts = gm.map_stmts(stmts)
+    assert gm.cache_misses == 2, gm.cache_misses
+    assert gm.cache_hits == 4, gm.cache_hits
+    for idx, stmt in enumerate(mapped_stmts):
+        assert stmt.enz.name == 'MAPK1', stmt.enz
+        assert stmt.enz.db_refs['UP'] == 'P28482', stmt.enz.db_refs
+        assert stmt.sub.name == 'x%d' % idx, stmt.sub
+    # Mapped Agents don't share db_refs
+    assert mapped_stmts[0].enz.db_refs is not mapped_stmts[1].enz.db_refs
+    # The mapped statements are the same as without a cache
+    gm_nocache = GroundingMapper(g_map, agent_map={}, ignores=['xyz'],
+                                 misgrounding_map={}, use_adeft=False,
+                                 cache_size=0)
+    assert [st.to_json() for st in gm_nocache.map_stmts(stmts)] == \
+        [st.to_json() for st in mapped_stmts]
+    assert gm_nocache.cache_hits == gm_nocache.cache_misses == 0
+    gm.clear_cache()
+    assert gm.cache_hits == gm.cache_misses == 0
+
+
+def test_map_stmts_parallel():
+    g_map = {'ERK1': {'TEXT': 'ERK1', 'UP': 'P28482'}}
+    gm = GroundingMapper(g_map, agent_map={}, ignores=['xyz'],
+                         misgrounding_map={}, use_adeft=False)
+    stmts = [Phosphorylation(Agent('ERK1', db_refs={'TEXT': 'ERK1'}),
+                             Agent('x', db_refs={'TEXT': 'abc'})),
+             Phosphorylation(None, Agent('xyz', db_refs={'TEXT': 'xyz'})),
+             Phosphorylation(None, Agent('x', db_refs={'TEXT': 'abc'}))] * 3
+    mapped_stmts = gm.map_stmts(stmts)
+    assert len(mapped_stmts) == 6, mapped_stmts
+    # Statements that mapping doesn't change are not copied
+    assert mapped_stmts[-1] is stmts[-1]
+    assert mapped_stmts[0] is not stmts[0]
+    gm_parallel = GroundingMapper(g_map, agent_map={}, ignores=['xyz'],
+                                  misgrounding_map={}, use_adeft=False)
+    parallel_stmts = gm_parallel.map_stmts(stmts, n_jobs=2, batch_size=2)
+    assert [st.to_json() for st in parallel_stmts] == \
+        [st.to_json() for st in mapped_stmts]
+    # The groundings mapped by the workers are added to the cache
+    assert gm_parallel._grounding_cache == gm._grounding_cache
+    assert gm_parallel.cache_misses >= gm.cache_misses
+
+
+def test_disamb_text_cache():
+    import os
+    import pickle
+    import tempfile
+    pmid = '12345'
+    stmt = Phosphorylation(None, Agent('ER', db_refs={'TEXT': 'ER'}),
+                           evidence=[Evidence(pmid=pmid, text='sentence')])
+    with tempfile.TemporaryDirectory() as tmpdir:
+        text_cache_path = os.path.join(tmpdir, 'texts.pkl')
+        with open(text_cache_path, 'wb') as fh:
+            pickle.dump({'abstracts': {pmid: 'An abstract about ER.'},
+                         'db_texts': {}}, fh)
+        dm = DisambManager(text_cache_path=text_cache_path)
+        # The cached abstract is used without a request to PubMed
+        assert dm._get_text_for_grounding(stmt, 'ER') == \
+            'An abstract about ER.'
+        dm.prefetch_texts([(stmt, 'ER')])
+        with open(text_cache_path, 'rb') as fh:
+            assert pickle.load(fh)['abstracts'] == \
+                {pmid: 'An abstract about ER.'}
+
+
+def test_ground_statements_local_service():
+    import json
+    import threading
+    from socketserver import ThreadingMixIn
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    requests_received = []
+
+    # A stand-in for the Gilda web service which grounds any text to a
+    # fixed HGNC ID
+    class GildaHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):
+            query = json.loads(self.rfile.read(
+                int(self.headers['Content-Length'])))
+            requests_received.append((query['text'], query['context']))
+            results = [] if query['text'] == 'xyz' else \
+                [{'term': {'db': 'HGNC', 'id': '6871'}, 'score': 0.9}]
+            body = json.dumps(results).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+        daemon_threads = True
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GildaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    service_url = gilda.grounding_service_url
+    gilda.grounding_service_url = 'http://127.0.0.1:%d/' % \
+        server.server_address[1]
+    gilda.clear_grounding_cache()
+    try:
+        stmts = [Phosphorylation(Agent('x', db_refs={'TEXT': 'erk'}),
+                                 Agent('y', db_refs={'TEXT': 'xyz'}),
+                                 evidence=[Evidence(text='erk xyz')])
+                 for _ in range(10)]
+        grounded_stmts = ground_statements(stmts, n_threads=2)
+        # Each unique text and context is only sent once
+        assert sorted(requests_received) == [('erk', 'erk xyz'),
+                                             ('xyz', 'erk xyz')], \
+            requests_received
+        assert all(stmt.enz.db_refs['HGNC'] == '6871'
+                   for stmt in grounded_stmts)
+        assert all(stmt.sub.name == 'y' for stmt in grounded_stmts)
+        # The original statements are not changed
+        assert all(stmt.enz.name == 'x' for stmt in stmts)
+        ground_statements(stmts)
+        assert len(requests_received) == 2
+    finally:
+        server.shutdown()
+        gilda.grounding_service_url = service_url
+        gilda.clear_grounding_cache()
+
+
+def test_get_groundings_full_cache():
+    texts_grounded = []
+
+    def get_grounding(txt, context, mode):
+        texts_grounded.append(txt)
+        return {'TEST': txt.upper()}, []
+
+    get_grounding_orig = gilda._get_grounding
+    cache_size = gilda.grounding_cache_size
+    gilda._get_grounding = get_grounding
+    gilda.grounding_cache_size = 3
+    gilda.clear_grounding_cache()
+    try:
+        gilda.get_groundings([('a', None)])
+        # Caching the new groundings evicts the cached one of a, which is
+        # still returned
+        groundings = gilda.get_groundings([('a', None), ('b', None),
+                                           ('c', None), ('d', None)],
+                                          n_threads=1)
+        assert [grounding for grounding, _ in groundings] == \
+            [{'TEST': 'A'}, {'TEST': 'B'}, {'TEST': 'C'}, {'TEST': 'D'}]
+        assert texts_grounded == ['a', 'b', 'c', 'd']
+    finally:
+        gilda._get_grounding = get_grounding_orig
+        gilda.grounding_cache_size = cache_size
+        gilda.clear_grounding_cache()
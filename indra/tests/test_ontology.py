@@ -327,3 +327,113 @@ def test_world_ontology_add_entry():
     ont.add_entry(new_node, examples=['floods'])
     assert ont.isa('WM', new_node, 'WM', nat_dis)
     ont_yml = ont.dump_yml_str()
+
+
+def test_compiled_ontology():
+    import tempfile
+    from indra.ontology.compiled import CompiledOntology, compile_ontology
+    path = tempfile.mkdtemp()
+    compile_ontology(bio_ontology, path)
+    ont = CompiledOntology(path)
+    assert ont.isa('HGNC', '1097', 'FPLX', 'RAF')
+    assert not ont.isa('FPLX', 'RAF', 'HGNC', '1097')
+    assert ont.partof('FPLX', 'HIF_alpha', 'FPLX', 'HIF')
+    assert ont.isa_or_partof('HGNC', '9385', 'FPLX', 'AMPK')
+    for ns, id in [('HGNC', '1097'), ('FPLX', 'RAF'), ('UP', 'P15056'),
+                   ('FPLX', 'HIF_alpha'), ('HGNC', 'xxx')]:
+        assert sorted(ont.get_parents(ns, id)) == \
+            sorted(bio_ontology.get_parents(ns, id))
+        assert sorted(ont.get_children(ns, id)) == \
+            sorted(bio_ontology.get_children(ns, id))
+        assert sorted(ont.get_mappings(ns, id)) == \
+            sorted(bio_ontology.get_mappings(ns, id))
+        assert ont.get_name(ns, id) == bio_ontology.get_name(ns, id)
+    assert ont.map_to('HGNC', '1097', 'UP') == ('UP', 'P15056')
+    assert ont.get_id_from_name('HGNC', 'BRAF') == ('HGNC', '1097')
+    assert ont.get_id_from_name('HGNC', 'xxx') is None
+
+
+def test_transitive_closure_index():
+    from indra.ontology import IndraOntology
+    from indra.ontology.closure import TransitiveClosure
+
+    class TestOntology(IndraOntology):
+        def initialize(self):
+            self._initialized = True
+
+    ont = TestOntology()
+    ont.initialize()
+    # A tree with a node that has two parents and a partof cycle
+    ont.add_edges_from([('X:a', 'X:b', {'type': 'isa'}),
+                        ('X:b', 'X:c', {'type': 'isa'}),
+                        ('X:d', 'X:b', {'type': 'isa'}),
+                        ('X:d', 'X:e', {'type': 'partof'}),
+                        ('X:e', 'X:f', {'type': 'partof'}),
+                        ('X:f', 'X:e', {'type': 'partof'}),
+                        ('X:g', 'X:c', {'type': 'xref'})])
+    nodes = [ont.get_ns_id(node) for node in ont.nodes]
+    rels = [{'isa'}, {'partof'}, {'isa', 'partof'}]
+    expected = {(tuple(rel), e1, e2): ont.isrel(*e1, *e2, rels=rel)
+                for rel in rels for e1 in nodes for e2 in nodes}
+    parents = {node: sorted(ont.get_parents(*node)) for node in nodes}
+    top = {node: sorted(ont.get_top_level_parents(*node)) for node in nodes}
+    ont._build_transitive_closure()
+    assert isinstance(ont.transitive_closure, TransitiveClosure)
+    for (rel, e1, e2), value in expected.items():
+        assert ont.isrel(*e1, *e2, rels=set(rel)) == value, (rel, e1, e2)
+    for node in nodes:
+        assert sorted(ont.get_parents(*node)) == parents[node]
+        assert sorted(ont.get_top_level_parents(*node)) == top[node]
+    assert ont.isa('X', 'a', 'X', 'c')
+    assert ont.isa_or_partof('X', 'd', 'X', 'f')
+    assert not ont.isa('X', 'd', 'X', 'f')
+    assert not ont.isa('X', 'g', 'X', 'c')
+    assert not ont.isa('X', 'a', 'X', 'xxx')
+    assert ont.get_top_level_parents('X', 'a') == [('X', 'c')]
+
+
+def test_virtual_ontology_cache():
+    import time
+    from indra.ontology.virtual.ontology import TtlLruCache
+    cache = TtlLruCache(maxsize=2, ttl=0.5)
+    cache.set('a', 1)
+    cache.set('b', None)
+    assert 'b' in cache
+    # A cached None is told apart from a missing entry
+    assert cache.get('b', 'missing') is None
+    assert cache.get('x', 'missing') == 'missing'
+    assert cache.get('a') == 1
+    # b is now the least recently used entry and is evicted
+    cache.set('c', 3)
+    assert 'b' not in cache
+    assert cache.get('c') == 3
+    time.sleep(0.6)
+    assert 'a' not in cache
+    assert cache.get('c') is None
+    assert len(cache) == 0
+
+
+def test_virtual_ontology_get_id_from_name_batch():
+    from indra.ontology.virtual import VirtualOntology
+    ontology = VirtualOntology('http://localhost:8082')
+    requests_sent = []
+
+    # Like the original, this only sends a request if there are queries
+    def send_batch(endpoint, queries, **kwargs):
+        if queries:
+            requests_sent.append((endpoint, list(queries)))
+        return [['HGNC', '6871'] if name == 'MAPK1' else None
+                for _, name in queries]
+
+    ontology._send_batch = send_batch
+    names = [('HGNC', 'MAPK1'), ('HGNC', 'xyz'), ('HGNC', 'MAPK1')]
+    assert ontology.get_id_from_name_batch(names) == \
+        [['HGNC', '6871'], None, ['HGNC', '6871']]
+    assert requests_sent == [('get_id_from_name_batch',
+                              [('HGNC', 'MAPK1'), ('HGNC', 'xyz')])]
+    # The results, including None, are cached for single lookups too
+    assert ontology.get_id_from_name('HGNC', 'xyz') is None
+    assert ontology.get_id_from_name('HGNC', 'MAPK1') == ['HGNC', '6871']
+    assert ontology.get_id_from_name_batch(names[:2]) == \
+        [['HGNC', '6871'], None]
+    assert len(requests_sent) == 1
@@ -1,7 +1,12 @@
 import os
+import pickle
+import tempfile
 
 from indra.preassembler import Preassembler, render_stmt_graph, \
-    flatten_evidence, flatten_stmts, bio_ontology_refinement_filter
+    flatten_evidence, flatten_stmts, bio_ontology_refinement_filter, \
+    get_flattened_evidence_refs
+from indra.preassembler.external import iter_combined_duplicates, \
+    combine_duplicates_from_shards
 from indra.sources import reach
 from indra.statements import *
 from indra.ontology.bio import bio_ontology
@@ -32,6 +37,90 @@ def test_duplicates_copy():
     assert len(stmts[1].evidence) == 1
 
 
+def test_duplicates_fast_hash():
+    src = Agent('SRC', db_refs={'HGNC': '11283'})
+    ras = Agent('RAS', db_refs={'FA': '03663'})
+    st1 = Phosphorylation(src, ras, evidence=[Evidence(text='Text 1')])
+    st2 = Phosphorylation(src, ras, evidence=[Evidence(text='Text 2')])
+    for stmt in (st1, st2):
+        for shallow in (True, False):
+            stmt.get_hash(shallow=shallow, version=FAST_HASH_VERSION)
+    pa = Preassembler(bio_ontology, stmts=[st1, st2])
+    new_stmt = pa.combine_duplicates()[0]
+    for shallow in (True, False):
+        assert new_stmt.get_hash(shallow=shallow,
+                                 version=FAST_HASH_VERSION) == \
+            new_stmt.get_hash(shallow=shallow, refresh=True,
+                              version=FAST_HASH_VERSION)
+    assert new_stmt.get_hash(shallow=False, version=FAST_HASH_VERSION) != \
+        st1.get_hash(shallow=False, version=FAST_HASH_VERSION)
+
+
+def test_duplicates_no_copy():
+    src = Agent('SRC', db_refs = {'HGNC': '11283'})
+    ras = Agent('RAS', db_refs = {'FA': '03663'})
+    st1 = Phosphorylation(src, ras, evidence=[Evidence(text='Text 1')])
+    st2 = Phosphorylation(src, ras, evidence=[Evidence(text='Text 2')])
+    stmts = [st1, st2]
+    pa = Preassembler(bio_ontology, stmts=stmts, copy_stmts=False)
+    pa.add_statements([st1])
+    assert len(stmts) == 2
+    assert pa.stmts[0] is st1 and pa.stmts[2] is st1
+    pa.combine_duplicates()
+    assert len(pa.unique_stmts) == 1
+    uniq_evs = pa.unique_stmts[0].evidence
+    assert len(uniq_evs) == 2
+    # The evidences are shared with the statements passed in
+    assert {id(ev) for ev in uniq_evs} == \
+        {id(st1.evidence[0]), id(st2.evidence[0])}
+    assert st1.evidence[0].annotations['prior_uuids'] == [st1.uuid]
+
+
+def test_external_duplicates():
+    src = Agent('SRC', db_refs={'HGNC': '11283', 'TEXT': 'Src'})
+    src2 = Agent('SRC', db_refs={'HGNC': '11283', 'TEXT': 'c-Src'})
+    ras = Agent('RAS', db_refs={'FA': '03663'})
+    stmts = [Phosphorylation(src, ras, evidence=[Evidence(text='Text 1')]),
+             Dephosphorylation(src, ras,
+                               evidence=[Evidence(text='Text 2')]),
+             Phosphorylation(src2, ras, evidence=[Evidence(text='Text 1')]),
+             Phosphorylation(src, ras, evidence=[Evidence(text='Text 3')]),
+             Phosphorylation(src, ras, 'S', evidence=[Evidence(text='T4')])]
+    pa = Preassembler(bio_ontology, stmts=stmts)
+    expected = {st.get_hash(): st for st in pa.combine_duplicates()}
+    # Runs of two statements are spilled to disk and merged
+    uniq_stmts = list(iter_combined_duplicates(stmts, run_size=2))
+    assert len(uniq_stmts) == 3
+    for st in uniq_stmts:
+        exp = expected[st.get_hash()]
+        assert st.get_hash(shallow=False) == exp.get_hash(shallow=False)
+        # Duplicates are merged in input order, evidence annotations are the
+        # same as for in-memory preassembly
+        assert [ev.text for ev in st.evidence] == \
+            sorted(ev.text for ev in exp.evidence)
+        assert _ev_annotations(st) == _ev_annotations(exp)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        shards = [os.path.join(tmpdir, 'stmts1.pkl'),
+                  os.path.join(tmpdir, 'stmts2.jsonl')]
+        with open(shards[0], 'wb') as fh:
+            pickle.dump(stmts[:2], fh)
+        stmts_to_json_file(stmts[2:], shards[1], format='jsonl')
+        out_fname = os.path.join(tmpdir, 'unique.jsonl')
+        assert combine_duplicates_from_shards(shards, out_fname,
+                                              tmp_dir=tmpdir, run_size=2) == 3
+        assert {st.get_hash() for st in
+                stmts_from_json_file(out_fname, format='jsonl')} == \
+            set(expected)
+        assert sorted(os.listdir(tmpdir)) == ['stmts1.pkl', 'stmts2.jsonl',
+                                              'unique.jsonl']
+
+
+def _ev_annotations(stmt):
+    return {(ev.text, tuple(ev.annotations['prior_uuids']),
+             tuple(ev.annotations['agents']['raw_text']))
+            for ev in stmt.evidence}
+
+
 def test_duplicates_sorting():
     mc = ModCondition('phosphorylation')
     map2k1_1 = Agent('MAP2K1', mods=[mc])
@@ -555,6 +644,57 @@ def test_flatten_evidence_hierarchy_supports():
     assert set([e.text for e in supporting_stmt.evidence]) == {'foo', 'bar'}
 
 
+def test_flatten_evidence_diamond():
+    # st4 is supported by st2 and st3, which are both supported by st1
+    stmts = [Phosphorylation(Agent('BRAF'), Agent('MAP2K1'),
+                             evidence=[Evidence(text='ev%d' % idx)])
+             for idx in range(1, 5)]
+    st1, st2, st3, st4 = stmts
+    st2.supported_by = [st1]
+    st3.supported_by = [st1]
+    st4.supported_by = [st2, st3]
+    refs = get_flattened_evidence_refs([st4, st2])
+    assert [[(stmts.index(ref_stmt), ev_idx) for ref_stmt, ev_idx in r]
+            for r in refs] == [[(3, 0), (1, 0), (0, 0), (2, 0)],
+                               [(1, 0), (0, 0)]]
+    flattened = flatten_evidence([st4, st2])
+    assert [ev.text for ev in flattened[0].evidence] == \
+        ['ev4', 'ev2', 'ev1', 'ev3']
+    assert [ev.annotations['support_type'] for ev in
+            flattened[0].evidence] == \
+        ['direct', 'supported_by', 'supported_by', 'supported_by']
+    # The copy of the evidence of st1 is shared by st2 and st4
+    assert flattened[0].evidence[2] is flattened[1].evidence[1]
+    assert flattened[0].evidence[2] is not \
+        flattened[1].supported_by[0].evidence[0]
+    # The original statements are not changed
+    assert len(st4.evidence) == 1
+    assert 'support_type' not in st4.evidence[0].annotations
+
+
+def test_flatten_evidence_dedup():
+    # st1 has an evidence with the same matches key as that of st2
+    st1 = Phosphorylation(Agent('BRAF'), Agent('MAP2K1'),
+                          evidence=[Evidence(text='foo'),
+                                    Evidence(text='bar')])
+    st2 = Phosphorylation(Agent('BRAF'), Agent('MAP2K1'), 'S',
+                          evidence=[Evidence(text='foo')])
+    st2.supported_by = [st1]
+    # By default, the evidence is kept and annotated as direct
+    flattened = flatten_evidence([st2])
+    assert [(ev.text, ev.annotations['support_type'])
+            for ev in flattened[0].evidence] == \
+        [('foo', 'direct'), ('foo', 'direct'), ('bar', 'supported_by')]
+    assert len(get_flattened_evidence_refs([st2])[0]) == 3
+    # With dedup_evidence, it is left out
+    flattened = flatten_evidence([st2], dedup_evidence=True)
+    assert [(ev.text, ev.annotations['support_type'])
+            for ev in flattened[0].evidence] == \
+        [('foo', 'direct'), ('bar', 'supported_by')]
+    assert get_flattened_evidence_refs([st2], dedup_evidence=True) == \
+        [[(st2, 0), (st1, 1)]]
+
+
 def test_flatten_stmts():
     st1 = Phosphorylation(Agent('MAP3K5'), Agent('RAF1'), 'S', '338')
     st2 = Phosphorylation(None, Agent('RAF1'), 'S', '338')
@@ -715,6 +855,29 @@ def test_find_contradicts_refinement():
                                       {st1.uuid, st3.uuid})
 
 
+def test_find_contradicts_candidates():
+    ras = Agent('RAS', db_refs={'FPLX': 'RAS'})
+    kras = Agent('KRAS', db_refs={'HGNC': '6407'})
+    braf = Agent('BRAF', db_refs={'HGNC': '1097'})
+    st1 = Phosphorylation(Agent('x'), ras, 'S')
+    st2 = Dephosphorylation(Agent('x'), kras, 'S')
+    st3 = Dephosphorylation(Agent('x'), kras, 'T')
+    st4 = Dephosphorylation(Agent('x'), braf, 'S')
+    st5 = Dephosphorylation(None, kras, 'S')
+    st6 = Activation(braf, kras)
+    st7 = Inhibition(braf, ras)
+    st8 = Inhibition(kras, braf)
+    pa = Preassembler(bio_ontology, [st1, st2, st3, st4, st5, st6, st7, st8])
+    contradicts = pa.find_contradicts()
+    assert [(s1.uuid, s2.uuid) for s1, s2 in contradicts] == \
+        [(st1.uuid, st2.uuid), (st6.uuid, st7.uuid)]
+    # Only statements with related agents and the same site are compared
+    assert pa._contradiction_counter == 2
+    contradicts = pa.find_contradicts(poolsize=2)
+    assert [(s1.uuid, s2.uuid) for s1, s2 in contradicts] == \
+        [(st1.uuid, st2.uuid), (st6.uuid, st7.uuid)]
+
+
 def test_preassemble_related_complex():
     ras = Agent('RAS', db_refs={'FPLX': 'RAS'})
     kras = Agent('KRAS', db_refs={'HGNC': '6407'})
@@ -1086,3 +1249,125 @@ def test_refinement_filters():
     pa.combine_related(filters=[filter_all, filter_empty,
                                 bio_ontology_refinement_filter])
     assert pa._comparison_counter == 0, pa._comparison_counter
+
+
+def test_parallel_refinements():
+    ras = Agent('RAS', db_refs={'FPLX': 'RAS'})
+    kras = Agent('KRAS', db_refs={'HGNC': '6407'})
+    hras = Agent('HRAS', db_refs={'HGNC': '5173'})
+    stmts = []
+    for ag in [ras, kras, hras]:
+        stmts += [Phosphorylation(Agent('x'), ag),
+                  Phosphorylation(Agent('x'), ag, 'S'),
+                  Phosphorylation(Agent('x'), ag, 'S', '218'),
+                  Activation(Agent('x'), ag),
+                  Activation(Agent('x'), ag, 'kinase')]
+    pa = Preassembler(bio_ontology, stmts)
+    serial_stmts = pa.combine_related(return_toplevel=False)
+    serial_counter = pa._comparison_counter
+
+    pa = Preassembler(bio_ontology, stmts)
+    parallel_stmts = pa.combine_related(return_toplevel=False, poolsize=2,
+                                        size_cutoff=1)
+    assert pa._comparison_counter == serial_counter
+
+    def get_hierarchy(stmts):
+        return [(st.get_hash(), [s.get_hash() for s in st.supports],
+                 [s.get_hash() for s in st.supported_by]) for st in stmts]
+    assert get_hierarchy(serial_stmts) == get_hierarchy(parallel_stmts)
+
+
+def test_distributed_preassembly():
+    import tempfile
+    from indra.preassembler.distributed import DistributedPreassembler
+    from indra.tools.assemble_corpus import run_preassembly
+    ras = Agent('RAS', db_refs={'FPLX': 'RAS'})
+    kras = Agent('KRAS', db_refs={'HGNC': '6407'})
+    hras = Agent('HRAS', db_refs={'HGNC': '5173'})
+    stmts = []
+    for idx, ag in enumerate([ras, kras, hras, ras, kras]):
+        ev = [Evidence(source_api='reach', text='%d' % idx)]
+        stmts += [Phosphorylation(Agent('x'), ag, evidence=ev),
+                  Phosphorylation(Agent('x'), ag, 'S', evidence=ev),
+                  Activation(Agent('x'), ag, evidence=ev),
+                  Activation(Agent('x'), ag, 'kinase', evidence=ev)]
+    expected = run_preassembly(stmts, return_toplevel=False)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        dpa = DistributedPreassembler(bio_ontology, tmpdir, poolsize=2,
+                                      n_partitions=3)
+        uniq_stmts = dpa.run(stmts, return_toplevel=False)
+
+    def get_hierarchy(stmts):
+        return [(st.get_hash(), st.belief, len(st.evidence),
+                 [s.get_hash() for s in st.supports],
+                 [s.get_hash() for s in st.supported_by]) for st in stmts]
+    assert len(uniq_stmts) == 12
+    assert get_hierarchy(uniq_stmts) == get_hierarchy(expected)
+
+
+def test_incremental_preassembly():
+    import tempfile
+    from indra.belief import BeliefEngine
+    from indra.preassembler.incremental import IncrementalPreassembler
+    ras = Agent('RAS', db_refs={'FPLX': 'RAS'})
+    kras = Agent('KRAS', db_refs={'HGNC': '6407'})
+    hras = Agent('HRAS', db_refs={'HGNC': '5173'})
+    stmts = []
+    for idx, ag in enumerate([ras, kras, hras, ras]):
+        stmts += [Phosphorylation(Agent('x'), ag,
+                                  evidence=[Evidence(source_api='reach',
+                                                     text='%d' % idx)]),
+                  Phosphorylation(Agent('x'), ag, 'S',
+                                  evidence=[Evidence(source_api='reach',
+                                                     text='%d' % idx)]),
+                  Phosphorylation(None, ag,
+                                  evidence=[Evidence(source_api='reach',
+                                                     text='%d' % idx)])]
+    pa = Preassembler(bio_ontology, stmts)
+    full_stmts = pa.combine_related(return_toplevel=False)
+    BeliefEngine().set_hierarchy_probs(full_stmts)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        state_path = os.path.join(tmpdir, 'state.pkl')
+        ip = IncrementalPreassembler(bio_ontology, state_path=state_path)
+        ip.add_statements(stmts[:3])
+        ip.save()
+        ip = IncrementalPreassembler(bio_ontology, state_path=state_path)
+        ip.add_statements(stmts[3:])
+        inc_stmts = ip.get_statements(return_toplevel=False)
+
+    def get_hierarchy(stmts):
+        return {st.get_hash(): (sorted(s.get_hash() for s in st.supports),
+                                sorted(s.get_hash()
+                                       for s in st.supported_by),
+                                len(st.evidence), round(st.belief, 10))
+                for st in stmts}
+    assert get_hierarchy(full_stmts) == get_hierarchy(inc_stmts)
+
+
+def test_ontology_refinement_filter_parent_lookups():
+    from indra.preassembler import ontology_refinement_filter_by_stmt_type
+
+    class CountingOntology:
+        def __init__(self):
+            self.calls = 0
+
+        def get_parents(self, ns, id):
+            self.calls += 1
+            return bio_ontology.get_parents(ns, id)
+
+    ras = Agent('RAS', db_refs={'FPLX': 'RAS'})
+    kras = Agent('KRAS', db_refs={'HGNC': '6407'})
+    stmts = [Phosphorylation(kras, ras), Phosphorylation(ras, kras),
+             Phosphorylation(kras, kras), Phosphorylation(ras, ras),
+             Phosphorylation(kras, kras, 'S')]
+    stmts_by_hash = {st.get_hash(): st for st in stmts}
+    ontology = CountingOntology()
+    stmts_to_compare = \
+        ontology_refinement_filter_by_stmt_type(stmts_by_hash, ontology)
+    # Parents are only looked up once per distinct agent key
+    assert ontology.calls == 2, ontology.calls
+    assert stmts_to_compare[stmts[2].get_hash()] == \
+        {st.get_hash() for st in stmts[:2] + stmts[3:]}
+    # RAS can't refine KRAS in any role
+    assert stmts_to_compare[stmts[3].get_hash()] == set()
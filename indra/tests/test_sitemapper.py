@@ -1,7 +1,10 @@
+import os
+import tempfile
 from protmapper import MappedSite
 from indra.statements import *
 from indra.util import unicode_strs
-from indra.preassembler.sitemapper import default_mapper as sm, MappedStatement
+from indra.preassembler.sitemapper import default_mapper as sm, \
+    MappedStatement, SiteMapper, default_site_map
 from indra.preassembler.sitemapper import _valid_position_str
 
 
@@ -233,6 +236,37 @@ def test_valid_pos_str():
     assert _valid_position_str('') is False
 
 
+def test_site_map_parallel_and_cache():
+    mapk1_invalid, mapk3_invalid = get_invalid_mapks()
+    st1 = ActiveForm(Agent('MAPK1', mods=mapk1_invalid.mods,
+                           db_refs={'UP': 'P28482'}), 'kinase', True)
+    st2 = Phosphorylation(mapk1_invalid, mapk3_invalid, 'Y', '203')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        site_cache_path = os.path.join(tmpdir, 'sites.pkl')
+        site_mapper = SiteMapper(default_site_map,
+                                 site_cache_path=site_cache_path)
+        valid, mapped = site_mapper.map_sites([st1, st2], n_jobs=2)
+        assert not valid
+        assert len(mapped) == 2
+        validate_mapk1(mapped[0].mapped_stmt.agent)
+        assert mapped[1].mapped_stmt.position == '204'
+        assert ('P28482', 'T', '183') in site_mapper._mapped_sites
+        assert os.path.exists(site_cache_path)
+        # A new SiteMapper reuses the sites mapped by the first one
+        site_mapper = SiteMapper(default_site_map,
+                                 site_cache_path=site_cache_path)
+        assert len(site_mapper._mapped_sites) == 4
+        valid_cached, mapped_cached = site_mapper.map_sites([st1, st2])
+        assert all(ms.mapped_stmt.matches(ms_cached.mapped_stmt)
+                   for ms, ms_cached in zip(mapped, mapped_cached))
+        assert len(mapped_cached) == 2
+        # The cache isn't used with different mapping options
+        site_mapper = SiteMapper(default_site_map,
+                                 site_cache_path=site_cache_path,
+                                 do_isoform_mapping=False)
+        assert not site_mapper._mapped_sites
+
+
 def get_invalid_mapks():
     """A handy function for getting the invalid MAPK agents we want."""
     mapk1_invalid = Agent('MAPK1',
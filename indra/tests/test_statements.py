@@ -178,6 +178,34 @@ def test_matches_key_bound():
     assert unicode_strs((hras1, hras2))
 
 
+def test_frozen_matches_key():
+    braf = Agent('BRAF', bound_conditions=[BoundCondition(Agent('HRAS'))])
+    mek = Agent('MAP2K1', db_refs={'HGNC': '6840'})
+    st = Phosphorylation(braf, mek, 'S', '222')
+    key = st.matches_key()
+    agent_keys = (mek.matches_key(), mek.entity_matches_key(),
+                  mek.state_matches_key())
+    st.freeze()
+    assert st.is_frozen and braf.is_frozen and mek.is_frozen
+    assert braf.bound_conditions[0].agent.is_frozen
+    assert st.matches_key() == key
+    assert (mek.matches_key(), mek.entity_matches_key(),
+            mek.state_matches_key()) == agent_keys
+    # Copies inherit the cached key
+    assert st.make_generic_copy().is_frozen
+    # Changes made while frozen are only reflected after unfreezing
+    mek.mods.append(ModCondition('phosphorylation', 'S', '218'))
+    assert st.matches_key() == key
+    st.unfreeze()
+    assert not st.is_frozen and not mek.is_frozen
+    assert not braf.bound_conditions[0].agent.is_frozen
+    assert st.matches_key() != key
+    assert mek.matches_key() != agent_keys[0]
+    st.freeze()
+    assert st.matches_key() == st.make_generic_copy(deeply=True).matches_key()
+    st.unfreeze()
+
+
 def test_not_matches_bound():
     hras1 = Agent('HRAS',
         bound_conditions=[BoundCondition(Agent('BRAF'), True)])
@@ -2049,3 +2077,46 @@ def test_real_agent_list():
     agents = Phosphorylation(None, x).real_agent_list()
     assert len(agents) == 1
     assert agents[0] == x
+
+
+def test_get_hashes():
+    stmts = [Phosphorylation(Agent('MAP2K1'), Agent('MAPK1'),
+                             evidence=[Evidence(source_api='reach',
+                                                text='text %d' % i)])
+             for i in range(3)] + \
+        [Activation(Agent('BRAF'), Agent('MAP2K1'))]
+    legacy_shallow = [make_hash(st.matches_key(), 14) for st in stmts]
+    for n_threads in (None, 2):
+        for shallow in (True, False):
+            hashes = get_hashes(stmts, shallow=shallow, refresh=True,
+                                n_threads=n_threads)
+            assert hashes == [st.get_hash(shallow=shallow, refresh=True)
+                              for st in stmts]
+            fast_hashes = get_hashes(stmts, shallow=shallow, refresh=True,
+                                     version=FAST_HASH_VERSION,
+                                     n_threads=n_threads)
+            assert fast_hashes == \
+                [st.get_hash(shallow=shallow, refresh=True,
+                             version=FAST_HASH_VERSION) for st in stmts]
+            assert fast_hashes != hashes
+    # The legacy hashes are unaffected by the fast ones
+    assert [st.get_hash() for st in stmts] == legacy_shallow
+    assert stmts[0].get_hash() == stmts[1].get_hash()
+    assert stmts[0].get_hash(version=FAST_HASH_VERSION) == \
+        stmts[1].get_hash(version=FAST_HASH_VERSION)
+    assert stmts[0].get_hash(shallow=False, version=FAST_HASH_VERSION) != \
+        stmts[1].get_hash(shallow=False, version=FAST_HASH_VERSION)
+    # Shallow hashes of both versions are carried over to generic copies
+    copy = stmts[0].make_generic_copy()
+    assert copy.get_hash(version=FAST_HASH_VERSION) == \
+        stmts[0].get_hash(version=FAST_HASH_VERSION)
+    assert (FAST_HASH_VERSION, False) not in copy._hashes
+    for shallow, n_bytes in ((True, 14), (False, 16)):
+        for stmt_hash in get_hashes(stmts, shallow=shallow,
+                                    version=FAST_HASH_VERSION):
+            assert abs(stmt_hash) <= 16**n_bytes // 2
+
+
+@raises(ValueError)
+def test_make_hash_unknown_version():
+    make_hash('abc', 14, version=100)
@@ -1,8 +1,11 @@
 from __future__ import absolute_import, print_function, unicode_literals
 from builtins import dict, str
 import json
+import pickle
+import operator
 import datetime
 import jsonschema
+from nose.tools import assert_raises
 from indra.statements import *
 from .test_json_schema import schema
 
@@ -384,3 +387,151 @@ def test_file_serialization_json_lines():
     stmts_to_json_file([stmt], 'test_indra_stmts.json', format='jsonl')
     stmts = stmts_from_json_file('test_indra_stmts.json', format='jsonl')
     assert stmts[0].matches(stmt)
+
+
+def test_jsonl_streaming():
+    stmts = [Gap(Agent('A%d' % i), Agent('B%d' % i), evidence=[ev])
+             for i in range(3)]
+    __make_support_link(stmts[0], stmts[1])
+    __make_support_link(stmts[2], stmts[1])
+    for fname in ['test_indra_stmts.jsonl', 'test_indra_stmts.jsonl.gz']:
+        # Writing from a generator works
+        assert write_stmts_jsonl((stmt for stmt in stmts[1:]), fname) == 2
+        stmts_in = list(iter_stmts_from_jsonl(fname))
+        assert [s.uuid for s in stmts_in] == [s.uuid for s in stmts[1:]]
+        assert all(s_in.matches(s) for s_in, s in zip(stmts_in, stmts[1:]))
+        # Supports are Unresolved, with a hash if they are in the file
+        missing, present = stmts_in[0].supported_by
+        assert isinstance(missing, Unresolved)
+        assert missing.uuid == stmts[0].uuid
+        assert missing._shallow_hash is None
+        assert isinstance(present, Unresolved)
+        assert present.uuid == stmts[2].uuid
+        assert present.get_hash() == stmts[2].get_hash()
+        assert stmts_in[1].supports[0].get_hash() == stmts[1].get_hash()
+        stmts_in = list(iter_stmts_from_jsonl(fname, 'ignore'))
+        assert [s.uuid for s in stmts_in[0].supported_by] == [stmts[2].uuid]
+        try:
+            list(iter_stmts_from_jsonl(fname, 'error'))
+            assert False, "Failed to error on a missing support uuid."
+        except UnresolvedUuidError:
+            pass
+        stmts_in = list(iter_stmts_from_jsonl(fname, index_supports=False))
+        assert stmts_in[1].supports[0]._shallow_hash is None
+
+
+def test_stmts_from_json_parallel():
+    stmts = [Gap(Agent('A%d' % i), Agent('B%d' % i), evidence=[ev])
+             for i in range(10)]
+    for stmt in stmts[1:]:
+        __make_support_link(stmts[0], stmt)
+    stmts_json = stmts_to_json(stmts[1:])
+    for on_missing in ['handle', 'ignore']:
+        serial = stmts_from_json(stmts_json, on_missing)
+        parallel = stmts_from_json(stmts_json, on_missing, n_jobs=2,
+                                   chunk_size=3)
+        assert [s.uuid for s in parallel] == [s.uuid for s in serial]
+        assert all(s1.equals(s2) for s1, s2 in zip(serial, parallel))
+        assert [[sup.uuid for sup in s.supported_by] for s in parallel] == \
+            [[sup.uuid for sup in s.supported_by] for s in serial]
+    try:
+        stmts_from_json(stmts_json, 'error', n_jobs=2, chunk_size=3)
+        assert False, "Failed to error when passing partial set of stmts."
+    except UnresolvedUuidError:
+        pass
+    # Supports between Statements in different chunks are resolved
+    write_stmts_jsonl(stmts, 'test_indra_stmts.jsonl')
+    stmts_in = stmts_from_json_file('test_indra_stmts.jsonl', format='jsonl',
+                                    n_jobs=2, chunk_size=3)
+    assert [s.uuid for s in stmts_in] == [s.uuid for s in stmts]
+    assert all(sup is stmts_in[0] for s in stmts_in[1:]
+               for sup in s.supported_by)
+
+
+def test_compact_evidence_serialization():
+    annotations = {'found_by': 'Phosphorylation_syntax_1a_noun',
+                   'agents': {'coords': [[0, 4], [15, 21]]}}
+    ev1 = Evidence(source_api='reach', pmid='12345', text='A binds B.',
+                   annotations=annotations)
+    ev2 = Evidence(source_api='reach', pmid='12345', text='A binds B.',
+                   annotations=annotations)
+    ev2.compact()
+    assert isinstance(ev2._annotations, bytes)
+    assert ev2._epistemics is None
+    assert ev1.equals(ev2)
+    assert ev2.to_json() == ev1.to_json()
+    ev3 = pickle.loads(pickle.dumps(ev2))
+    assert isinstance(ev2._annotations, bytes)
+    assert ev3.annotations == annotations
+    assert ev3.epistemics == {}
+    assert ev3.text_refs == {'PMID': '12345'}
+    # Annotations that can't round trip through JSON are not encoded
+    ev4 = Evidence(source_api='trips', annotations={'coords': (0, 4)})
+    ev4.compact()
+    assert ev4.annotations == {'coords': (0, 4)}
+
+
+def test_slotted_pickle():
+    agent = Agent('BRAF', mods=[ModCondition('phosphorylation', 'S', '365')],
+                  mutations=[MutCondition('600', 'V', 'E')],
+                  activity=ActivityCondition('kinase', True),
+                  bound_conditions=[BoundCondition(Agent('YWHAB'))],
+                  location='cytoplasm', db_refs={'HGNC': '1097'})
+    stmt = Phosphorylation(agent, Agent('MAP2K1'), evidence=[ev])
+    # The attributes are in slots, with a read-only dict view of them
+    assert agent.__dict__['location'] == 'cytoplasm'
+    assert ev.__dict__['text'] == ev.text
+    assert_raises(TypeError, operator.setitem, agent.__dict__, 'name',
+                  'RAF1')
+    stmt2 = pickle.loads(pickle.dumps(stmt))
+    assert stmt2.get_hash() == stmt.get_hash()
+    assert stmt2.evidence[0].equals(ev)
+    agent2 = stmt2.enz
+    assert agent2.location == 'cytoplasm'
+    assert agent2.activity.equals(agent.activity)
+    assert agent2.bound_conditions[0].agent.name == 'YWHAB'
+    # Pickles of objects made before they had slots store a state dict
+    mc = ModCondition.__new__(ModCondition)
+    mc.__setstate__({'mod_type': 'phosphorylation', 'residue': 'S',
+                     'position': '365', 'is_modified': True})
+    assert mc.equals(agent.mods[0])
+    ev2 = Evidence.__new__(Evidence)
+    ev2.__setstate__({'source_api': 'bel', 'source_id': None,
+                      'pmid': '12345', 'text': 'This is the evidence.',
+                      'annotations': {}, 'epistemics': {'direct': True}})
+    assert ev2.equals(ev)
+    assert ev2.context is None and ev2.stmt_tag is None
+
+
+def test_stmts_binary():
+    stmts = [Gap(Agent('A%d' % i), Agent('B%d' % i), evidence=[ev])
+             for i in range(10)]
+    for stmt in stmts[1:]:
+        __make_support_link(stmts[0], stmt)
+    stmts[3].belief = 0.5
+    fname = 'test_indra_stmts.bin'
+    assert write_stmts_binary(iter(stmts), fname, chunk_size=3) == 10
+    for n_jobs in [1, 2]:
+        stmts_in = stmts_from_binary_file(fname, n_jobs=n_jobs)
+        assert [s.uuid for s in stmts_in] == [s.uuid for s in stmts]
+        assert all(s1.equals(s2) for s1, s2 in zip(stmts, stmts_in))
+        assert all(sup is stmts_in[0] for s in stmts_in[1:]
+                   for sup in s.supported_by)
+    with StatementBinaryReader(fname) as reader:
+        assert len(reader) == 10
+        assert reader.get_hashes().tolist() == [s.get_hash() for s in stmts]
+        assert reader.get_beliefs().tolist() == [1] * 3 + [0.5] + [1] * 6
+        assert reader.get_types() == ['Gap'] * 10
+        assert reader.get_uuids() == [s.uuid for s in stmts]
+        stmt = reader.get_statement(4)
+        assert stmt.equals(stmts[4])
+        assert isinstance(stmt.supported_by[0], Unresolved)
+        assert stmt.supported_by[0].uuid == stmts[0].uuid
+        assert reader.get_statement(-1).equals(stmts[-1])
+        assert [s.uuid for s in reader] == [s.uuid for s in stmts]
+    stmts_to_json_file(stmts, 'test_indra_stmts.json')
+    try:
+        StatementBinaryReader('test_indra_stmts.json')
+        assert False, "Failed to error on a file in another format."
+    except InputError:
+        pass
@@ -9,6 +9,7 @@ except ImportError:
     # Python 3
     import pickle
 import logging
+import numpy
 from collections import defaultdict
 from copy import deepcopy, copy
 from indra.statements import *
@@ -20,6 +21,7 @@ from indra.databases import hgnc_client
 from indra.ontology.bio import bio_ontology
 from indra.ontology.world import world_ontology
 from indra.preassembler import Preassembler, flatten_evidence
+from indra.tools.statement_table import StatementTable
 
 
 logger = logging.getLogger(__name__)
@@ -42,8 +44,10 @@ def dump_statements(stmts_in, fname, protocol=4):
         Default: 4
     """
     logger.info('Dumping %d statements into %s...' % (len(stmts_in), fname))
+    stmts = stmts_in.statements if isinstance(stmts_in, StatementTable) \
+        else stmts_in
     with open(fname, 'wb') as fh:
-        pickle.dump(stmts_in, fh, protocol=protocol)
+        pickle.dump(stmts, fh, protocol=protocol)
     return stmts_in
 
 
@@ -314,7 +318,8 @@ def merge_deltas(stmts_in):
 
 @register_pipeline
 def map_sequence(stmts_in, do_methionine_offset=True,
-                 do_orthology_mapping=True, do_isoform_mapping=True, **kwargs):
+                 do_orthology_mapping=True, do_isoform_mapping=True,
+                 n_jobs=None, **kwargs):
     """Map sequences using the SiteMapper.
 
     Parameters
@@ -343,6 +348,9 @@ def map_sequence(stmts_in, do_methionine_offset=True,
         SITEMAPPER_CACHE_PATH, defined in your INDRA config or the environment.
         If False, no cache is used. For more details on the cache, see the
         SiteMapper class definition.
+    n_jobs : Optional[int]
+        The number of worker processes in which the unique sites of the
+        statements are mapped. By default, sites are mapped in this process.
     save : Optional[str]
         The name of a pickle file to save the results (stmts_out) into.
 
@@ -358,7 +366,7 @@ def map_sequence(stmts_in, do_methionine_offset=True,
                     do_methionine_offset=do_methionine_offset,
                     do_orthology_mapping=do_orthology_mapping,
                     do_isoform_mapping=do_isoform_mapping)
-    valid, mapped = sm.map_sites(stmts_in)
+    valid, mapped = sm.map_sites(stmts_in, n_jobs=n_jobs)
     correctly_mapped_stmts = []
     for ms in mapped:
         correctly_mapped = all([mm.has_mapping() for mm in ms.mapped_mods])
@@ -380,7 +388,7 @@ def run_preassembly(stmts_in, return_toplevel=True, poolsize=None,
                     flatten_evidence=False, flatten_evidence_collect_from=None,
                     normalize_equivalences=False, normalize_opposites=False,
                     normalize_ns='WM', run_refinement=True, filters=None,
-                    **kwargs):
+                    copy_stmts=True, **kwargs):
     """Run preassembly on a list of statements.
 
     Parameters
@@ -394,11 +402,10 @@ def run_preassembly(stmts_in, return_toplevel=True, poolsize=None,
     poolsize : Optional[int]
         The number of worker processes to use to parallelize the
         comparisons performed by the function. If None (default), no
-        parallelization is performed. NOTE: Parallelization is only
-        available on Python 3.4 and above.
+        parallelization is performed.
     size_cutoff : Optional[int]
-        Groups with size_cutoff or more statements are sent to worker
-        processes, while smaller groups are compared in the parent process.
+        Shards with size_cutoff or more comparisons are sent to worker
+        processes, while smaller shards are compared in the parent process.
         Default value is 100. Not relevant when parallelization is not
         used.
     belief_scorer : Optional[indra.belief.BeliefScorer]
@@ -439,6 +446,12 @@ def run_preassembly(stmts_in, return_toplevel=True, poolsize=None,
         of possible refinements where the keys are statement hashes
         and the values are sets of statement hashes that the
         key statement possibly refines.
+    copy_stmts : Optional[bool]
+        If True, preassembly is run on deep copies of the statements, which
+        are left unchanged. If False, the statements are not copied, which
+        saves memory on large corpora, but their evidences are annotated in
+        place and the returned statements share agents and evidences with
+        them. Default: True
     save : Optional[str]
         The name of a pickle file to save the results (stmts_out) into.
     save_unique : Optional[str]
@@ -454,7 +467,7 @@ def run_preassembly(stmts_in, return_toplevel=True, poolsize=None,
     be = BeliefEngine(scorer=belief_scorer, matches_fun=matches_fun)
     pa = Preassembler(use_ontology, stmts_in, matches_fun=matches_fun,
                       refinement_fun=refinement_fun,
-                      refinement_ns=refinement_ns)
+                      refinement_ns=refinement_ns, copy_stmts=copy_stmts)
     if normalize_equivalences:
         logger.info('Normalizing equals on %d statements' % len(pa.stmts))
         pa.normalize_equivalences(normalize_ns)
@@ -522,9 +535,13 @@ def run_preassembly_related(preassembler, beliefengine, **kwargs):
         If True, only the top-level statements are returned. If False,
         all statements are returned irrespective of level of specificity.
         Default: True
+    poolsize : Optional[int]
+        The number of worker processes to use to parallelize the
+        comparisons performed by the function. If None (default), no
+        parallelization is performed.
     size_cutoff : Optional[int]
-        Groups with size_cutoff or more statements are sent to worker
-        processes, while smaller groups are compared in the parent process.
+        Shards with size_cutoff or more comparisons are sent to worker
+        processes, while smaller shards are compared in the parent process.
         Default value is 100. Not relevant when parallelization is not
         used.
     flatten_evidence : Optional[bool]
@@ -546,9 +563,11 @@ def run_preassembly_related(preassembler, beliefengine, **kwargs):
     logger.info('Combining related on %d statements...' %
                 len(preassembler.unique_stmts))
     return_toplevel = kwargs.get('return_toplevel', True)
+    poolsize = kwargs.get('poolsize', None)
     size_cutoff = kwargs.get('size_cutoff', 100)
     filters = kwargs.get('filters', None)
     stmts_out = preassembler.combine_related(return_toplevel=False,
+                                             poolsize=poolsize,
                                              size_cutoff=size_cutoff,
                                              filters=filters)
     # Calculate beliefs
@@ -576,6 +595,41 @@ def run_preassembly_related(preassembler, beliefengine, **kwargs):
     return stmts_out
 
 
+@register_pipeline
+def make_statement_table(stmts_in):
+    """Return a columnar StatementTable built from a list of statements.
+
+    The filters in this module that accept a StatementTable instead of a
+    list of statements run as vectorized operations over its columns and
+    return a filtered StatementTable, whose statements attribute contains
+    the list of filtered statements.
+
+    Parameters
+    ----------
+    stmts_in : list[indra.statements.Statement]
+        A list of statements.
+
+    Returns
+    -------
+    table : indra.tools.statement_table.StatementTable
+        A StatementTable of the statements.
+    """
+    logger.info('Making a statement table of %d statements...' %
+                len(stmts_in))
+    return StatementTable(stmts_in)
+
+
+def _statements_like(stmts_in, stmts_out):
+    """Return stmts_out as a StatementTable if stmts_in is one.
+
+    This is used by filters that don't have a vectorized implementation for
+    some of their options, and may have changed the statements.
+    """
+    if isinstance(stmts_in, StatementTable):
+        return StatementTable(stmts_out)
+    return stmts_out
+
+
 @register_pipeline
 def filter_by_type(stmts_in, stmt_type, invert=False, **kwargs):
     """Filter to a given statement type.
@@ -605,7 +659,10 @@ def filter_by_type(stmts_in, stmt_type, invert=False, **kwargs):
     logger.info('Filtering %d statements for type %s%s...' %
                 (len(stmts_in), 'not ' if invert else '',
                  stmt_type.__name__))
-    if not invert:
+    if isinstance(stmts_in, StatementTable):
+        mask = stmts_in.type_mask(stmt_type)
+        stmts_out = stmts_in.subset(~mask if invert else mask)
+    elif not invert:
         stmts_out = [st for st in stmts_in if isinstance(st, stmt_type)]
     else:
         stmts_out = [st for st in stmts_in if not isinstance(st, stmt_type)]
@@ -713,6 +770,15 @@ def filter_grounded_only(stmts_in, score_threshold=None, remove_bound=False,
     """
     logger.info('Filtering %d statements for grounded agents...' % 
                 len(stmts_in))
+    if isinstance(stmts_in, StatementTable) and not score_threshold \
+            and not remove_bound:
+        stmts_out = stmts_in.subset(
+            stmts_in.agent_mask(stmts_in.agent_grounded))
+        logger.info('%d statements after filter...' % len(stmts_out))
+        dump_pkl = kwargs.get('save')
+        if dump_pkl:
+            dump_statements(stmts_out, dump_pkl)
+        return stmts_out
     stmts_out = []
     for st in stmts_in:
         grounded = True
@@ -731,6 +797,7 @@ def filter_grounded_only(stmts_in, score_threshold=None, remove_bound=False,
                     break
         if grounded:
             stmts_out.append(st)
+    stmts_out = _statements_like(stmts_in, stmts_out)
     logger.info('%d statements after filter...' % len(stmts_out))
     dump_pkl = kwargs.get('save')
     if dump_pkl:
@@ -793,6 +860,16 @@ def filter_genes_only(stmts_in, specific_only=False, remove_bound=False,
     """
     logger.info('Filtering %d statements for ones containing genes only...' % 
                 len(stmts_in))
+    if isinstance(stmts_in, StatementTable) and not remove_bound:
+        gene_ns = ['HGNC', 'UP'] if specific_only else ['HGNC', 'UP', 'FPLX']
+        rows = numpy.any([stmts_in.grounding_rows(db_ns)
+                          for db_ns in gene_ns], axis=0)
+        stmts_out = stmts_in.subset(stmts_in.agent_mask(rows))
+        logger.info('%d statements after filter...' % len(stmts_out))
+        dump_pkl = kwargs.get('save')
+        if dump_pkl:
+            dump_statements(stmts_out, dump_pkl)
+        return stmts_out
     stmts_out = []
     for st in stmts_in:
         genes_only = True
@@ -811,6 +888,7 @@ def filter_genes_only(stmts_in, specific_only=False, remove_bound=False,
 
         if genes_only:
             stmts_out.append(st)
+    stmts_out = _statements_like(stmts_in, stmts_out)
     logger.info('%d statements after filter...' % len(stmts_out))
     dump_pkl = kwargs.get('save')
     if dump_pkl:
@@ -841,12 +919,13 @@ def filter_belief(stmts_in, belief_cutoff, **kwargs):
     logger.info('Filtering %d statements to above %f belief' %
                 (len(stmts_in), belief_cutoff))
     # The first round of filtering is in the top-level list
-    stmts_out = []
+    if isinstance(stmts_in, StatementTable):
+        stmts_out = stmts_in.subset(stmts_in.belief >= belief_cutoff)
+    else:
+        stmts_out = [stmt for stmt in stmts_in
+                     if stmt.belief >= belief_cutoff]
     # Now we eliminate supports/supported-by
-    for stmt in stmts_in:
-        if stmt.belief < belief_cutoff:
-            continue
-        stmts_out.append(stmt)
+    for stmt in stmts_out:
         supp_by = []
         supp = []
         for st in stmt.supports:
@@ -920,6 +999,19 @@ def filter_gene_list(stmts_in, gene_list, policy, allow_families=False,
                             if db_ns == 'FPLX']
     stmts_out = []
 
+    if isinstance(stmts_in, StatementTable) and not remove_bound:
+        if policy in ('one', 'all'):
+            mask = stmts_in.agent_mask(stmts_in.name_rows(filter_list),
+                                       policy)
+            stmts_out = stmts_in.subset(~mask if invert else mask)
+        else:
+            stmts_out = stmts_in
+        logger.info('%d statements after filter...' % len(stmts_out))
+        dump_pkl = kwargs.get('save')
+        if dump_pkl:
+            dump_statements(stmts_out, dump_pkl)
+        return stmts_out
+
     if remove_bound:
         # If requested, remove agents whose names are not in the list from
         # all bound conditions
@@ -962,6 +1054,7 @@ def filter_gene_list(stmts_in, gene_list, policy, allow_families=False,
                 stmts_out.append(st)
     else:
         stmts_out = stmts_in
+    stmts_out = _statements_like(stmts_in, stmts_out)
 
     logger.info('%d statements after filter...' % len(stmts_out))
     dump_pkl = kwargs.get('save')
@@ -1006,7 +1099,14 @@ def filter_concept_names(stmts_in, name_list, policy, invert=False, **kwargs):
 
     stmts_out = []
 
-    if policy == 'one':
+    if isinstance(stmts_in, StatementTable):
+        if policy in ('one', 'all'):
+            mask = stmts_in.agent_mask(stmts_in.name_rows(name_list), policy,
+                                       include_bound=False)
+            stmts_out = stmts_in.subset(~mask if invert else mask)
+        else:
+            stmts_out = stmts_in
+    elif policy == 'one':
         for st in stmts_in:
             found = False
             agent_list = st.agent_list()
@@ -1106,9 +1206,21 @@ def filter_by_db_refs(stmts_in, namespace, values, policy, invert=False,
 
     enough = all if policy == 'all' else any
 
-    stmts_out = [s for s in stmts_in
-                 if enough([meets_criterion(ag) for ag in s.agent_list()
-                            if ag is not None])]
+    if isinstance(stmts_in, StatementTable):
+        def value_matches(entry):
+            if match_suffix:
+                return any([entry.endswith(e) for e in values])
+            return entry in values
+        # Agents without an entry in the namespace never meet the criterion
+        rows = stmts_in.grounding_rows(namespace, value_matches)
+        if invert:
+            rows = stmts_in.has_grounding_rows(namespace) & ~rows
+        stmts_out = stmts_in.subset(stmts_in.agent_mask(rows, policy,
+                                                        include_bound=False))
+    else:
+        stmts_out = [s for s in stmts_in
+                     if enough([meets_criterion(ag) for ag in s.agent_list()
+                                if ag is not None])]
 
     logger.info('%d Statements after filter...' % len(stmts_out))
     dump_pkl = kwargs.get('save')
@@ -1150,6 +1262,15 @@ def filter_human_only(stmts_in, remove_bound=False, **kwargs):
         else:
             return True
 
+    if isinstance(stmts_in, StatementTable) and not remove_bound:
+        rows = stmts_in.grounding_rows(
+            'UP', lambda upid: upid and not uniprot_client.is_human(upid))
+        stmts_out = stmts_in.subset(stmts_in.agent_mask(~rows))
+        logger.info('%d statements after filter...' % len(stmts_out))
+        if dump_pkl:
+            dump_statements(stmts_out, dump_pkl)
+        return stmts_out
+
     for st in stmts_in:
         human_genes = True
         for agent in st.agent_list():
@@ -1164,6 +1285,7 @@ def filter_human_only(stmts_in, remove_bound=False, **kwargs):
                     break
         if human_genes:
             stmts_out.append(st)
+    stmts_out = _statements_like(stmts_in, stmts_out)
     logger.info('%d statements after filter...' % len(stmts_out))
     if dump_pkl:
         dump_statements(stmts_out, dump_pkl)
@@ -1316,6 +1438,13 @@ def filter_evidence_source(stmts_in, source_apis, policy='one', **kwargs):
     """
     logger.info('Filtering %d statements to evidence source "%s" of: %s...' %
                 (len(stmts_in), policy, ', '.join(source_apis)))
+    if isinstance(stmts_in, StatementTable):
+        stmts_out = stmts_in.subset(stmts_in.source_mask(source_apis, policy))
+        logger.info('%d statements after filter...' % len(stmts_out))
+        dump_pkl = kwargs.get('save')
+        if dump_pkl:
+            dump_statements(stmts_out, dump_pkl)
+        return stmts_out
     stmts_out = []
     for st in stmts_in:
         sources = set([ev.source_api for ev in st.evidence])
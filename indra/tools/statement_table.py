@@ -0,0 +1,348 @@
+"""A columnar representation of a list of Statements for bulk filtering.
+
+A :py:class:`StatementTable` is built once from a list of Statements and
+holds the properties that filters in :py:mod:`indra.tools.assemble_corpus`
+look at (Statement types, beliefs, evidence sources and the names and
+groundings of Agents) in NumPy arrays. Filters then become vectorized masks
+over these arrays, and filtering a table returns a new table with the
+matching rows, so that filters can be chained without looking at the
+Statement objects again. The registered filters in
+:py:mod:`indra.tools.assemble_corpus` accept a StatementTable in place of
+a list of Statements and then return a StatementTable.
+
+Example
+-------
+>>> from indra.statements import Agent, Phosphorylation
+>>> from indra.tools import assemble_corpus as ac
+>>> stmts = [Phosphorylation(Agent('MAP2K1', db_refs={'HGNC': '6840'}),
+...                          Agent('MAPK1', db_refs={'HGNC': '6871'}))]
+>>> table = StatementTable(stmts)
+>>> table = ac.filter_by_type(table, 'Modification')
+>>> table = ac.filter_grounded_only(table)
+>>> len(table.statements)
+1
+"""
+__all__ = ['StatementTable']
+
+import copy
+import logging
+import numpy
+from indra.statements import Agent
+
+
+logger = logging.getLogger(__name__)
+
+
+class StatementTable(object):
+    """A columnar table of the properties of a list of Statements.
+
+    The table has one row per Statement, and one agent row per Agent that
+    participates in a Statement directly or through the bound conditions of
+    an Agent. String valued properties are stored as integer codes that
+    index into lists of unique values shared by all tables derived from the
+    same original table.
+
+    Parameters
+    ----------
+    statements : list[indra.statements.Statement]
+        A list of INDRA Statements to build the table from.
+
+    Attributes
+    ----------
+    statements : list[indra.statements.Statement]
+        The Statements in the table, in the order of the rows.
+    stmt_types : list[type]
+        The list of Statement classes indexed by `type_codes`.
+    type_codes : numpy.ndarray
+        The code of the type of each Statement.
+    belief : numpy.ndarray
+        The belief of each Statement.
+    evidence_count : numpy.ndarray
+        The number of Evidences of each Statement.
+    sources : list[str]
+        The list of evidence source APIs indexed by the columns of
+        `source_counts`.
+    source_counts : numpy.ndarray
+        A two dimensional array with the number of Evidences of each
+        Statement (rows) from each source API (columns).
+    agent_stmt : numpy.ndarray
+        The index of the Statement of each agent row.
+    agent_bound : numpy.ndarray
+        Whether each agent row is an Agent in a bound condition.
+    agent_names : numpy.ndarray
+        The code of the name of the Agent of each agent row.
+    names : list[str]
+        The list of Agent names indexed by `agent_names`.
+    agent_grounded : numpy.ndarray
+        Whether the Agent of each agent row is grounded to a name space
+        other than TEXT or TEXT_NORM.
+    groundings : dict[str, numpy.ndarray]
+        For each name space, the code of the db_refs entry of the Agent of
+        each agent row in that name space, or -1 if the Agent has no entry
+        in the name space. For entries that are lists of scored groundings,
+        the top grounding is used.
+    grounding_values : dict[str, list]
+        For each name space, the list of db_refs entries indexed by the codes
+        in `groundings`.
+    """
+    def __init__(self, statements):
+        self.statements = list(statements)
+        type_idx = {}
+        source_idx = {}
+        name_idx = {}
+        grounding_idx = {}
+        type_codes = []
+        belief = []
+        evidence_count = []
+        ev_stmt = []
+        ev_source = []
+        agent_rows = []
+        for stmt_idx, stmt in enumerate(self.statements):
+            type_codes.append(type_idx.setdefault(type(stmt), len(type_idx)))
+            belief.append(stmt.belief)
+            evidence_count.append(len(stmt.evidence))
+            for ev in stmt.evidence:
+                ev_stmt.append(stmt_idx)
+                ev_source.append(source_idx.setdefault(ev.source_api,
+                                                       len(source_idx)))
+            for agent in stmt.agent_list():
+                if agent is None:
+                    continue
+                agent_rows.append((stmt_idx, False, agent))
+                if isinstance(agent, Agent):
+                    agent_rows += [(stmt_idx, True, bc.agent)
+                                   for bc in agent.bound_conditions]
+
+        self.stmt_types = list(type_idx)
+        self.type_codes = numpy.array(type_codes, dtype=int)
+        self.belief = numpy.array(belief, dtype=float)
+        self.evidence_count = numpy.array(evidence_count, dtype=int)
+        self.sources = list(source_idx)
+        n_sources = len(self.sources)
+        source_counts = numpy.bincount(
+            numpy.array(ev_stmt, dtype=int) * n_sources +
+            numpy.array(ev_source, dtype=int),
+            minlength=len(self.statements) * n_sources)
+        self.source_counts = source_counts.reshape(len(self.statements),
+                                                   n_sources)
+
+        n_rows = len(agent_rows)
+        self.agent_stmt = numpy.array([row[0] for row in agent_rows],
+                                      dtype=int)
+        self.agent_bound = numpy.array([row[1] for row in agent_rows],
+                                       dtype=bool)
+        self.agent_names = numpy.array(
+            [name_idx.setdefault(row[2].name, len(name_idx))
+             for row in agent_rows], dtype=int)
+        self.names = list(name_idx)
+        self.agent_grounded = numpy.zeros(n_rows, dtype=bool)
+        self.groundings = {}
+        self.grounding_values = {}
+        for row_idx, (_, _, agent) in enumerate(agent_rows):
+            for db_ns, db_id in agent.db_refs.items():
+                if db_ns not in ('TEXT', 'TEXT_NORM') and db_id:
+                    self.agent_grounded[row_idx] = True
+                if isinstance(db_id, list):
+                    db_id = db_id[0][0] if db_id else None
+                codes = self.groundings.get(db_ns)
+                if codes is None:
+                    codes = numpy.full(n_rows, -1, dtype=int)
+                    self.groundings[db_ns] = codes
+                    self.grounding_values[db_ns] = []
+                    grounding_idx[db_ns] = {}
+                values = self.grounding_values[db_ns]
+                try:
+                    code = grounding_idx[db_ns].setdefault(db_id,
+                                                           len(values))
+                # Entries that can't be hashed (e.g., compositional
+                # groundings) get a code of their own
+                except TypeError:
+                    code = len(values)
+                if code == len(values):
+                    values.append(db_id)
+                codes[row_idx] = code
+
+    def __len__(self):
+        return len(self.statements)
+
+    def __iter__(self):
+        return iter(self.statements)
+
+    def __getitem__(self, idx):
+        return self.statements[idx]
+
+    def subset(self, mask):
+        """Return a table with the Statements selected by a mask.
+
+        Parameters
+        ----------
+        mask : numpy.ndarray
+            A boolean array with one value per Statement, True for the
+            Statements to keep.
+
+        Returns
+        -------
+        StatementTable
+            A table with the selected rows of this table.
+        """
+        mask = numpy.asarray(mask, dtype=bool)
+        table = copy.copy(self)
+        table.statements = [stmt for stmt, keep in zip(self.statements, mask)
+                            if keep]
+        table.type_codes = self.type_codes[mask]
+        table.belief = self.belief[mask]
+        table.evidence_count = self.evidence_count[mask]
+        table.source_counts = self.source_counts[mask]
+        # Agent rows follow their Statements and their Statement indices are
+        # renumbered to the positions of the Statements in the new table
+        row_mask = mask[self.agent_stmt]
+        new_idx = numpy.cumsum(mask) - 1
+        table.agent_stmt = new_idx[self.agent_stmt[row_mask]]
+        table.agent_bound = self.agent_bound[row_mask]
+        table.agent_names = self.agent_names[row_mask]
+        table.agent_grounded = self.agent_grounded[row_mask]
+        table.groundings = {db_ns: codes[row_mask] for db_ns, codes
+                            in self.groundings.items()}
+        return table
+
+    def type_mask(self, stmt_type):
+        """Return a mask of the Statements that are of a given type.
+
+        Parameters
+        ----------
+        stmt_type : type
+            A Statement class, subclasses of which also match.
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean array with one value per Statement.
+        """
+        codes = [code for code, cls in enumerate(self.stmt_types)
+                 if issubclass(cls, stmt_type)]
+        return numpy.isin(self.type_codes, codes)
+
+    def source_mask(self, source_apis, policy='one'):
+        """Return a mask of the Statements with evidence from given sources.
+
+        Parameters
+        ----------
+        source_apis : list[str]
+            A list of source APIs.
+        policy : Optional[str]
+            If 'one', Statements with evidence from any of the sources match,
+            if 'all', Statements with evidence from all of the sources match
+            and if 'none', Statements without evidence from any of the
+            sources match. Default: 'one'
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean array with one value per Statement.
+        """
+        has_source = self.source_counts > 0
+        columns = [self.sources.index(source) for source in set(source_apis)
+                   if source in self.sources]
+        any_source = has_source[:, columns].any(axis=1)
+        if policy == 'one':
+            return any_source
+        elif policy == 'all':
+            if len(columns) < len(set(source_apis)):
+                return numpy.zeros(len(self), dtype=bool)
+            return has_source[:, columns].all(axis=1)
+        elif policy == 'none':
+            return ~any_source
+        return numpy.zeros(len(self), dtype=bool)
+
+    def name_rows(self, names):
+        """Return a mask of the agent rows whose Agent has one of the names.
+        """
+        names = set(names)
+        codes = [code for code, name in enumerate(self.names)
+                 if name in names]
+        return numpy.isin(self.agent_names, codes)
+
+    def grounding_rows(self, db_ns, value_fun=bool):
+        """Return a mask of the agent rows with a matching db_refs entry.
+
+        Parameters
+        ----------
+        db_ns : str
+            The name space of the db_refs entries to look at.
+        value_fun : Optional[function]
+            A function that is called once for each unique db_refs entry in
+            the name space and returns whether it matches. By default,
+            entries that aren't empty match.
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean array with one value per agent row, False for rows
+            whose Agent has no entry in the name space.
+        """
+        codes = self.groundings.get(db_ns)
+        if codes is None:
+            return numpy.zeros(len(self.agent_stmt), dtype=bool)
+        # The value for code -1 is the last one, which is False
+        values = numpy.array([bool(value_fun(value)) for value
+                              in self.grounding_values[db_ns]] + [False],
+                             dtype=bool)
+        return values[codes]
+
+    def has_grounding_rows(self, db_ns):
+        """Return a mask of the agent rows with a db_refs entry in a name
+        space."""
+        codes = self.groundings.get(db_ns)
+        if codes is None:
+            return numpy.zeros(len(self.agent_stmt), dtype=bool)
+        return codes >= 0
+
+    def agent_mask(self, rows, policy='all', include_bound=True):
+        """Return a mask of the Statements whose agent rows match.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray
+            A boolean array with one value per agent row.
+        policy : Optional[str]
+            If 'all', Statements all of whose agent rows match are selected,
+            including Statements without Agents. If 'one', Statements with
+            at least one matching agent row are selected. Default: 'all'
+        include_bound : Optional[bool]
+            If True, agent rows of Agents in bound conditions are taken into
+            account, otherwise only the Agents directly participating in the
+            Statements are. Default: True
+
+        Returns
+        -------
+        numpy.ndarray
+            A boolean array with one value per Statement.
+        """
+        rows = numpy.asarray(rows, dtype=bool)
+        considered = numpy.ones(len(rows), dtype=bool) if include_bound \
+            else ~self.agent_bound
+        if policy == 'one':
+            return numpy.bincount(self.agent_stmt[considered & rows],
+                                  minlength=len(self)) > 0
+        return numpy.bincount(self.agent_stmt[considered & ~rows],
+                              minlength=len(self)) == 0
+
+    def to_dataframe(self):
+        """Return a pandas DataFrame of the per-Statement columns.
+
+        Returns
+        -------
+        pandas.DataFrame
+            A DataFrame with the type, belief and number of evidences of each
+            Statement, and a column with the number of evidences from each
+            source API.
+        """
+        import pandas
+        df = pandas.DataFrame({
+            'type': [self.stmt_types[code].__name__
+                     for code in self.type_codes],
+            'belief': self.belief,
+            'evidence_count': self.evidence_count})
+        for col, source in enumerate(self.sources):
+            df[source] = self.source_counts[:, col]
+        return df
@@ -66,8 +66,10 @@ def decode_obj(obj, encoding='utf-8'):
     elif isinstance(obj, list) or isinstance(obj, tuple):
         return [decode_obj(item) for item in obj]
     elif hasattr(obj, '__dict__'):
-        for k, v in obj.__dict__.items():
-            obj.__dict__[k] = decode_obj(v)
+        # Objects with slots only have a read-only view of their attributes
+        # so these are set one by one
+        for k, v in list(obj.__dict__.items()):
+            setattr(obj, k, decode_obj(v))
         return obj
     elif isinstance(obj, dict):
         dec_obj = {}
@@ -67,6 +67,7 @@ def main():
                     'indra.literature', 'indra.mechlinker',
                     'indra.ontology', 'indra.ontology.bio',
                     'indra.ontology.world', 'indra.ontology.virtual',
+                    'indra.ontology.compiled',
                     'indra.ontology.app', 'indra.pipeline',
                     'indra.preassembler',
                     'indra.preassembler.grounding_mapper', 'indra.sources',